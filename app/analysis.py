@@ -1 +1,152 @@
-# ANALYSIS layer capsules
\ No newline at end of file
+from typing import List, Dict, Optional, Any
+import numpy as np
+from pydantic import BaseModel, Field
+from app.state import StateModel
+from app.tools.MilestoneGraph import MilestoneGraph, parse_weekly_hours
+from app.tools.TimelineSolver import TimelineSolver, milestone_hours
+
+# Monte Carlo completion-risk simulation.
+# Every trial is one possible run of the project: milestone hours are drawn
+# from a skewed triangular distribution around the estimate and weekly hours
+# wobble around the user's availability (already reduced for busy weeks and
+# calendar conflicts). All trials are evaluated together as trials × milestones
+# and trials × weeks NumPy arrays, so thousands of runs take milliseconds.
+
+# (optimistic, most likely, pessimistic) multipliers on the estimate; estimates run short
+DURATION_SPREAD = {
+    "simple": (0.8, 1.0, 1.5),
+    "medium": (0.8, 1.05, 1.9),
+    "complex": (0.75, 1.1, 2.4),
+}
+AVAILABILITY_MEAN = 0.9   # weeks rarely go exactly to plan
+AVAILABILITY_SD = 0.2
+HORIZON_FACTOR = 4        # simulate up to 4× the planned timeline before calling it unfinished
+
+
+class RiskSimulation(BaseModel):
+    """Completion forecast from the Monte Carlo simulator."""
+    trials: int = Field(..., description="Number of simulated projects")
+    timeline_weeks: float = Field(..., description="Planned duration the forecast is compared with")
+    on_time_probability: float = Field(..., ge=0.0, le=1.0, description="Share of trials finishing within the timeline")
+    p50_weeks: float = Field(..., description="Median finish week")
+    p90_weeks: float = Field(..., description="Finish week that 90% of trials beat")
+    expected_hours: float = Field(..., description="Mean simulated total hours")
+    unfinished_probability: float = Field(default=0.0, description="Share of trials not done within the simulation horizon")
+    critical_frequency: Dict[str, float] = Field(default_factory=dict, description="Share of trials where each milestone is on the critical path")
+    top_critical: List[str] = Field(default_factory=list, description="Milestones most often on the critical path")
+
+
+class CompletionRiskSimulator:
+    """Vectorized Monte Carlo over milestone durations and weekly availability."""
+
+    def __init__(self, trials: int = 5000, seed: Optional[int] = None):
+        self.trials = trials
+        self.rng = np.random.default_rng(seed)
+
+    def simulate(self, milestones: List[Dict[str, Any]], hours_per_week: float, timeline_weeks: float,
+                 complexity_level: Optional[str] = None, team_size: int = 1,
+                 capacity_by_week: Optional[List[float]] = None) -> RiskSimulation:
+        """Forecast finish weeks; capacity_by_week (per person) overrides hours_per_week where given."""
+        graph = MilestoneGraph(milestones)
+        order = graph.topological_order() or list(range(len(milestones)))
+        estimates = np.array([milestone_hours(m) for m in milestones], dtype=np.float64)
+        trials, count = self.trials, len(milestones)
+        horizon = max(int(np.ceil(timeline_weeks * HORIZON_FACTOR)), 1)
+
+        # trials × milestones sampled hours
+        low, mode, high = DURATION_SPREAD.get(complexity_level or "medium", DURATION_SPREAD["medium"])
+        if count:
+            hours = self.rng.triangular(low, mode, high, size=(trials, count)) * estimates
+        else:
+            hours = np.zeros((trials, 0))
+
+        # Longest dependency chain per trial; `via` remembers which predecessor set the start
+        finish = np.zeros((trials, count))
+        via = np.full((trials, count), -1, dtype=np.int64)
+        for i in order:
+            preds = graph.predecessors[i]
+            if preds:
+                pred_finish = finish[:, preds]
+                best = pred_finish.argmax(axis=1)
+                finish[:, i] = pred_finish[np.arange(trials), best] + hours[:, i]
+                via[:, i] = np.asarray(preds)[best]
+            else:
+                finish[:, i] = hours[:, i]
+        chain_hours = finish.max(axis=1) if count else np.zeros(trials)
+        total_hours = hours.sum(axis=1)
+
+        # trials × weeks available hours for one person
+        base = np.full(horizon, float(hours_per_week))
+        if capacity_by_week:
+            known = min(len(capacity_by_week), horizon)
+            base[:known] = capacity_by_week[:known]
+        wobble = np.clip(self.rng.normal(AVAILABILITY_MEAN, AVAILABILITY_SD, size=(trials, horizon)), 0.2, 1.2)
+        person = base * wobble
+
+        team = max(team_size, 1)
+        # A team works in parallel, but the dependency chain still moves at one person's pace
+        weeks_chain = self._weeks_to_complete(person, chain_hours)
+        weeks_total = self._weeks_to_complete(person * team, total_hours)
+        weeks = np.maximum(weeks_chain, weeks_total)
+        done = np.isfinite(weeks)
+
+        critical = self._critical_counts(finish, via) if count else np.zeros(0)
+        ids = graph.ids
+        frequency = {ids[i]: round(float(critical[i]) / trials, 3) for i in range(count)}
+        top = [ids[i] for i in np.argsort(-critical, kind="stable")[:3] if critical[i] > 0]
+        capped = np.where(done, weeks, float(horizon))
+
+        return RiskSimulation(
+            trials=trials,
+            timeline_weeks=float(timeline_weeks),
+            on_time_probability=round(float(np.mean(weeks <= timeline_weeks)), 3),
+            p50_weeks=round(float(np.percentile(capped, 50)), 2),
+            p90_weeks=round(float(np.percentile(capped, 90)), 2),
+            expected_hours=round(float(total_hours.mean()), 1),
+            unfinished_probability=round(float(1.0 - done.mean()), 3),
+            critical_frequency=frequency,
+            top_critical=top,
+        )
+
+    def simulate_state(self, state: StateModel) -> RiskSimulation:
+        """Run the simulation from a StateModel's milestones, timeline and time commitment."""
+        timeline = state.timeline or {}
+        weeks = float(timeline.get("timeline_weeks") or TimelineSolver.DEFAULT_WEEKS)
+        hours_per_week = (state.time_commitment.hours_per_week if state.time_commitment else None) \
+            or parse_weekly_hours(timeline.get("weekly_commitment")) or TimelineSolver.DEFAULT_HOURS_PER_WEEK
+        return self.simulate(
+            milestones=state.milestones,
+            hours_per_week=hours_per_week,
+            timeline_weeks=weeks,
+            complexity_level=state.complexity_level,
+            team_size=state.team_size if state.has_team else 1,
+            capacity_by_week=timeline.get("capacity_by_week"),  # set by the timeline solver
+        )
+
+    @staticmethod
+    def _weeks_to_complete(capacity: np.ndarray, needed: np.ndarray) -> np.ndarray:
+        """Fractional week at which cumulative capacity covers the hours needed (inf if never)."""
+        cumulative = np.cumsum(capacity, axis=1)
+        reached = cumulative >= needed[:, None]
+        week = reached.argmax(axis=1)
+        rows = np.arange(capacity.shape[0])
+        before = np.where(week > 0, cumulative[rows, week - 1], 0.0)
+        fraction = (needed - before) / np.maximum(capacity[rows, week], 1e-9)
+        return np.where(reached.any(axis=1), week + np.clip(fraction, 0.0, 1.0), np.inf)
+
+    @staticmethod
+    def _critical_counts(finish: np.ndarray, via: np.ndarray) -> np.ndarray:
+        """How many trials each milestone sits on the critical path, backtracking all trials at once."""
+        trials, count = finish.shape
+        on_path = np.zeros((trials, count), dtype=bool)
+        node = finish.argmax(axis=1)
+        rows = np.arange(trials)
+        active = np.ones(trials, dtype=bool)
+        for _ in range(count):
+            if not active.any():
+                break
+            on_path[rows[active], node[active]] = True
+            node = np.where(active, via[rows, node], -1)
+            active = node >= 0
+            node = np.maximum(node, 0)
+        return on_path.sum(axis=0)
@@ -0,0 +1,282 @@
+from typing import List, Dict, Optional, Any, Callable, Iterable, Tuple, Type, Union, get_args
+from datetime import datetime
+import ormsgpack
+from pydantic import BaseModel
+from app.state import StateModel, TimeCommitment
+from app.person import Person, migrate_completed_tasks
+
+# Compact binary codec for StateModel, Person and the chatbot's State.
+# A record is a msgpack array [schema tag, schema version, fid, value, fid,
+# value, ...] where each field is written under a small fixed integer id
+# instead of its name, and fields still at their default are left out.
+#
+# Compatibility rules:
+#   - field ids are never reused; removed fields move to `retired`
+#   - new fields get the next id and bump `version`
+#   - decoders skip ids they do not know (newer writers) and fill defaults
+#     for ids that are missing (older writers)
+#   - `migrations[v]` upgrades a v payload (as a name → value dict) to v + 1
+#     when a field's meaning changes, not just its presence; values of
+#     retired fields are passed to migrations and dropped afterwards
+
+_PACK = ormsgpack.OPT_SERIALIZE_PYDANTIC
+
+
+class CodecError(ValueError):
+    """Raised for bytes that are not a record this codec can read."""
+
+
+class Schema:
+    """Field-id table for one record type."""
+
+    def __init__(self, tag: int, version: int, fields: Dict[str, int], model: Optional[Type[BaseModel]] = None,
+                 retired: Optional[Dict[int, str]] = None, nested: Optional[Dict[str, "Schema"]] = None,
+                 converters: Optional[Dict[str, Tuple[Callable, Callable]]] = None,
+                 migrations: Optional[Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]]] = None):
+        ids = list(fields.values()) + list((retired or {}).keys())
+        if len(ids) != len(set(ids)):
+            raise ValueError(f"Duplicate field ids in schema {tag}")
+        self.tag = tag
+        self.version = version
+        self.fields = fields
+        self.names = {fid: name for name, fid in fields.items()}
+        self.retired = retired or {}
+        self.model = model
+        self.nested = nested or {}
+        self.converters = converters or {}   # name -> (to_wire, from_wire)
+        self.migrations = migrations or {}
+        self.defaults: Dict[str, Any] = {}
+        self.factories: Dict[str, Callable[[], Any]] = {}
+        self.datetimes = set()
+        if model is not None:
+            for name, info in model.model_fields.items():
+                if info.default_factory is not None:
+                    self.factories[name] = info.default_factory
+                    self.defaults[name] = info.default_factory()
+                elif not info.is_required():
+                    self.defaults[name] = info.default
+                if datetime in (info.annotation, *get_args(info.annotation)):
+                    self.datetimes.add(name)
+
+    def construct(self, values: Dict[str, Any], model: Optional[Type[BaseModel]] = None,
+                  skip: Iterable[str] = ()) -> BaseModel:
+        """Instance from trusted values without validation (model_construct minus its per-call overhead).
+
+        `model` may be a subclass of the schema's model; fields in `skip` are left unset for lazy loading.
+        """
+        model = model or self.model
+        skip = set(skip)
+        state = {}
+        for name in self.model.model_fields:
+            if name in skip:
+                continue
+            if name in values:
+                state[name] = values[name]
+            elif name in self.factories:
+                state[name] = self.factories[name]()
+            else:
+                state[name] = self.defaults.get(name)
+        instance = model.__new__(model)
+        object.__setattr__(instance, "__dict__", state)
+        object.__setattr__(instance, "__pydantic_fields_set__", set(values))
+        object.__setattr__(instance, "__pydantic_extra__", None)
+        object.__setattr__(instance, "__pydantic_private__", None)
+        return instance
+
+
+# ───── Schemas ──────────────────────────────────────────────────────────
+
+TIME_COMMITMENT_SCHEMA = Schema(2, 1, model=TimeCommitment, fields={
+    "hours_per_week": 1, "preferred_schedule": 2, "work_intensity": 3, "consistency_preference": 4,
+    "timezone": 5, "collaboration_style": 6, "major_constraints": 7, "busy_periods": 8,
+})
+
+STATE_SCHEMA = Schema(1, 1, model=StateModel, nested={"time_commitment": TIME_COMMITMENT_SCHEMA}, fields={
+    "user_id": 1, "session_id": 2, "messages": 3, "current_topic": 4, "conversation_context": 5,
+    "session_start_time": 6, "last_updated": 7, "user_type": 8, "learning_goal": 9, "project_goal": 10,
+    "project_type": 11, "project_context": 12, "idea_origin": 13, "project_data": 14, "extracted_project": 15,
+    "interests": 16, "technical_skills": 17, "milestones": 18, "timeline": 19, "learning_path": 20,
+    "quick_wins": 21, "pivot_opportunities": 22, "project_deliverables": 23, "completion_prep": 24,
+    "portfolio_items": 25, "report": 26, "potential_ideas": 27, "info_gaps": 28, "reflections": 29,
+    "confidence_level": 30, "time_commitment": 31, "end_goal": 32, "has_team": 33, "team_members": 34,
+    "team_size": 35, "calendar_data": 36, "team_availability": 37, "optimal_work_blocks": 38,
+    "calendar_conflicts": 39, "current_node": 40, "workflow_phase": 41, "retry_count": 42, "checkpoints": 43,
+    "preferred_tone": 44, "current_milestone_index": 45, "status": 46, "execution_history": 47,
+    "project_completeness": 48, "complexity_level": 49, "needs_more_info": 50, "recommended_resources": 51,
+    "skill_gaps": 52, "reasoning": 53, "errors": 54, "warnings": 55, "log": 56, "ready_for_publish": 57,
+    "publish_slug": 58, "is_public": 59,
+})
+
+# v2: completed_tasks moved out of Person into its TaskLog
+PERSON_SCHEMA = Schema(3, 2, model=Person, retired={16: "completed_tasks"}, fields={
+    "person_id": 1, "name": 2, "email": 3, "user_type": 4, "technical_skills": 5, "skill_levels": 6,
+    "interests": 7, "experience_level": 8, "weekly_hours_available": 9, "work_style": 10,
+    "preferred_working_hours": 11, "timezone": 12, "role_in_project": 13, "responsibilities": 14,
+    "milestones_assigned": 15, "current_milestone": 17, "progress_notes": 18,
+    "created_at": 19, "last_active": 20, "project_ids": 21, "task_log_id": 22,
+}, migrations={1: migrate_completed_tasks})
+
+
+def _messages_to_wire(messages: List[Any]) -> List[Any]:
+    """LangChain messages as [type, message_to_dict data without its empty fields]; other items as they are."""
+    from langchain_core.messages import BaseMessage, message_to_dict
+    wire = []
+    for m in messages:
+        if not isinstance(m, BaseMessage):
+            wire.append(m)  # role/content dicts straight from the request
+            continue
+        data = message_to_dict(m)["data"]
+        wire.append([m.type, {k: v for k, v in data.items() if v or k == "content"}])
+    return wire
+
+
+def _messages_from_wire(messages: List[Any]) -> List[Any]:
+    from langchain_core.messages import messages_from_dict
+    restored = []
+    for m in messages:
+        if isinstance(m, list) and len(m) == 2 and isinstance(m[1], dict):
+            restored.append(messages_from_dict([{"type": m[0], "data": m[1]}])[0])
+        elif isinstance(m, list) and len(m) in (2, 3) and m[0] in ("ai", "human", "system", "tool", "chat"):
+            # Written before whole messages were kept: [type, content] or [type, content, extras]
+            restored.append(messages_from_dict([{"type": m[0], "data": {"content": m[1], **(m[2] if len(m) > 2 else {})}}])[0])
+        else:
+            restored.append(m)
+    return restored
+
+
+# chatbot_backend.State is a TypedDict, so it round-trips as a plain dict
+CHAT_STATE_SCHEMA = Schema(4, 1, converters={"messages": (_messages_to_wire, _messages_from_wire)}, fields={
+    "messages": 1, "rejected_ideas": 2, "preferences": 3, "accepted_idea": 4, "document_context": 5,
+})
+
+SCHEMAS: Dict[int, Schema] = {s.tag: s for s in (STATE_SCHEMA, TIME_COMMITMENT_SCHEMA, PERSON_SCHEMA, CHAT_STATE_SCHEMA)}
+_BY_MODEL: Dict[type, Schema] = {s.model: s for s in SCHEMAS.values() if s.model is not None}
+
+
+# ───── Encoding ─────────────────────────────────────────────────────────
+
+def _to_record(values: Dict[str, Any], schema: Schema) -> List[Any]:
+    record: List[Any] = [schema.tag, schema.version]
+    for name, fid in schema.fields.items():
+        if name not in values:
+            continue
+        value = values[name]
+        if name in schema.defaults and value == schema.defaults[name]:
+            continue
+        if value is not None and name in schema.nested:
+            value = _to_record(value if isinstance(value, dict) else vars(value), schema.nested[name])
+        elif value is not None and name in schema.converters:
+            value = schema.converters[name][0](value)
+        record.append(fid)
+        record.append(value)
+    return record
+
+
+def encode(obj: Union[BaseModel, Dict[str, Any]], schema: Optional[Schema] = None) -> bytes:
+    """Binary record for a StateModel or Person (or a dict, given its schema, e.g. CHAT_STATE_SCHEMA)."""
+    schema = schema or _BY_MODEL.get(type(obj))
+    if schema is None:
+        raise CodecError(f"No codec schema for {type(obj).__name__}")
+    values = obj if isinstance(obj, dict) else obj.__dict__
+    return ormsgpack.packb(_to_record(values, schema), option=_PACK)
+
+
+def encode_chat_state(state: Dict[str, Any]) -> bytes:
+    return encode(state, CHAT_STATE_SCHEMA)
+
+
+# ───── Decoding ─────────────────────────────────────────────────────────
+
+def _record_values(record: Any, validate: bool) -> Tuple[Schema, Dict[str, Any]]:
+    if not isinstance(record, list) or len(record) < 2 or len(record) % 2:
+        raise CodecError("Not a codec record")
+    tag, version = record[0], record[1]
+    schema = SCHEMAS.get(tag)
+    if schema is None:
+        raise CodecError(f"Unknown schema tag {tag}")
+
+    values: Dict[str, Any] = {}
+    for i in range(2, len(record), 2):
+        name = schema.names.get(record[i])
+        if name is None:
+            if version < schema.version and record[i] in schema.retired:
+                values[schema.retired[record[i]]] = record[i + 1]   # for the migrations below
+            continue  # written by a newer schema version, or a retired field
+        value = record[i + 1]
+        if value is not None:
+            if name in schema.nested:
+                value = _from_record(value, validate)
+            elif name in schema.converters:
+                value = schema.converters[name][1](value)
+            elif name in schema.datetimes and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+        values[name] = value
+    for step in range(version, schema.version):
+        if step in schema.migrations:
+            values = schema.migrations[step](values)
+    for name in schema.retired.values():
+        values.pop(name, None)
+    return schema, values
+
+
+def _from_record(record: Any, validate: bool) -> Any:
+    schema, values = _record_values(record, validate)
+    if schema.model is None:
+        return values
+    if validate:
+        return schema.model.model_validate(values)
+    # Trusted bytes we wrote ourselves: skip validation, fill defaults
+    return schema.construct(values)
+
+
+def decode(data: bytes, validate: bool = False) -> Any:
+    """Model (or dict, for chat state) from encode() bytes; validate=True for untrusted input."""
+    try:
+        record = ormsgpack.unpackb(data)
+    except (ormsgpack.MsgpackDecodeError, TypeError) as e:
+        raise CodecError(f"Corrupt codec record: {e}") from e
+    return _from_record(record, validate)
+
+
+def decode_values(data: bytes) -> Tuple[Schema, Dict[str, Any]]:
+    """Schema and field values of a record without building the model (for partial loads)."""
+    try:
+        record = ormsgpack.unpackb(data)
+    except (ormsgpack.MsgpackDecodeError, TypeError) as e:
+        raise CodecError(f"Corrupt codec record: {e}") from e
+    return _record_values(record, validate=False)
+
+
+try:
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    from langchain_core.messages import BaseMessage
+
+    class CodecSerializer(JsonPlusSerializer):
+        """LangGraph checkpoint serializer that writes StateModel/Person values and message lists with this codec.
+
+        Checkpoints store each channel on its own, so the chatbot's "messages" channel arrives as a list of
+        messages; it is written in the wire form of CHAT_STATE_SCHEMA (every message type, all non-empty fields).
+        """
+
+        TYPE = "pfcodec"
+        MESSAGES_TYPE = "pfcodec-messages"
+
+        def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+            if type(obj) in _BY_MODEL:
+                return self.TYPE, encode(obj)
+            if isinstance(obj, list) and obj and all(isinstance(m, BaseMessage) for m in obj):
+                try:
+                    return self.MESSAGES_TYPE, ormsgpack.packb(_messages_to_wire(obj), option=_PACK)
+                except TypeError:
+                    pass  # extras msgpack cannot write: fall back to the default serializer
+            return super().dumps_typed(obj)
+
+        def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+            if data[0] == self.TYPE:
+                return decode(data[1])
+            if data[0] == self.MESSAGES_TYPE:
+                return _messages_from_wire(ormsgpack.unpackb(data[1]))
+            return super().loads_typed(data)
+except ImportError:  # langgraph and langchain are only needed for checkpointing
+    CodecSerializer = None
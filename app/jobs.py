@@ -0,0 +1,326 @@
+from typing import List, Dict, Optional, Any, Callable, Awaitable, AsyncIterator
+from datetime import datetime, timezone
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from app.state import StateModel, apply_patch
+from app.nodes.ReportNode import report_node
+from tools.tracing import start_trace
+
+# Background jobs for long-running planning work.
+# Submitting returns a job id at once; a pool of asyncio workers pulls the
+# highest-priority queued job (FIFO within a priority) and runs it. Jobs,
+# their progress events and their results live in SQLite, so a client can
+# poll or replay the event stream after reconnecting, and jobs that were
+# running when the process stopped are queued again on start. The queue has
+# a maximum depth; submissions beyond it are rejected rather than left to
+# wait indefinitely.
+
+logger = logging.getLogger(__name__)
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(os.path.expanduser("~"), ".cache", "projectforge", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "100"))
+TERMINAL = ("succeeded", "failed", "cancelled")
+
+Emit = Callable[[str, Dict[str, Any]], None]
+Runner = Callable[[StateModel, Emit], Awaitable[StateModel]]
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the queue already holds max_depth jobs."""
+
+
+class UnknownJob(KeyError):
+    """No job with this id."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ───── Runners ──────────────────────────────────────────────────────────
+
+async def run_plan(state: StateModel, emit: Emit) -> StateModel:
+    """Full planning pipeline; every node patch and progress event is emitted as it happens."""
+    from app.workflow import stream_plan   # imports the graph, which is heavy
+    async for update in stream_plan(state):
+        if "progress" in update:
+            emit("progress", update)
+            continue
+        state = apply_patch(state, update["patch"])
+        emit("node", update)
+    return state
+
+
+async def run_report(state: StateModel, emit: Emit) -> StateModel:
+    """Report only, for a state that already has milestones and a timeline."""
+    from app.workflow import tracked
+    patch = await asyncio.to_thread(tracked("report", report_node), state)
+    emit("node", {"node": "report", "patch": patch})
+    return apply_patch(state, patch)
+
+
+RUNNERS: Dict[str, Runner] = {"plan": run_plan, "report": run_report}
+
+
+# ───── Queue ────────────────────────────────────────────────────────────
+
+class JobQueue:
+    """SQLite-backed priority queue with an asyncio worker pool."""
+
+    def __init__(self, path: str = JOB_DB_PATH, workers: int = JOB_WORKERS, max_depth: int = JOB_MAX_QUEUE,
+                 runners: Optional[Dict[str, Runner]] = None):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.workers = workers
+        self.max_depth = max_depth
+        self.runners = runners or RUNNERS
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT UNIQUE NOT NULL,
+                kind TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                session_id TEXT,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, seq);
+            CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+        """)
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Condition] = None   # bound to the loop in start()
+        self._version = 0   # bumped on every change, so waiters can tell they missed a notify
+
+    # ───── Lifecycle ────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        """Requeue jobs interrupted by a restart and start the workers (idempotent)."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Condition()
+        with self._lock, self._db:
+            requeued = self._db.execute("UPDATE jobs SET status = 'queued', started_at = NULL "
+                                        "WHERE status = 'running'").rowcount
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted job(s)")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop the workers; running jobs go back to the queue for the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+
+    async def _notify(self) -> None:
+        self._version += 1
+        if self._wakeup is not None:
+            async with self._wakeup:
+                self._wakeup.notify_all()
+
+    # ───── Submitting and querying ──────────────────────────────────────
+
+    async def submit(self, state: StateModel, kind: str = "plan", priority: int = 0) -> Dict[str, Any]:
+        """Queue a job and return its status at once; raises QueueFull when the queue is at max depth."""
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        with self._lock, self._db:
+            depth = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if depth >= self.max_depth:
+                raise QueueFull(f"Job queue is full ({depth} queued)")
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, priority, status, session_id, payload, created_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, priority, state.session_id, state.model_dump_json(), _now()),
+            )
+        self._append_event(job_id, "queued", {"kind": kind, "priority": priority})
+        await self._notify()
+        return self.status(job_id)
+
+    def status(self, job_id: str, include_result: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, kind, priority, status, session_id, error, created_at, started_at, finished_at, seq "
+                "FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise UnknownJob(job_id)
+            position = None
+            if row[3] == "queued":
+                position = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND (priority > ? OR (priority = ? AND seq < ?))",
+                    (row[2], row[2], row[9])).fetchone()[0]
+        job = dict(zip(("job_id", "kind", "priority", "status", "session_id", "error", "created_at", "started_at",
+                        "finished_at"), row[:9]))
+        job["queue_position"] = position
+        if include_result and job["status"] == "succeeded":
+            job["result"] = self.result(job_id).model_dump(mode="json")
+        return job
+
+    def result(self, job_id: str) -> Optional[StateModel]:
+        """Final state of a succeeded job."""
+        with self._lock:
+            row = self._db.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise UnknownJob(job_id)
+        return StateModel.model_validate_json(row[0]) if row[0] else None
+
+    def jobs(self, session_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            if session_id is None:
+                rows = self._db.execute("SELECT id FROM jobs ORDER BY seq DESC LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = self._db.execute("SELECT id FROM jobs WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+                                        (session_id, limit)).fetchall()
+        return [self.status(r[0]) for r in rows]
+
+    @property
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    # ───── Cancelling ───────────────────────────────────────────────────
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued or running job; finished jobs are left as they are."""
+        with self._lock, self._db:
+            cancelled = self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (_now(), job_id)).rowcount
+        if cancelled:
+            self._append_event(job_id, "cancelled", {})
+            await self._notify()
+        elif job_id in self._running:
+            # The worker records the cancellation; a node already running in a thread finishes first
+            self._running[job_id].cancel()
+        return self.status(job_id)
+
+    # ───── Events ───────────────────────────────────────────────────────
+
+    def _append_event(self, job_id: str, event: str, data: Dict[str, Any]) -> None:
+        payload = json.dumps(data, default=str)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO job_events (job_id, seq, event, data) "
+                "SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ? FROM job_events WHERE job_id = ?",
+                (job_id, event, payload, job_id))
+
+    def events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute("SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                                    (job_id, after)).fetchall()
+        return [{"id": seq, "event": event, "data": json.loads(data)} for seq, event, data in rows]
+
+    async def subscribe(self, job_id: str, after: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Stored events after `after`, then live ones, until the job reaches a final state."""
+        while True:
+            seen = self._version
+            for event in self.events(job_id, after):
+                after = event["id"]
+                yield event
+            if self.status(job_id)["status"] in TERMINAL:
+                for event in self.events(job_id, after):   # written between the two reads
+                    yield event
+                return
+            async with self._wakeup:
+                if self._version != seen:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=15)
+                except asyncio.TimeoutError:
+                    pass
+            if self._version == seen:
+                yield {"id": after, "event": "ping", "data": {}}   # keeps idle connections open
+
+    # ───── Workers ──────────────────────────────────────────────────────
+
+    def _claim(self) -> Optional[tuple]:
+        """Atomically move the next queued job to running."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ("
+                "  SELECT id FROM jobs WHERE status = 'queued' ORDER BY priority DESC, seq LIMIT 1"
+                ") RETURNING id, kind, payload", (_now(),)).fetchone()
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                             (status, result, error, _now(), job_id))
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            seen = self._version
+            claimed = self._claim()
+            if claimed is None:
+                async with self._wakeup:
+                    if self._version == seen:
+                        await self._wakeup.wait()
+                continue
+            await self._run(*claimed)
+
+    async def _run(self, job_id: str, kind: str, payload: str) -> None:
+        self._append_event(job_id, "started", {"kind": kind})
+        await self._notify()
+
+        def emit(event: str, data: Dict[str, Any]) -> None:
+            self._append_event(job_id, event, data)
+            asyncio.get_running_loop().create_task(self._notify())
+
+        state = StateModel.model_validate_json(payload)
+        # The job id is the trace id, so `python -m tools.tracing show <job_id>` renders the run
+        with start_trace(f"job.{kind}", request_id=job_id, thread_id=state.session_id, kind="job"):
+            task = asyncio.create_task(self.runners[kind](state, emit))
+            self._running[job_id] = task
+            try:
+                final = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    task.cancel()   # the worker itself is stopping; stop() requeues the job
+                    raise
+                self._finish(job_id, "cancelled")
+                self._append_event(job_id, "cancelled", {})
+            except Exception as e:
+                logger.exception(f"Job {job_id} failed")
+                self._finish(job_id, "failed", error=str(e))
+                self._append_event(job_id, "failed", {"error": str(e)})
+            else:
+                self._finish(job_id, "succeeded", result=final.model_dump_json())
+                self._append_event(job_id, "succeeded", {"session_id": final.session_id})
+            finally:
+                self._running.pop(job_id, None)
+        await self._notify()
+
+
+_default_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue at JOB_DB_PATH."""
+    global _default_queue
+    if _default_queue is None:
+        _default_queue = JobQueue()
+    return _default_queue
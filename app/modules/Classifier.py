@@ -2,10 +2,49 @@
 
 from typing import Literal, TypedDict, List, Optional, Dict, Any
 import asyncio
+import logging
 import dspy
 from app.state import StateModel
+from app.tools.ResourceCatalog import ResourceCatalog, load_catalog
+from tools.metrics import cache_result
+from tools.resilience import UpstreamUnavailable
+from dspy.utils.exceptions import DSPyError
 from pydantic import BaseModel, Field
 
+logger = logging.getLogger(__name__)
+
+CATALOG_TOP_K = 5
+CATALOG_MIN_RESULTS = 3  # fewer catalog matches than this falls back to the LLM recommender
+
+def form_inputs(state: StateModel) -> Dict[str, str]:
+    """Signature inputs gathered from the StateModel fields the intake form fills."""
+    extracted = state.extracted_project or {}
+    commitment = state.time_commitment
+    time_constraints = ""
+    if commitment:
+        parts = [f"{commitment.hours_per_week} hours/week" if commitment.hours_per_week else "",
+                 commitment.preferred_schedule or "", ", ".join(commitment.major_constraints + commitment.busy_periods)]
+        time_constraints = "; ".join(p for p in parts if p)
+    return {
+        "project_purpose": state.project_goal or state.learning_goal or state.project_context or "",
+        "topic_of_interest": ", ".join(state.interests) or state.current_topic or "",
+        "potential_idea": str(extracted.get("idea") or extracted.get("name") or (state.potential_ideas or ["none"])[0]),
+        "time_constraints": time_constraints or "not specified",
+        "end_goal": state.end_goal or "",
+        "additional_info": str(extracted.get("additional") or extracted.get("notes") or state.project_context or ""),
+    }
+
+
+def normalize_complexity(value: str) -> str:
+    """Map free-text LLM complexity onto StateModel's simple/medium/complex."""
+    text = (value or "").lower()
+    if any(word in text for word in ("simple", "beginner", "easy", "low", "basic")):
+        return "simple"
+    if any(word in text for word in ("complex", "advanced", "hard", "high", "difficult")):
+        return "complex"
+    return "medium"
+
+
 class ClassifierOutput(BaseModel):
     """Output data for Classifier."""
 
@@ -55,55 +94,122 @@ class ResourceRecommend(dspy.Signature):
     skill_gaps: str = dspy.OutputField(desc="Skills the user should develop for this project.")
 
 
+class ResourceRerank(dspy.Signature):
+    """Orders catalog resources by how well they fit this user and project."""
+
+    project_type: str = dspy.InputField(desc="The classified project type.")
+    project_complexity: str = dspy.InputField(desc="The assessed complexity level.")
+    skill_gaps: str = dspy.InputField(desc="Skills the user should develop for this project.")
+    topic_of_interest: str = dspy.InputField(desc="The subject domain.")
+    candidates: List[str] = dspy.InputField(desc="Catalog resources to choose from.")
+
+    ranked_resources: List[str] = dspy.OutputField(desc="The most useful candidates, best first, copied exactly from the candidates list.")
+
+
 
 class Classifier(dspy.Module):
     """
     Classifies the user's project based on their inputs.
     """
 
-    def __init__(self):
+    def __init__(self, rerank: bool = False, catalog: Optional[ResourceCatalog] = None):
         super().__init__()
         self.type_classifier = dspy.Predict(ProjectTypeClassify)
         self.complexity_classifier = dspy.Predict(ComplexityClassify)
         self.resource_recommender = dspy.ChainOfThought(ResourceRecommend)
+        self.resource_reranker = dspy.Predict(ResourceRerank)
+        self.catalog = catalog or load_catalog()
+        self.rerank = rerank
 
-    def run(self, state: StateModel) -> StateModel:
+    def run(self, state: StateModel) -> ClassifierOutput:
         """
         Classify the project based on user inputs.
         """
-        
+        classification = self.classify(state)
+
+        # Reccomend resources based on the classification results
+        recommended_resources, skill_gaps = self._recommend_resources(
+            state, classification["project_type"], classification["complexity_level"]
+        )
+
+        return ClassifierOutput(
+            project_type=classification["project_type"],
+            complexity_level=classification["complexity_level"],
+            recommended_resources=recommended_resources,
+            skill_gaps=skill_gaps,
+            reasoning=classification["reasoning"]
+        )
+
+    def classify(self, state: StateModel) -> Dict[str, str]:
+        """Project type and complexity only (two short LLM calls), so callers can report them early."""
+        inputs = form_inputs(state)
+
         # Classify project type
         type_result = self.type_classifier(
-            project_purpose=state.project_purpose,
-            topic_of_interest=state.topic_of_interest,
-            potential_idea=state.potential_idea,
-            time_constraints=state.time_constraints,
-            end_goal=state.end_goal
+            project_purpose=inputs["project_purpose"],
+            topic_of_interest=inputs["topic_of_interest"],
+            potential_idea=inputs["potential_idea"],
+            time_constraints=inputs["time_constraints"],
+            end_goal=inputs["end_goal"]
         )
 
         # Classify project complexity based on the type and technical skills
         complexity_result = self.complexity_classifier(
             technical_skills=state.technical_skills,
             project_type=type_result.project_type,
-            additional_info=state.additional_info
-        )
-
-        # Reccomend resources based on the classification results
-        resource_result = self.resource_recommender(
-            project_type=type_result.project_type,
-            project_complexity=complexity_result.project_complexity,
-            technical_skills=state.technical_skills,
-            topic_of_interest=state.topic_of_interest,
-            additional_info=state.additional_info
+            additional_info=inputs["additional_info"]
         )
-        
 
-        return ClassifierOutput(
-            project_type=type_result.project_type,
-            complexity_level=complexity_result.project_complexity,
-            recommended_resources=resource_result.recommended_resources,
-            skill_gaps=resource_result.skill_gaps,
-            reasoning=complexity_result.reasoning
-        )
+        return {
+            "project_type": type_result.project_type,
+            "complexity_level": normalize_complexity(complexity_result.project_complexity),
+            "reasoning": complexity_result.reasoning
+        }
+
+    def recommend(self, state: StateModel) -> tuple:
+        """Resources and skill gaps for an already classified state."""
+        return self._recommend_resources(state, state.project_type or "", state.complexity_level or "medium")
+
+    def _recommend_resources(self, state: StateModel, project_type: str, complexity: str) -> tuple:
+        """Catalog lookup first; the LLM only re-ranks (optional) or fills in when the catalog has too little."""
+        stats = self.catalog.stats
+        gaps = self.catalog.skill_gaps(project_type, complexity, state.technical_skills)
+        skill_gaps = ", ".join(gaps) or state.skill_gaps or ""
+        matches = self.catalog.recommend(project_type, complexity, skill_gaps, k=CATALOG_TOP_K * (2 if self.rerank else 1))
+
+        if len(matches) < CATALOG_MIN_RESULTS or self.catalog.normalize_project_type(project_type) is None:
+            stats["llm_fallbacks"] += 1
+            cache_result("resource_catalog", False)
+            logger.info(f"Resource catalog miss for {project_type!r}; asking the LLM ({dict(stats)})")
+            inputs = form_inputs(state)
+            resource_result = self.resource_recommender(
+                project_type=project_type,
+                project_complexity=complexity,
+                technical_skills=state.technical_skills,
+                topic_of_interest=inputs["topic_of_interest"],
+                additional_info=inputs["additional_info"]
+            )
+            return resource_result.recommended_resources, resource_result.skill_gaps
+
+        stats["catalog_hits"] += 1
+        cache_result("resource_catalog", True)
+        candidates = [ResourceCatalog.format(m) for m in matches]
+        if self.rerank:
+            try:
+                ranked = self.resource_reranker(
+                    project_type=project_type,
+                    project_complexity=complexity,
+                    skill_gaps=skill_gaps,
+                    topic_of_interest=form_inputs(state)["topic_of_interest"],
+                    candidates=candidates
+                ).ranked_resources
+                # Keep only real catalog entries, in the model's order, topped up from BM25 order
+                chosen = [c for c in ranked if c in candidates]
+                candidates = list(dict.fromkeys(chosen + candidates))
+                stats["llm_reranks"] += 1
+            except (UpstreamUnavailable, DSPyError, ValueError) as e:
+                # Model or parse failures only; bugs in the inputs (e.g. a missing state field) still raise
+                logger.error(f"Resource re-rank failed, keeping catalog order: {e}")
+        return candidates[:CATALOG_TOP_K], skill_gaps
 
     
\ No newline at end of file
@@ -1,10 +1,33 @@
-from typing import Literal, TypedDict, List, Optional, Dict, Any
+from typing import Literal, TypedDict, List, Optional, Dict, Any, Callable, Iterator
+from datetime import datetime, timezone
 import asyncio
+import logging
 import dspy
+from dspy.utils.exceptions import DSPyError
+from openai import OpenAIError
 from pydantic import BaseModel, Field
+from app.state import StateModel
+from app.tools.JsonListParser import JsonListParser
+from app.tools.MilestoneGraph import MilestoneGraph, StreamingOrder, parse_weekly_hours
+from app.tools.ResourceCatalog import ResourceCatalog, load_catalog
+from app.tools.TimeEstimateModel import TimeEstimateModel
+from app.tools.TimelineSolver import TimelineSolver, milestone_hours, milestone_title
+from tools.metrics import cache_result
+from tools.resilience import UpstreamUnavailable
 
 # TODO be able to regenerate the milestones with user input
 
+logger = logging.getLogger(__name__)
+
+LOCAL_ESTIMATE_CONFIDENCE = 0.5  # below this the TimeEstimator LLM call is made (and logged for training)
+LEARNING_PATH_RESOURCES = 8      # catalog resources the learning path is built from
+# Failures of a streamed breakdown that a single non-streamed call may not hit. Streamed calls bypass
+# LLMProvider, so upstream errors arrive as litellm's (OpenAIError) exceptions rather than UpstreamUnavailable.
+STREAM_FALLBACK_ERRORS = (UpstreamUnavailable, OpenAIError, ConnectionError, TimeoutError, DSPyError, ValueError)
+
+# Loaded once at startup; retrain with `python -m app.tools.TimeEstimateModel train`
+local_time_estimator = TimeEstimateModel.load()
+
 
 class MilestoneOutput(BaseModel):
     """Output data from milestone generation."""
@@ -17,6 +40,9 @@ class MilestoneOutput(BaseModel):
     project_deliverables: List[str] = Field(..., description="Key outputs and deliverables for project completion")
     completion_prep: List[str] = Field(..., description="Final steps to wrap up and deliver the project")
     portfolio_items: List[str] = Field(default_factory=list, description="Deliverables suitable for academic portfolios and career showcasing")
+    critical_path: List[str] = Field(default_factory=list, description="Milestone ids on the longest dependency chain")
+    plan_issues: List[str] = Field(default_factory=list, description="Reasons the plan does not fit the timeline or weekly hours")
+    schedule: Optional[Dict[str, Any]] = Field(default=None, description="Timeline solved while milestones streamed in ({key, result}); reused by the timeline step")
 
 class TimeEstimator(dspy.Signature):
     """Estimates realistic time requirements for college students."""
@@ -35,7 +61,7 @@ class LearningPathGenerator(dspy.Signature):
     
     project_type: str = dspy.InputField(desc="The classified project type.")
     skill_gaps: str = dspy.InputField(desc="Skills the student needs to develop.")
-    recommended_resources: List[str] = dspy.InputField(desc="Available learning resources.")
+    recommended_resources: List[str] = dspy.InputField(desc="Catalog learning resources; build the path from these rather than inventing new ones.")
     
     learning_milestones: List[str] = dspy.OutputField(desc="Ordered list of learning tasks (tutorials, readings, practice exercises).")
     prerequisite_concepts: List[str] = dspy.OutputField(desc="Key concepts to master before starting implementation.")
@@ -49,7 +75,7 @@ class MilestoneBreakdown(dspy.Signature):
     timeline_weeks: int = dspy.InputField(desc="Project duration in weeks.")
     has_team: bool = dspy.InputField(desc="Whether this is a team project.")
     
-    milestone_list: List[Dict[str, Any]] = dspy.OutputField(desc="List of milestones with titles, descriptions, estimated hours, and week assignments.")
+    milestone_list: List[Dict[str, Any]] = dspy.OutputField(desc="List of milestones with id, title, description, estimated_hours, week, and depends_on (ids of milestones that must finish first).")
     quick_wins: List[str] = dspy.OutputField(desc="Early, achievable tasks to build momentum. If possible, also list tasks that can be completed quickly before tackling each milestone.")
 
 class CheckpointPlanner(dspy.Signature):
@@ -85,49 +111,62 @@ class MilestoneGenerator(dspy.Module):
         self.checkpoint_planner = dspy.ChainOfThought(CheckpointPlanner)
         self.academic_integration = dspy.ChainOfThought(AcademicIntegration)
 
-class MilestoneGenerator(dspy.Module):
-    """Complete milestone generation system for college students."""
-    
-    def __init__(self):
-        super().__init__()
-        # Initialize components
-        self.time_estimator = dspy.ChainOfThought(TimeEstimator)
-        self.learning_path = dspy.ChainOfThought(LearningPathGenerator)
-        self.milestone_breakdown = dspy.ChainOfThought(MilestoneBreakdown)
-        self.checkpoint_planner = dspy.ChainOfThought(CheckpointPlanner)
-        self.academic_integration = dspy.ChainOfThought(AcademicIntegration)
 
+    @staticmethod
+    def _learning_resources(state: StateModel) -> List[str]:
+        """The classifier's picks first, topped up from the catalog so the LLM orders real resources."""
+        matches = load_catalog().recommend(state.project_type, state.complexity_level, state.skill_gaps or "",
+                                           k=LEARNING_PATH_RESOURCES)
+        cache_result("resource_catalog", bool(matches))
+        catalog = [ResourceCatalog.format(m) for m in matches]
+        return list(dict.fromkeys(state.recommended_resources + catalog))[:LEARNING_PATH_RESOURCES]
+
+    def run(self, state:StateModel, schedule: bool = False,
+            on_placed: Optional[Callable[[Dict[str, Any]], None]] = None,
+            on_reset: Optional[Callable[[str], None]] = None) -> MilestoneOutput:
+        """Generate comprehensive milestone plan for students.
 
-    def run(self, state:StateModel) -> MilestoneOutput:
-        """Generate comprehensive milestone plan for students."""
+        With schedule=True the milestone list is streamed and each milestone is placed on the
+        timeline as soon as it (and its dependencies) arrive; on_placed gets each placement. If the
+        stream fails and the list is requested again, on_reset gets the reason first: placements
+        reported so far are void.
+        """
         
         # Step 1: Estimate time requirements
-        time_estimate = self.time_estimator(
-            project_type=state.project_type,
-            complexity_level=state.complexity_level,
-            technical_skills=state.technical_skills,
-            has_team=state.has_team
-        )
+        time_estimate = self._estimate_time(state)
         
-        # Step 2: Create learning path
+        # Step 2: Create learning path, from catalog resources for the skill gaps
         learning_plan = self.learning_path(
             project_type=state.project_type,
             skill_gaps=state.skill_gaps or "",
-            recommended_resources=state.recommended_resources
+            recommended_resources=self._learning_resources(state)
         )
         
-        # Step 3: Break down into milestones
-        milestones = self.milestone_breakdown(
+        # Step 3: Break down into milestones (streamed into the timeline solver when scheduling)
+        breakdown_inputs = dict(
             project_type=state.project_type,
             complexity_level=state.complexity_level,
             estimated_hours=time_estimate.estimated_hours,
             timeline_weeks=time_estimate.timeline_weeks,
             has_team=state.has_team
         )
+        if schedule:
+            milestones, pipelined = self._breakdown_and_schedule(state, time_estimate, breakdown_inputs, on_placed,
+                                                                 on_reset)
+        else:
+            milestones, pipelined = self.milestone_breakdown(**breakdown_inputs), None
         
+        # Step 3b: Order by dependencies and check the plan fits before spending more calls on it
+        graph = MilestoneGraph(milestones.milestone_list)
+        hours_per_week = (state.time_commitment.hours_per_week if state.time_commitment else None) \
+            or parse_weekly_hours(time_estimate.weekly_commitment)
+        analysis = graph.analyze(hours_per_week, time_estimate.timeline_weeks, state.team_size if state.has_team else 1)
+        milestone_list = graph.ordered_milestones(analysis)
+        schedule_result = self._finish_schedule(pipelined, milestone_list) if pipelined else None
+
         # Step 4: Add checkpoints
         checkpoints = self.checkpoint_planner(
-            milestone_list=milestones.milestone_list,
+            milestone_list=milestone_list,
             timeline_weeks=time_estimate.timeline_weeks,
             has_team=state.has_team
         )
@@ -140,17 +179,119 @@ class MilestoneGenerator(dspy.Module):
         )
         
         return MilestoneOutput(
-            milestones=milestones.milestone_list,
+            milestones=milestone_list,
             timeline={
                 "estimated_hours": time_estimate.estimated_hours,
                 "weekly_commitment": time_estimate.weekly_commitment,
-                "timeline_weeks": time_estimate.timeline_weeks
+                "timeline_weeks": time_estimate.timeline_weeks,
+                "critical_path_weeks": analysis.critical_path_weeks,
+                "feasible": analysis.feasible,
+                # Pin the start the schedule was solved from, unless the user gave one
+                **({"start_date": pipelined["inputs"]["start"].isoformat()}
+                   if pipelined and not state.timeline.get("start_date") else {})
             },
             learning_path=learning_plan.learning_milestones,
             quick_wins=milestones.quick_wins,
             checkpoints=checkpoints.review_checkpoints,
             pivot_opportunities=checkpoints.pivot_opportunities,
-            academic_deliverables=academic_items.academic_milestones,
-            submission_prep=academic_items.submission_prep,
-            portfolio_items=academic_items.portfolio_items
+            project_deliverables=academic_items.academic_milestones,
+            completion_prep=academic_items.submission_prep,
+            portfolio_items=academic_items.portfolio_items,
+            critical_path=analysis.critical_path,
+            plan_issues=analysis.issues,
+            schedule=schedule_result
+        )
+
+    def _estimate_time(self, state: StateModel):
+        """Use the local estimator when it is confident, otherwise ask the LLM and log its answer."""
+        features = dict(
+            project_type=state.project_type,
+            complexity_level=state.complexity_level,
+            technical_skills=state.technical_skills,
+            has_team=state.has_team
+        )
+        local = local_time_estimator.predict(**features)
+        confident = bool(local and local.confidence >= LOCAL_ESTIMATE_CONFIDENCE)
+        cache_result("local_time_estimate", confident)   # a miss costs a TimeEstimator LLM call
+        if confident:
+            logger.info(f"Local time estimate used (confidence {local.confidence})")
+            return local
+
+        time_estimate = self.time_estimator(**features)
+        local_time_estimator.log_sample(
+            **features,
+            estimated_hours=time_estimate.estimated_hours,
+            weekly_commitment=time_estimate.weekly_commitment,
+            timeline_weeks=time_estimate.timeline_weeks
         )
+        return time_estimate
+
+    # ───── Streaming milestones into the timeline ───────────────────────
+
+    def _stream_breakdown(self, inputs: Dict[str, Any], holder: Dict[str, Any],
+                          on_reset: Callable[[str], None]) -> Iterator[Dict[str, Any]]:
+        """Yield milestone dicts as the LLM writes milestone_list; the final prediction lands in holder."""
+        parser = JsonListParser()
+        try:
+            stream = dspy.streamify(
+                self.milestone_breakdown,
+                stream_listeners=[dspy.streaming.StreamListener(signature_field_name="milestone_list")],
+                async_streaming=False
+            )
+            for chunk in stream(**inputs):
+                if isinstance(chunk, dspy.streaming.StreamResponse):
+                    for item in parser.feed(chunk.chunk):
+                        if isinstance(item, dict):
+                            yield item
+                elif isinstance(chunk, dspy.Prediction):
+                    holder["prediction"] = chunk
+        except STREAM_FALLBACK_ERRORS as e:
+            logger.warning(f"Milestone streaming failed, falling back to a single call: {e}")
+            holder["stream_error"] = str(e)
+        if "prediction" not in holder:
+            on_reset(holder.get("stream_error", "stream ended without a prediction"))
+            holder["prediction"] = self.milestone_breakdown(**inputs)
+
+    def _breakdown_and_schedule(self, state: StateModel, time_estimate: Any, inputs: Dict[str, Any],
+                                on_placed: Optional[Callable[[Dict[str, Any]], None]],
+                                on_reset: Optional[Callable[[str], None]] = None):
+        """Place streamed milestones on the timeline while the rest of the list is still being written."""
+        solver = TimelineSolver(state.time_commitment)
+        timeline = {**state.timeline, "timeline_weeks": time_estimate.timeline_weeks}
+        solve_inputs = solver.state_inputs(state, timeline)
+        # Pin "now" so the timeline step, if it has to re-solve, gets the same week grid
+        solve_inputs["start"] = solve_inputs["start"] or datetime.now(timezone.utc)
+        packer = solver.packer(**solve_inputs)
+        order = StreamingOrder()
+        placed: List[Dict[str, Any]] = []
+        holder: Dict[str, Any] = {}
+
+        def reset(reason: str) -> None:
+            # The list is asked for again: what was placed so far no longer counts (the finish re-solves)
+            placed.clear()
+            holder["reset"] = reason
+            if on_reset:
+                on_reset(reason)
+
+        for milestone in self._stream_breakdown(inputs, holder, reset):
+            for ready in order.add(milestone):
+                entry = packer.place(ready)
+                placed.append(ready)
+                if on_placed:
+                    on_placed(entry)
+        pipelined = {"solver": solver, "packer": packer, "placed": placed, "pending": order.pending,
+                      "inputs": solve_inputs, "reset": "reset" in holder}
+        return holder["prediction"], pipelined
+
+    def _finish_schedule(self, pipelined: Dict[str, Any], milestone_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Keep the streamed schedule if it placed exactly the batch order, otherwise solve again."""
+        def signature(items):
+            return [(milestone_title(m, i), milestone_hours(m), m.get("week")) for i, m in enumerate(items)]
+
+        inputs = pipelined["inputs"]
+        if not pipelined["pending"] and not pipelined["reset"] and signature(pipelined["placed"]) == signature(milestone_list):
+            result = pipelined["packer"].result()
+        else:
+            logger.info("Streamed milestones differ from the final list; re-solving the timeline")
+            result = pipelined["solver"].solve(milestone_list, **inputs)
+        return {"key": pipelined["solver"].schedule_key(milestone_list, **inputs), "result": result.model_dump(mode="json")}
@@ -5,6 +5,9 @@ import json
 import logging
 from pydantic import BaseModel, Field
 from app.state import StateModel
+from app.tools.IntervalIndex import to_epoch
+from app.tools.TimelineSolver import conflict_index, get_zone
+from app.analysis import CompletionRiskSimulator
 
 class ReportOutput(BaseModel):
     """Comprehensive project report output."""
@@ -17,6 +20,7 @@ class ReportOutput(BaseModel):
     resource_compilation: List[str] = Field(default_factory=list, description="All recommended resources and tools")
     success_metrics: List[str] = Field(default_factory=list, description="How to measure project completion")
     risk_assessment: List[str] = Field(default_factory=list, description="Potential challenges and solutions")
+    completion_forecast: Dict[str, Any] = Field(default_factory=dict, description="Monte Carlo on-time probability, P50/P90 weeks and critical milestones")
     project_alignment: List[str] = Field(default_factory=list, description="How project meets user's goals and requirements")
 
 class ProjectSummaryGenerator(dspy.Signature):
@@ -63,6 +67,7 @@ class RiskAndSuccessAnalyzer(dspy.Signature):
     time_constraints: str = dspy.InputField(desc="User's time/availability constraints")
     calendar_conflicts: str = dspy.InputField(desc="JSON of scheduling conflicts")
     has_team: bool = dspy.InputField(desc="Whether team coordination is needed")
+    completion_forecast: str = dspy.InputField(desc="JSON of simulated on-time probability, P50/P90 finish weeks and milestones most often on the critical path")
     
     risk_factors: str = dspy.OutputField(desc="Potential challenges and mitigation strategies")
     success_criteria: str = dspy.OutputField(desc="Clear metrics for project completion")
@@ -90,6 +95,7 @@ class ReportAssembler(dspy.Module):
         self.learning_synthesizer = dspy.ChainOfThought(LearningPathSynthesizer)
         self.risk_analyzer = dspy.ChainOfThought(RiskAndSuccessAnalyzer)
         self.goal_analyzer = dspy.ChainOfThought(GoalAlignmentAnalyzer)
+        self.risk_simulator = CompletionRiskSimulator()
         self.logger = logging.getLogger(__name__)
     
     def generate_report(self, state: StateModel) -> ReportOutput:
@@ -130,13 +136,15 @@ class ReportAssembler(dspy.Module):
                 project_deliverables=json.dumps(state.project_deliverables)
             )
             
-            # Step 4: Analyze risks and success criteria
+            # Step 4: Analyze risks and success criteria, grounded in a local simulation
+            forecast = self.risk_simulator.simulate_state(state)
             risk_result = self.risk_analyzer(
                 complexity_level=state.complexity_level or "medium",
                 timeline_weeks=timeline_weeks,
-                time_constraints=state.time_constraints or "moderate",
-                calendar_conflicts=json.dumps(state.calendar_conflicts),
-                has_team=state.has_team
+                time_constraints=state.time_commitment.model_dump_json(exclude_none=True) if state.time_commitment else "moderate",
+                calendar_conflicts=json.dumps(self._conflicts_in_window(state)),
+                has_team=state.has_team,
+                completion_forecast=forecast.model_dump_json()
             )
             
             # Step 5: Analyze goal alignment
@@ -172,6 +180,7 @@ class ReportAssembler(dspy.Module):
                 resource_compilation=state.recommended_resources,
                 success_metrics=[risk_result.success_criteria],
                 risk_assessment=[risk_result.risk_factors, risk_result.contingency_plans],
+                completion_forecast=forecast.model_dump(),
                 project_alignment=[goal_result.goal_value, goal_result.success_alignment]
             )
             
@@ -190,6 +199,21 @@ class ReportAssembler(dspy.Module):
                 project_alignment=["Goal alignment unavailable"]
             )
     
+    def _conflicts_in_window(self, state: StateModel, limit: int = 50) -> List[Dict[str, Any]]:
+        """Calendar conflicts that fall inside the scheduled project window, capped for the prompt."""
+        start = (state.timeline.get("week1_start") or state.timeline.get("start_date")) if state.timeline else None
+        weeks = state.timeline.get("timeline_weeks") if state.timeline else None
+        if not start or not weeks:
+            return state.calendar_conflicts[:limit]
+        # Naive times are the user's local time, as the timeline solver reads them
+        zone = get_zone(state.time_commitment.timezone if state.time_commitment else None)
+        try:
+            window_start = to_epoch(start, zone)
+        except ValueError:
+            return state.calendar_conflicts[:limit]
+        index = conflict_index(state.calendar_conflicts, zone)
+        return [record for _, _, record in index.overlaps(window_start, window_start + int(weeks) * 7 * 86400)][:limit]
+
     def _format_timeline_summary(self, state: StateModel) -> List[str]:
         """Format timeline into readable summary."""
         try:
@@ -3,8 +3,10 @@ import asyncio
 import dspy
 import json
 import logging
+from datetime import datetime, timezone
 from pydantic import BaseModel, Field
-from app.state import StateModel 
+from app.state import StateModel
+from app.tools.TimelineSolver import TimelineSolver, SolverResult
 
 class ScheduleOutput(BaseModel):
     """Output data from timeline scheduling."""
@@ -14,20 +16,14 @@ class ScheduleOutput(BaseModel):
     suggested_work_blocks: List[Dict[str, Any]] = Field(default_factory=list, description="Recommended work sessions")
     timeline_notes: List[str] = Field(default_factory=list, description="Pacing tips and assumptions")
 
-class TimelineScheduler(dspy.Signature):
-    """Creates realistic project timelines considering constraints."""
-    milestones: str = dspy.InputField(desc="JSON string of project milestones with durations")
-    energy_constraints: str = dspy.InputField(desc="User's availability: low, moderate, or high")
-    optimal_work_blocks: str = dspy.InputField(desc="JSON string of available time slots")
-    calendar_conflicts: str = dspy.InputField(desc="JSON string of unavailable times")
-    team_size: int = dspy.InputField(desc="Number of team members")
+class PacingAdvisor(dspy.Signature):
+    """Writes pacing advice for a timeline that has already been scheduled."""
+    milestone_timeline: str = dspy.InputField(desc="• Week 1-2: Setup\n• Week 3-4: Development\n...")
+    weekly_hours: str = dspy.InputField(desc="JSON: {week1: 8.0, week2: 6.5, ...} scheduled hours per week")
+    scheduling_warnings: str = dspy.InputField(desc="Plain text warnings about conflicts or tight deadlines")
     complexity_level: str = dspy.InputField(desc="Project complexity: simple, medium, or complex")
     has_team: bool = dspy.InputField(desc="Whether this is a team project")
-    current_milestone: int = dspy.InputField(desc="Index of currently active milestone")
-    
-    weekly_schedule: str = dspy.OutputField(desc="JSON: {week1: {tasks: [], hours: 8}, week2: {...}}")
-    milestone_timeline: str = dspy.OutputField(desc="• Week 1-2: Setup\n• Week 3-4: Development\n...")
-    scheduling_warnings: str = dspy.OutputField(desc="Plain text warnings about conflicts or tight deadlines")
+
     pacing_recommendations: str = dspy.OutputField(desc="Advice on project pacing and time management")
     
 class Timeline(dspy.Module):
@@ -35,41 +31,18 @@ class Timeline(dspy.Module):
     
     def __init__(self):
         super().__init__()
-        self.scheduler = dspy.ChainOfThought(TimelineScheduler)
+        self.advisor = dspy.ChainOfThought(PacingAdvisor)
         self.logger = logging.getLogger(__name__)
     
     def schedule_timeline(self, state: StateModel) -> ScheduleOutput:
         """Create timeline schedule from state data with error handling."""
         
         try:
-            # Get timeline length from existing timeline data or default
-            timeline_weeks = state.timeline.get("timeline_weeks", 8) if state.timeline else 8
-            
-            result = self.scheduler(
-                milestones=json.dumps(state.milestones),
-                energy_constraints=state.energy_constraints or "moderate",
-                optimal_work_blocks=json.dumps(state.optimal_work_blocks),
-                calendar_conflicts=json.dumps(state.calendar_conflicts),
-                team_size=state.team_size,
-                complexity_level=state.complexity_level or "medium",
-                has_team=state.has_team
-            )
-            
-            # Safe JSON parsing
-            try:
-                timeline_data = json.loads(result.project_timeline)
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Failed to parse timeline JSON: {e}")
-                timeline_data = {"error": "Invalid timeline format", "raw": result.project_timeline}
-            
-            return ScheduleOutput(
-                timeline=timeline_data,
-                milestone_schedule=[result.milestone_schedule],
-                deadline_conflicts=[result.deadline_conflicts] if result.deadline_conflicts else [],
-                suggested_work_blocks=state.optimal_work_blocks,  # Use existing data
-                timeline_notes=[result.timeline_notes] if result.timeline_notes else []
-            )
-            
+            # The schedule itself is solved locally; the LLM only phrases pacing notes
+            solver = TimelineSolver(state.time_commitment)
+            inputs = solver.state_inputs(state)
+            inputs["start"] = inputs["start"] or datetime.now(timezone.utc)
+            result = self._precomputed(state, solver, inputs) or solver.solve_state(state, inputs)
         except Exception as e:
             self.logger.error(f"Timeline scheduling failed: {e}")
             return ScheduleOutput(
@@ -78,4 +51,59 @@ class Timeline(dspy.Module):
                 deadline_conflicts=[f"Error: {str(e)}"],
                 suggested_work_blocks=[],
                 timeline_notes=["Please try again"]
-            )
\ No newline at end of file
+            )
+
+        milestone_schedule = self._format_milestone_schedule(result)
+        return ScheduleOutput(
+            timeline={
+                "timeline_weeks": result.timeline_weeks,
+                # The user's start stays as given; week 1 starts on the Monday on or before it
+                "start_date": (state.timeline or {}).get("start_date") or inputs["start"].isoformat(),
+                "week1_start": result.start_date.isoformat(),
+                "weekly_schedule": result.weekly_schedule,
+                "milestone_weeks": result.milestone_weeks,
+                "capacity_by_week": result.capacity_by_week,
+                "unscheduled_hours": result.unscheduled_hours,
+            },
+            milestone_schedule=milestone_schedule,
+            deadline_conflicts=result.warnings,
+            suggested_work_blocks=[session.model_dump(mode="json") for session in result.sessions],
+            timeline_notes=self._pacing_notes(state, result, milestone_schedule)
+        )
+
+    def _precomputed(self, state: StateModel, solver: TimelineSolver,
+                     inputs: Dict[str, Any]) -> Optional[SolverResult]:
+        """Schedule solved while milestones streamed in, if it was solved for exactly these inputs."""
+        stored = (state.timeline or {}).get("schedule")
+        if not isinstance(stored, dict):
+            return None
+        if stored.get("key") != solver.schedule_key(state.milestones, **inputs):
+            return None
+        return SolverResult.model_validate(stored["result"])
+
+    def _pacing_notes(self, state: StateModel, result: SolverResult, milestone_schedule: List[str]) -> List[str]:
+        """Ask the LLM to phrase pacing advice; the schedule stands even if this fails."""
+        try:
+            advice = self.advisor(
+                milestone_timeline="\n".join(milestone_schedule),
+                weekly_hours=json.dumps({week: data["hours"] for week, data in result.weekly_schedule.items()}),
+                scheduling_warnings="\n".join(result.warnings) or "None",
+                complexity_level=state.complexity_level or "medium",
+                has_team=state.has_team
+            )
+            return [advice.pacing_recommendations] if advice.pacing_recommendations else []
+        except Exception as e:
+            self.logger.error(f"Pacing advice failed: {e}")
+            return []
+
+    def _format_milestone_schedule(self, result: SolverResult) -> List[str]:
+        """Format scheduled milestone weeks as readable bullet lines."""
+        lines = []
+        for milestone in result.milestone_weeks:
+            if milestone["start_week"] is None:
+                lines.append(f"• Unscheduled: {milestone['title']}")
+            elif milestone["start_week"] == milestone["end_week"]:
+                lines.append(f"• Week {milestone['start_week']}: {milestone['title']}")
+            else:
+                lines.append(f"• Week {milestone['start_week']}-{milestone['end_week']}: {milestone['title']}")
+        return lines
@@ -0,0 +1,16 @@
+from app.state import StateModel, StatePatch
+from app.modules.Classifier import Classifier
+
+def classify_node(state:StateModel) -> StatePatch:
+    """Classify project type and complexity, with the catalog's skill gaps for that pair."""
+
+    classifier = Classifier()
+    result = classifier.classify(state)
+    gaps = classifier.catalog.skill_gaps(result["project_type"], result["complexity_level"], state.technical_skills)
+    return {
+        "project_type": result["project_type"],
+        "complexity_level": result["complexity_level"],
+        "reasoning": result["reasoning"],
+        "skill_gaps": ", ".join(gaps) or state.skill_gaps,
+        "workflow_phase": "generating",
+    }
@@ -1,9 +1,29 @@
-from app.state import StateModel
-from app.modules.Classifier import Classifier
+from app.state import StateModel, StatePatch
+from app.modules.MilestoneGen import MilestoneGenerator
+from langgraph.config import get_stream_writer
 
-def milestone_node(state:StateModel) -> StateModel:
-    """Generate project milestones given project details."""
+def milestone_node(state:StateModel) -> StatePatch:
+    """Generate project milestones given project details, scheduling each one as it streams in."""
 
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:   # called outside a running graph
+        writer = None
     milestones = MilestoneGenerator()
-    updated_state = milestones.run(state)
-    return updated_state
+    plan = milestones.run(state, schedule=True,
+                          on_placed=(lambda placed: writer({"milestone_scheduled": placed})) if writer else None,
+                          on_reset=(lambda reason: writer({"milestone_schedule_reset": reason})) if writer else None)
+    timeline = {**state.timeline, **plan.timeline}
+    if plan.schedule:
+        timeline["schedule"] = plan.schedule
+    return {
+        "milestones": plan.milestones,
+        "timeline": timeline,
+        "learning_path": plan.learning_path,
+        "quick_wins": plan.quick_wins,
+        "pivot_opportunities": plan.pivot_opportunities,
+        "project_deliverables": plan.project_deliverables,
+        "completion_prep": plan.completion_prep,
+        "portfolio_items": plan.portfolio_items,
+        "warnings": state.warnings + plan.plan_issues,
+    }
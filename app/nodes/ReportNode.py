@@ -1,9 +1,9 @@
-from app.state import StateModel
-from app.modules.Classifier import Classifier
+from app.state import StateModel, StatePatch
+from app.modules.ReportAssembler import ReportAssembler
 
-def report_node(state:StateModel) -> StateModel:
+def report_node(state:StateModel) -> StatePatch:
     """Generate project report based on timeline and milestones."""
 
     report_generator = ReportAssembler()
-    updated_state = report_generator.run(state)
-    return updated_state
+    report = report_generator.generate_report(state)
+    return {"report": report.model_dump()}
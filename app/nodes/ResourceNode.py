@@ -0,0 +1,11 @@
+from app.state import StateModel, StatePatch
+from app.modules.Classifier import Classifier
+
+def resource_node(state:StateModel) -> StatePatch:
+    """Recommend learning resources for the classified project's skill gaps."""
+
+    resources, skill_gaps = Classifier().recommend(state)
+    return {
+        "recommended_resources": resources,
+        "skill_gaps": skill_gaps or state.skill_gaps,
+    }
@@ -1,9 +1,13 @@
-from app.state import StateModel
-from app.modules.Classifier import Classifier
+from app.state import StateModel, StatePatch
+from app.modules.TimelineScheduler import Timeline
 
-def timeline_node(state:StateModel) -> StateModel:
+def timeline_node(state:StateModel) -> StatePatch:
     """Generate project timeline based on milestones."""
 
-    timeline_generator = TimelineScheduler()
-    updated_state = timeline_generator.run(state)
-    return updated_state
+    timeline_generator = Timeline()
+    schedule = timeline_generator.schedule_timeline(state)
+    return {
+        # The milestone step's precomputed schedule is consumed here; don't carry it forward
+        "timeline": {**{k: v for k, v in state.timeline.items() if k != "schedule"}, **schedule.timeline},
+        "warnings": state.warnings + schedule.deadline_conflicts,
+    }
@@ -2,12 +2,16 @@
 LangGraph Nodes for **App Name**
 
 This file contains all the node functions used in the project planning workflow.
-Each node receives a StateModel and returns an updated StateModel.
+Each node receives a StateModel and returns a StatePatch with only the fields
+it changed; apply_patch (app/state.py) or LangGraph merges it into the state.
 
 Available Nodes:
 - classify_node: Classifies project type and complexity
 - milestone_node: Generates project milestones and learning paths
 - timeline_node: Creates realistic timeline with calendar integration
+- resource_node: Recommends learning resources for the skill gaps
 - report_node: Assembles comprehensive project report
 
+app/workflow.py wires them into the planning graph.
+
 """
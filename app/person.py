@@ -1,8 +1,31 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, validator, model_validator
 from typing import List, Dict, Optional, Any, Literal
 from datetime import datetime
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
+
+def migrate_completed_tasks(values: Dict[str, Any], store=None) -> Dict[str, Any]:
+    """Move a legacy completed_tasks list out of stored Person data into that person's TaskLog.
+
+    Call it on legacy payloads before validating them (the Person codec runs it for v1 records); Person itself
+    rejects non-empty completed_tasks rather than touching the log store. Idempotent: tasks are imported only
+    while the target log is still empty, so migrating the same payload again adds nothing.
+    """
+    tasks = values.pop("completed_tasks", None)
+    if not tasks:
+        return values
+    log_id = values.get("task_log_id") or values.get("person_id")
+    if not log_id:
+        raise ValueError("Legacy completed_tasks need a person_id (or task_log_id) to key the TaskLog")
+    from app.tools.TaskLog import get_task_log_store, validate_log_id
+    log = (store or get_task_log_store()).get(validate_log_id(log_id))
+    if len(log) == 0:
+        logger.info(f"Moved {log.extend(tasks)} legacy completed tasks into TaskLog {log.person_id}")
+    return values
+
 class Person(BaseModel):
     """Represents a person involved in projects."""
     
@@ -31,7 +54,7 @@ class Person(BaseModel):
     milestones_assigned: Optional[List[str]] = Field(default=None, description="DEPRECATED: Use TeamMember for milestone assignments")
     
     # Progress Tracking
-    completed_tasks: List[Dict[str, Any]] = Field(default_factory=list, max_items=1000, description="History of completed work")
+    task_log_id: Optional[str] = Field(default=None, description="Key of this person's TaskLog; defaults to person_id")
     current_milestone: Optional[str] = Field(default=None, description="Currently active milestone")
     progress_notes: List[str] = Field(default_factory=list, max_items=100, description="Personal notes and reflections")
     
@@ -40,6 +63,19 @@ class Person(BaseModel):
     last_active: Optional[datetime] = Field(default=None, description="Last activity timestamp")
     project_ids: List[str] = Field(default_factory=list, max_items=50, description="Projects this person is involved in")
     
+    @model_validator(mode="before")
+    @classmethod
+    def reject_completed_tasks(cls, data: Any) -> Any:
+        if isinstance(data, dict) and data.get("completed_tasks"):
+            raise ValueError("completed_tasks moved to the TaskLog; pass legacy data through migrate_completed_tasks()")
+        return data
+
+    @property
+    def task_log(self):
+        """This person's append-only TaskLog (completed work history and progress aggregates)."""
+        from app.tools.TaskLog import get_task_log_store, validate_log_id
+        return get_task_log_store().get(validate_log_id(self.task_log_id or self.person_id))
+
     # Validators
     @validator("email")
     def validate_email(cls, v):
@@ -47,6 +83,11 @@ class Person(BaseModel):
             raise ValueError("Invalid email format")
         return v
     
+    @validator("task_log_id")
+    def validate_task_log_id(cls, v):
+        from app.tools.TaskLog import validate_log_id
+        return validate_log_id(v) if v is not None else v
+    
     @validator("technical_skills")
     def validate_technical_skills(cls, v):
         if v and len(v) != len(set(v)):
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Dict, Optional, Any, Literal
+from typing import List, Dict, Optional, Any, Literal, Annotated
 from datetime import datetime
+import operator
+from langgraph.types import Overwrite
 
 # Update in state.py
 class TimeCommitment(BaseModel):
@@ -29,6 +31,13 @@ class TimeCommitment(BaseModel):
 
 
 
+# Fields that parallel LangGraph nodes may both write in one step are
+# accumulators: a node returns only what it adds (its own retries, its own
+# errors) and the reducer sums/concatenates, so no branch's writes are lost
+# and a repeated error is kept every time it happens. To set such a field
+# outright (e.g. clear errors before a re-run) return Overwrite(value); see
+# reset_patch().
+
 class StateModel(BaseModel):
 
 
@@ -61,6 +70,7 @@ class StateModel(BaseModel):
     project_deliverables: List[str] = Field(default_factory=list)  # Key outputs and deliverables for project completion
     completion_prep: List[str] = Field(default_factory=list)  # Final steps to wrap up and deliver the project
     portfolio_items: List[str] = Field(default_factory=list)  # Deliverables suitable for portfolios and career showcasing
+    report: Dict[str, Any] = Field(default_factory=dict)  # Assembled project report (ReportOutput fields)
     potential_ideas: List[str] = Field(default_factory=list)  # Generated or suggested project ideas
     info_gaps: List[str] = Field(default_factory=list)  # Missing information needed for project planning
     reflections: List[str] = Field(default_factory=list)  # User reflections and learning insights
@@ -85,7 +95,7 @@ class StateModel(BaseModel):
         "collecting", "classifying", "generating", "scheduling",
         "reviewing", "executing", "reflecting", "publishing", "completed"
     ] = "collecting"  # Current phase of the project development process
-    retry_count: int = 0  # Number of times current operation has been retried
+    retry_count: Annotated[int, operator.add] = 0  # Number of times current operation has been retried
     checkpoints: List[str] = Field(default_factory=list)  # Saved workflow checkpoints for review
     preferred_tone: Optional[Literal["peer", "coach", "pm", "founder", "cheerleader"]] = None  # AI assistant communication style
     current_milestone_index: Optional[int] = None  # Index of the currently active milestone
@@ -101,7 +111,7 @@ class StateModel(BaseModel):
     reasoning: Optional[str] = None  # AI's reasoning for complexity and resource recommendations
 
     # Error Handling
-    errors: List[str] = Field(default_factory=list)  # Critical errors that need attention
+    errors: Annotated[List[str], operator.add] = Field(default_factory=list)  # Critical errors that need attention
     warnings: List[str] = Field(default_factory=list)  # Non-critical issues and warnings
     log: Optional[Dict[str, List[str]]] = Field(default_factory=dict)  # Detailed operation logs for debugging
 
@@ -124,3 +134,40 @@ class StateModel(BaseModel):
         if v < 0.0 or v > 1.0:
             raise ValueError("project_completeness must be between 0.0 and 1.0")
         return v
+
+
+# ───── State patches ─────────────────────────────────────────────────────
+# Workflow nodes return a StatePatch ({field: new value}) rather than a whole
+# StateModel. apply_patch shallow-copies the state, so untouched fields
+# (milestones, calendar_data, execution_history, log, ...) are shared with the
+# previous state instead of copied, and only the patched fields are validated,
+# field validators included. Cost depends on the patch, not on the state size.
+# Fields with a reducer (errors, retry_count) are merged the way LangGraph
+# merges them: the patch value is added to the current one, unless it is
+# wrapped in Overwrite, which replaces it.
+
+StatePatch = Dict[str, Any]
+
+FIELD_REDUCERS = {name: meta for name, field in StateModel.model_fields.items()
+                  for meta in field.metadata if callable(meta)}
+
+
+def apply_patch(state: StateModel, patch: StatePatch) -> StateModel:
+    """New StateModel with the patch applied; the original state is left unchanged."""
+    unknown = set(patch) - set(StateModel.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown StateModel fields in patch: {', '.join(sorted(unknown))}")
+    updated = state.model_copy()
+    for name, value in patch.items():
+        if isinstance(value, Overwrite):
+            value = value.value
+        elif name in FIELD_REDUCERS:
+            value = FIELD_REDUCERS[name](getattr(updated, name), value)
+        StateModel.__pydantic_validator__.validate_assignment(updated, name, value)
+    return updated
+
+
+def reset_patch(*names: str) -> StatePatch:
+    """Patch that sets reducer fields (errors, retry_count by default) back to their defaults."""
+    names = names or tuple(FIELD_REDUCERS)
+    return {name: Overwrite(StateModel.model_fields[name].get_default(call_default_factory=True)) for name in names}
@@ -0,0 +1,186 @@
+from typing import List, Dict, Optional, Any, Callable, Iterator, Tuple
+from datetime import datetime, timezone
+import hashlib
+import os
+import sqlite3
+import threading
+import ormsgpack
+from pydantic import PrivateAttr
+from app.state import StateModel
+from app.codec import STATE_SCHEMA, CodecError, decode_values, encode
+
+# Hot/cold persistence for StateModel.
+# Conversation and workflow fields form the "hot" record (a few KB, codec
+# encoded) that every turn reads and writes. Heavy planning sections live in
+# their own rows and are read only when an attribute is first touched. On
+# save, a section is written back only if it was assigned or if its encoded
+# bytes no longer match what was loaded, so in-place edits like
+# state.milestones.append(...) are caught too.
+
+STORE_PATH = os.getenv("STATE_STORE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "projectforge", "state.sqlite3"))
+COLD_SECTIONS = (
+    "calendar_data", "execution_history", "log", "team_members", "milestones",
+    "calendar_conflicts", "team_availability", "report",
+)
+_PACK = ormsgpack.OPT_SERIALIZE_PYDANTIC
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class LazyStateModel(StateModel):
+    """StateModel whose cold sections load from the store on first access."""
+
+    _loader: Optional[Callable[[str], Tuple[Any, Optional[bytes]]]] = PrivateAttr(default=None)   # -> value, digest
+    _digests: Dict[str, bytes] = PrivateAttr(default_factory=dict)   # section -> digest of the bytes as loaded
+    _dirty: set = PrivateAttr(default_factory=set)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in COLD_SECTIONS and name in type(self).model_fields:
+            private = self.__pydantic_private__
+            value, digest = private["_loader"](name)
+            if digest is not None:
+                private["_digests"][name] = digest
+            self.__dict__[name] = value
+            return value
+        return super().__getattr__(name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in COLD_SECTIONS:
+            self._dirty.add(name)
+
+    @property
+    def loaded_sections(self) -> List[str]:
+        return [name for name in COLD_SECTIONS if name in self.__dict__]
+
+    def load_all(self) -> "LazyStateModel":
+        for name in COLD_SECTIONS:
+            getattr(self, name)
+        return self
+
+    # Serialization must see every field, not just the ones loaded so far
+    def model_dump(self, **kwargs) -> Dict[str, Any]:
+        return super(LazyStateModel, self.load_all()).model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        return super(LazyStateModel, self.load_all()).model_dump_json(**kwargs)
+
+    # So do comparison and iteration (dict(state), ==)
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, StateModel):
+            return NotImplemented
+        return self.model_dump() == other.model_dump()
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        for name in type(self).model_fields:
+            yield name, getattr(self, name)
+
+    # Copies (model_copy, copy.copy) track their own loads and edits
+    def __copy__(self) -> "LazyStateModel":
+        copied = super().__copy__()
+        private = copied.__pydantic_private__
+        object.__setattr__(copied, "__pydantic_private__", {
+            **private, "_digests": dict(private["_digests"]), "_dirty": set(private["_dirty"])})
+        return copied
+
+
+class StateStore:
+    """SQLite store with one hot row per session and one row per cold section."""
+
+    def __init__(self, path: str = STORE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS state_hot (
+                session_id TEXT PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                data BLOB NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS state_cold (
+                session_id TEXT NOT NULL,
+                section TEXT NOT NULL,
+                data BLOB NOT NULL,
+                PRIMARY KEY (session_id, section)
+            );
+        """)
+        self.stats = {"bytes_read": 0, "bytes_written": 0}
+
+    # ───── Saving ───────────────────────────────────────────────────────
+
+    def save(self, state: StateModel) -> Dict[str, Any]:
+        """Write the hot record plus any changed cold sections; returns what was written."""
+        hot = encode({name: value for name, value in state.__dict__.items() if name not in COLD_SECTIONS}, STATE_SCHEMA)
+        lazy = isinstance(state, LazyStateModel)
+        written: Dict[str, bytes] = {}
+        for name in COLD_SECTIONS:
+            if name not in state.__dict__:
+                continue  # never loaded, so it cannot have changed
+            data = ormsgpack.packb(state.__dict__[name], option=_PACK)
+            if lazy and name not in state._dirty and state._digests.get(name) == _digest(data):
+                continue
+            written[name] = data
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO state_hot (session_id, user_id, data, updated_at) VALUES (?, ?, ?, ?)",
+                (state.session_id, state.user_id, hot, datetime.now(timezone.utc).isoformat()),
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO state_cold (session_id, section, data) VALUES (?, ?, ?)",
+                [(state.session_id, name, data) for name, data in written.items()],
+            )
+        if lazy:
+            state._digests.update({name: _digest(data) for name, data in written.items()})
+            state._dirty.clear()
+        size = len(hot) + sum(len(d) for d in written.values())
+        self.stats["bytes_written"] += size
+        return {"hot_bytes": len(hot), "sections_written": list(written), "bytes_written": size}
+
+    # ───── Loading ──────────────────────────────────────────────────────
+
+    def load(self, session_id: str) -> Optional[LazyStateModel]:
+        """Read only the hot record; cold sections load on first attribute access."""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM state_hot WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        self.stats["bytes_read"] += len(row[0])
+        schema, values = decode_values(row[0])
+        if schema is not STATE_SCHEMA:
+            raise CodecError(f"Session {session_id} does not hold a StateModel record")
+        state = schema.construct(values, model=LazyStateModel, skip=COLD_SECTIONS)
+        object.__setattr__(state, "__pydantic_private__", {"_loader": None, "_digests": {}, "_dirty": set()})
+
+        def load_section(name: str) -> Any:
+            with self._lock:
+                found = self._db.execute("SELECT data FROM state_cold WHERE session_id = ? AND section = ?",
+                                         (session_id, name)).fetchone()
+            if found is None:
+                default = STATE_SCHEMA.factories[name]() if name in STATE_SCHEMA.factories else STATE_SCHEMA.defaults.get(name)
+                return default, None
+            self.stats["bytes_read"] += len(found[0])
+            return ormsgpack.unpackb(found[0]), _digest(found[0])
+
+        state._loader = load_section
+        return state
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM state_hot WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM state_cold WHERE session_id = ?", (session_id,))
+
+    def sessions(self, user_id: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if user_id is None:
+                rows = self._db.execute("SELECT session_id FROM state_hot ORDER BY updated_at DESC").fetchall()
+            else:
+                rows = self._db.execute("SELECT session_id FROM state_hot WHERE user_id = ? ORDER BY updated_at DESC",
+                                        (user_id,)).fetchall()
+        return [r[0] for r in rows]
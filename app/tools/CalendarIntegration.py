@@ -0,0 +1,325 @@
+from typing import List, Dict, Optional, Any, Tuple, Iterator, Set
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import hashlib
+import json
+import logging
+import os
+import re
+from dateutil.rrule import rrulestr
+from pydantic import BaseModel, Field
+from app.state import StateModel, StatePatch
+from app.tools.TimelineSolver import TimelineSolver, get_zone
+from tools.metrics import cache_result
+
+# Local .ics ingestion.
+# Files are read line by line and handed on one VEVENT at a time, so memory
+# stays flat no matter how large the export is. Recurring events are expanded
+# lazily and only inside the project window. Results are cached on disk by
+# the file's SHA-256, so re-importing an unchanged calendar skips parsing.
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("CALENDAR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "projectforge", "calendar"))
+CACHE_VERSION = 1
+HASH_CHUNK = 1 << 20
+MEMORY_ENTRIES = 16   # imports kept in memory per importer; older ones are read back from the disk cache
+
+_DURATION_RE = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+_UNTIL_RE = re.compile(r"UNTIL=([0-9T]+Z?)", re.IGNORECASE)
+
+
+class CalendarImport(BaseModel):
+    """Result of importing one calendar file."""
+    source: str = Field(..., description="Path of the imported .ics file")
+    sha256: str = Field(..., description="Content hash used as the cache key")
+    window_start: int = Field(..., description="Import window start (UTC epoch seconds)")
+    window_end: int = Field(..., description="Import window end (UTC epoch seconds)")
+    conflicts: List[Dict[str, Any]] = Field(default_factory=list, description="Busy intervals: {start, end, title} in epoch seconds")
+    event_count: int = Field(default=0, description="VEVENTs read from the file")
+    warnings: List[str] = Field(default_factory=list, description="Events that could not be interpreted")
+    cached: bool = Field(default=False, description="Whether the result came from the cache")
+
+
+# ───── Streaming parser ─────────────────────────────────────────────────
+
+def iter_unfolded_lines(path: str) -> Iterator[str]:
+    """Yield logical content lines, joining RFC 5545 folded continuations."""
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as handle:
+        pending: Optional[str] = None
+        for raw in handle:
+            line = raw.rstrip("\r\n")
+            if line[:1] in (" ", "\t") and pending is not None:
+                pending += line[1:]
+                continue
+            if pending is not None:
+                yield pending
+            pending = line
+        if pending is not None:
+            yield pending
+
+
+def parse_content_line(line: str) -> Tuple[str, Dict[str, str], str]:
+    """Split 'NAME;PARAM=x:value' into (NAME, {PARAM: x}, value)."""
+    head, sep, value = line.partition(":")
+    # A quoted parameter may itself contain ':'; re-split if the quote is still open
+    while head.count('"') % 2 and sep:
+        more, sep, value = value.partition(":")
+        head = f"{head}:{more}"
+    name, *params = head.split(";")
+    parsed = {}
+    for param in params:
+        key, _, val = param.partition("=")
+        parsed[key.upper()] = val.strip('"')
+    return name.upper(), parsed, value
+
+
+def iter_events(path: str) -> Iterator[Dict[str, List[Tuple[Dict[str, str], str]]]]:
+    """Yield each top-level VEVENT as {PROPERTY: [(params, value), ...]}."""
+    event: Optional[Dict[str, List[Tuple[Dict[str, str], str]]]] = None
+    depth = 0  # nested components inside a VEVENT (e.g. VALARM) are skipped
+    for line in iter_unfolded_lines(path):
+        if not line:
+            continue
+        name, params, value = parse_content_line(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and event is None:
+                event = {}
+            elif event is not None:
+                depth += 1
+        elif name == "END":
+            if event is not None and depth:
+                depth -= 1
+            elif event is not None and value.upper() == "VEVENT":
+                yield event
+                event = None
+        elif event is not None and not depth:
+            event.setdefault(name, []).append((params, value))
+
+
+# ───── Value helpers ────────────────────────────────────────────────────
+
+def parse_ics_datetime(value: str, params: Dict[str, str], default_tz: timezone) -> Tuple[datetime, bool]:
+    """Parse a DATE or DATE-TIME value into an aware datetime; returns (moment, is_all_day)."""
+    value = value.strip()
+    if len(value) == 8 or params.get("VALUE", "").upper() == "DATE":
+        return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]), tzinfo=default_tz), True
+    if len(value) not in (15, 16) or value[8] != "T":
+        raise ValueError(f"Unrecognized date-time: {value!r}")
+    if value.endswith("Z"):
+        tz = timezone.utc
+    else:
+        tz = get_zone(params["TZID"]) if "TZID" in params else default_tz
+    # Slicing is several times faster than strptime, which matters for large exports
+    return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                    int(value[9:11]), int(value[11:13]), int(value[13:15]), tzinfo=tz), False
+
+
+def parse_duration(value: str) -> timedelta:
+    """Parse an RFC 5545 DURATION such as 'PT1H30M' or 'P1D'."""
+    match = _DURATION_RE.match(value.strip().upper())
+    if not match:
+        raise ValueError(f"Unrecognized duration: {value!r}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                      minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -delta if sign == "-" else delta
+
+
+def normalize_rrule(rule: str, dtstart: datetime) -> str:
+    """Rewrite a floating UNTIL in the event's own timezone as UTC, as dateutil requires."""
+    def to_utc(match: re.Match) -> str:
+        until = match.group(1)
+        if until.endswith("Z"):
+            return match.group(0)
+        moment = datetime.strptime(until, "%Y%m%dT%H%M%S" if "T" in until else "%Y%m%d")
+        if "T" not in until:
+            moment = moment.replace(hour=23, minute=59, second=59)
+        return "UNTIL=" + moment.replace(tzinfo=dtstart.tzinfo).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return _UNTIL_RE.sub(to_utc, rule)
+
+
+def file_sha256(path: str) -> str:
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ───── Importer ─────────────────────────────────────────────────────────
+
+class CalendarImporter:
+    """Imports .ics files into compact busy intervals for calendar_conflicts."""
+
+    def __init__(self, default_timezone: Optional[str] = None, cache_dir: Optional[str] = CACHE_DIR):
+        self.default_timezone = default_timezone
+        self.zone = get_zone(default_timezone)
+        self.cache_dir = cache_dir
+        self._memory: "OrderedDict[str, CalendarImport]" = OrderedDict()
+
+    def load(self, path: str, window_start: datetime, window_end: datetime) -> CalendarImport:
+        """Import busy intervals inside [window_start, window_end), using the cache when possible."""
+        sha = file_sha256(path)
+        lo, hi = int(window_start.timestamp()), int(window_end.timestamp())
+        settings = f"{lo}-{hi}-{self.default_timezone or 'UTC'}".encode()
+        key = f"v{CACHE_VERSION}-{sha[:32]}-{hashlib.sha256(settings).hexdigest()[:16]}"
+        cached = self._memory.get(key) or self._read_cache(key)
+        cache_result("calendar_import", cached is not None)
+        if cached is not None:
+            self._remember(key, cached)
+            return cached.model_copy(update={"source": path, "cached": True})
+
+        result = self._parse(path, sha, lo, hi)
+        self._remember(key, result)
+        self._write_cache(key, result)
+        return result
+
+    def _remember(self, key: str, result: CalendarImport) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def apply_to_state(self, state: StateModel, path: str, weeks: Optional[int] = None) -> StatePatch:
+        """Import a calendar for the project window; returns the patch that stores it (see apply_patch)."""
+        timeline = state.timeline or {}
+        start = timeline.get("start_date") or state.session_start_time or datetime.now(timezone.utc)
+        if isinstance(start, str):
+            start = datetime.fromisoformat(start.replace("Z", "+00:00"))
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=self.zone)
+        weeks = int(weeks or timeline.get("timeline_weeks") or TimelineSolver.DEFAULT_WEEKS)
+        result = self.load(path, start, start + timedelta(weeks=weeks))
+
+        # Replace any earlier import of the same file, keep conflicts from other sources
+        others = [c for c in state.calendar_conflicts if c.get("source") != path]
+        sources = dict(state.calendar_data.get("sources", {}))
+        sources[path] = {
+            "sha256": result.sha256,
+            "event_count": result.event_count,
+            "conflict_count": len(result.conflicts),
+            "window": [result.window_start, result.window_end],
+            "imported_at": datetime.now(timezone.utc).isoformat(),
+        }
+        return {
+            "calendar_conflicts": others + [dict(c, source=path) for c in result.conflicts],
+            "calendar_data": {**state.calendar_data, "sources": sources},
+            "warnings": state.warnings + result.warnings,
+        }
+
+    # ───── Parsing ──────────────────────────────────────────────────────
+
+    def _parse(self, path: str, sha: str, lo: int, hi: int) -> CalendarImport:
+        window_start = datetime.fromtimestamp(lo, tz=timezone.utc)
+        window_end = datetime.fromtimestamp(hi, tz=timezone.utc)
+        conflicts: List[Dict[str, Any]] = []
+        overridden: Set[Tuple[str, int]] = set()
+        warnings: List[str] = []
+        count = 0
+        for event in iter_events(path):
+            count += 1
+            try:
+                conflicts.extend(self._expand(event, window_start, window_end, overridden))
+            except (KeyError, ValueError, TypeError) as e:
+                title = self._value(event, "SUMMARY") or self._value(event, "UID") or f"event #{count}"
+                warnings.append(f"Skipped calendar event '{title}': {e}")
+
+        if overridden:
+            # Instances replaced by a RECURRENCE-ID override are dropped from the master's expansion
+            conflicts = [c for c in conflicts if c.get("override") or (c.get("uid"), c["start"]) not in overridden]
+        conflicts.sort(key=lambda c: (c["start"], c["end"]))
+        compact = [{"start": c["start"], "end": c["end"], "title": c["title"]} for c in conflicts]
+        logger.info(f"Imported {len(compact)} busy intervals from {count} events in {path}")
+        return CalendarImport(source=path, sha256=sha, window_start=lo, window_end=hi,
+                              conflicts=compact, event_count=count, warnings=warnings)
+
+    def _expand(self, event: Dict[str, List[Tuple[Dict[str, str], str]]], window_start: datetime,
+                window_end: datetime, overridden: Set[Tuple[str, int]]) -> Iterator[Dict[str, Any]]:
+        """Busy intervals of one VEVENT that intersect the window."""
+        if (self._value(event, "STATUS") or "").upper() == "CANCELLED":
+            return
+        if (self._value(event, "TRANSP") or "OPAQUE").upper() == "TRANSPARENT":
+            return  # marked as "free" in the source calendar
+
+        params, raw = event["DTSTART"][0]
+        start, all_day = parse_ics_datetime(raw, params, self.zone)
+        if "DTEND" in event:
+            end_params, end_raw = event["DTEND"][0]
+            end = parse_ics_datetime(end_raw, end_params, self.zone)[0]
+        elif "DURATION" in event:
+            end = start + parse_duration(event["DURATION"][0][1])
+        else:
+            end = start + (timedelta(days=1) if all_day else timedelta(0))
+        duration = end - start
+        if duration <= timedelta(0):
+            return
+
+        uid = self._value(event, "UID")
+        title = self._value(event, "SUMMARY") or "Busy"
+        if "RECURRENCE-ID" in event:
+            rid_params, rid_raw = event["RECURRENCE-ID"][0]
+            overridden.add((uid, int(parse_ics_datetime(rid_raw, rid_params, self.zone)[0].timestamp())))
+
+        for moment in self._occurrences(event, start, duration, window_start, window_end):
+            lo, hi = int(moment.timestamp()), int((moment + duration).timestamp())
+            if hi > window_start.timestamp() and lo < window_end.timestamp():
+                yield {"start": lo, "end": hi, "title": title, "uid": uid, "override": "RECURRENCE-ID" in event}
+
+    def _occurrences(self, event: Dict[str, List[Tuple[Dict[str, str], str]]], start: datetime,
+                     duration: timedelta, window_start: datetime, window_end: datetime) -> Iterator[datetime]:
+        """Start times of an event's instances that can touch the window."""
+        if "RRULE" not in event or "RECURRENCE-ID" in event:
+            yield start
+            return
+        rule = rrulestr(normalize_rrule(event["RRULE"][0][1], start), dtstart=start, ignoretz=False)
+        excluded = set()
+        for params, value in event.get("EXDATE", []):
+            for part in value.split(","):
+                excluded.add(int(parse_ics_datetime(part, params, start.tzinfo)[0].timestamp()))
+        # xafter() walks the rule lazily; nothing past the window is materialized
+        for moment in rule.xafter(window_start - duration, inc=True):
+            if moment >= window_end:
+                break
+            if int(moment.timestamp()) not in excluded:
+                yield moment
+        for params, value in event.get("RDATE", []):
+            for part in value.split(","):
+                moment = parse_ics_datetime(part.split("/")[0], params, start.tzinfo)[0]
+                if window_start - duration <= moment < window_end:
+                    yield moment
+
+    @staticmethod
+    def _value(event: Dict[str, List[Tuple[Dict[str, str], str]]], name: str) -> Optional[str]:
+        values = event.get(name)
+        return values[0][1] if values else None
+
+    # ───── Cache ────────────────────────────────────────────────────────
+
+    def _cache_path(self, key: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"{key}.json") if self.cache_dir else None
+
+    def _read_cache(self, key: str) -> Optional[CalendarImport]:
+        path = self._cache_path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                return CalendarImport(**json.load(handle))
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable calendar cache {path}: {e}")
+            return None
+
+    def _write_cache(self, key: str, result: CalendarImport) -> None:
+        path = self._cache_path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as handle:
+                json.dump(result.model_dump(), handle, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"Could not write calendar cache {path}: {e}")
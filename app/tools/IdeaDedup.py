@@ -0,0 +1,210 @@
+from typing import List, Dict, Optional, Any, Tuple, Iterable
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+import hashlib
+import os
+import re
+import threading
+import numpy as np
+
+# Near-duplicate filter for project ideas.
+# Each idea becomes a set of word and word-pair shingles, compressed into a
+# fixed 128-value MinHash signature (512 bytes no matter how long the idea).
+# Signatures are split into LSH bands; two ideas that share any band land in
+# the same bucket and are compared by signature agreement, which estimates
+# their Jaccard similarity. Per-thread indexes are capped and evict oldest
+# first, and the optional global index works the same way at a larger cap.
+
+NUM_PERM = 128
+BANDS = 64                # 64 bands × 2 rows: ideas at 0.3 Jaccard are still candidates ~99% of the time
+THRESHOLD = 0.4           # estimated Jaccard at or above which an idea counts as a repeat
+THREAD_CAPACITY = 256     # ideas remembered per thread
+GLOBAL_CAPACITY = 20000
+MAX_THREADS = 2000
+_PRIME = (1 << 61) - 1
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SUFFIX_RE = re.compile(r"(?<=\w{3})(?:ing|es|ed|s)$")
+STOPWORDS = frozenset(
+    "a an and are as at be build by can create for from in into is it its of on or project that the this to "
+    "using use uses via will with your you name overview skills difficulty timeline hours week weeks per".split()
+)
+
+_rng = np.random.default_rng(0x1DEA)
+_A = _rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str) -> set:
+    """Content words (crude suffix stripping) plus adjacent word pairs."""
+    words = [_SUFFIX_RE.sub("", w) for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature (uint32 × NUM_PERM) of an idea's shingles."""
+    grams = shingles(text)
+    if not grams:
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "little") for g in grams),
+        dtype=np.uint64, count=len(grams),
+    )
+    # (a·x + b) mod p for every permutation at once; uint64 wrap-around is part of the hash
+    permuted = (np.outer(hashes, _A) + _B) % np.uint64(_PRIME)
+    return (permuted & np.uint64(0xFFFFFFFF)).min(axis=0).astype(np.uint32)
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.blake2b(text.strip().lower().encode(), digest_size=16).hexdigest()
+
+
+@dataclass
+class IdeaMatch:
+    """An earlier idea that a candidate is too similar to."""
+    text: str
+    kind: str
+    similarity: float
+
+
+class IdeaIndex:
+    """Bounded MinHash/LSH index; oldest ideas are evicted past capacity."""
+
+    def __init__(self, capacity: int = THREAD_CAPACITY, threshold: float = THRESHOLD, bands: int = BANDS):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, str, str, str]]" = OrderedDict()  # sig, text, kind, fingerprint
+        self._buckets: List[Dict[bytes, set]] = [defaultdict(set) for _ in range(bands)]
+        self._exact: Dict[str, int] = {}
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def mark(self, text: str, kind: str = "shown") -> bool:
+        """Update the kind of an idea already remembered ('rejected' wins); False if it isn't indexed."""
+        fingerprint = _fingerprint(text)
+        key = self._exact.get(fingerprint)
+        if key is None:
+            return False
+        old_sig, old_text, old_kind, _ = self._entries[key]
+        self._entries[key] = (old_sig, old_text, "rejected" if "rejected" in (kind, old_kind) else kind, fingerprint)
+        return True
+
+    def add(self, text: str, kind: str = "shown", sig: Optional[np.ndarray] = None) -> None:
+        """Remember an idea; re-adding the same text only updates its kind ('rejected' wins)."""
+        if self.mark(text, kind):
+            return
+        fingerprint = _fingerprint(text)
+        sig = signature(text) if sig is None else sig
+        key = self._next
+        self._next += 1
+        self._entries[key] = (sig, text[:500], kind, fingerprint)
+        self._exact[fingerprint] = key
+        for band, band_key in enumerate(self._band_keys(sig)):
+            self._buckets[band][band_key].add(key)
+        while len(self._entries) > self.capacity:
+            self._evict()
+
+    def _evict(self) -> None:
+        key, (sig, _, _, fingerprint) = self._entries.popitem(last=False)
+        for band, band_key in enumerate(self._band_keys(sig)):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+        self._exact.pop(fingerprint, None)
+
+    def query(self, text: str, kinds: Optional[Iterable[str]] = None,
+              sig: Optional[np.ndarray] = None) -> Optional[IdeaMatch]:
+        """Most similar remembered idea at or above the threshold, if any."""
+        sig = signature(text) if sig is None else sig
+        candidates = set()
+        for band, band_key in enumerate(self._band_keys(sig)):
+            candidates |= self._buckets[band].get(band_key, set())
+        kinds = set(kinds) if kinds else None
+        best: Optional[IdeaMatch] = None
+        for key in candidates:
+            other, other_text, kind, _ = self._entries[key]
+            if kinds and kind not in kinds:
+                continue
+            similarity = float(np.mean(other == sig))
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = IdeaMatch(text=other_text, kind=kind, similarity=round(similarity, 3))
+        return best
+
+
+class IdeaDeduplicator:
+    """Per-thread idea indexes plus an optional global index of rejected ideas."""
+
+    def __init__(self, use_global: bool = False, thread_capacity: int = THREAD_CAPACITY,
+                 global_capacity: int = GLOBAL_CAPACITY, max_threads: int = MAX_THREADS):
+        self.thread_capacity = thread_capacity
+        self.max_threads = max_threads
+        self.global_index = IdeaIndex(global_capacity) if use_global else None
+        self._threads: "OrderedDict[str, IdeaIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def index_for(self, thread_id: str) -> IdeaIndex:
+        """The thread's index, created on first use; least recently used threads are dropped."""
+        index = self._threads.get(thread_id)
+        if index is None:
+            index = self._threads[thread_id] = IdeaIndex(self.thread_capacity)
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+        self._threads.move_to_end(thread_id)
+        return index
+
+    def record(self, thread_id: Optional[str], ideas: Iterable[str], kind: str = "shown") -> None:
+        """Remember ideas as shown or rejected for this thread (and globally, for rejections).
+
+        Ideas the indexes already hold are only re-marked, so recording a growing list each turn
+        computes signatures for the new ideas alone.
+        """
+        with self._lock:
+            indexes = [self.index_for(thread_id)] if thread_id else []
+            if self.global_index is not None and kind == "rejected":
+                indexes.append(self.global_index)
+            for idea in ideas:
+                if not idea or not idea.strip():
+                    continue
+                missing = [index for index in indexes if not index.mark(idea, kind)]
+                if missing:
+                    sig = signature(idea)
+                    for index in missing:
+                        index.add(idea, kind, sig)
+
+    def check(self, thread_id: Optional[str], idea: str,
+              kinds: Optional[Iterable[str]] = None) -> Optional[IdeaMatch]:
+        """Closest earlier idea the candidate repeats, from the thread first, then the global index."""
+        sig = signature(idea)
+        with self._lock:
+            match = self.index_for(thread_id).query(idea, kinds, sig) if thread_id else None
+            if match is None and self.global_index is not None:
+                match = self.global_index.query(idea, kinds, sig)
+        return match
+
+    def filter(self, thread_id: Optional[str], ideas: List[str],
+               kinds: Optional[Iterable[str]] = None) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Drop ideas that repeat earlier ones or each other; kept ideas are recorded as shown."""
+        batch = IdeaIndex(capacity=max(len(ideas), 1))
+        kept, dropped = [], []
+        for idea in ideas:
+            match = self.check(thread_id, idea, kinds) or batch.query(idea)
+            if match:
+                dropped.append({"idea": idea, "similar_to": match.text, "kind": match.kind, "similarity": match.similarity})
+                continue
+            batch.add(idea)
+            kept.append(idea)
+        self.record(thread_id, kept, "shown")
+        return kept, dropped
+
+
+# Shared by the chat graph and /generate so both see the same rejections
+idea_filter = IdeaDeduplicator(use_global=os.getenv("IDEA_DEDUP_GLOBAL", "").lower() in ("1", "true", "yes"))
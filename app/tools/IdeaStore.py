@@ -0,0 +1,182 @@
+from typing import List, Dict, Optional, Any, Iterable
+from datetime import datetime, timezone
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import numpy as np
+
+# Persistent corpus of generated and accepted project ideas.
+# Every idea parsed out of /generate (and every idea accepted in chat) is
+# stored once in SQLite with the form inputs it was generated for, and
+# indexed with FTS5. Retrieval ranks with bm25 over name/overview/skills and
+# the original inputs, keeps only "strong" matches (most query words present),
+# and can re-rank by cosine over hashed bag-of-words vectors stored alongside.
+
+STORE_PATH = os.getenv("IDEA_STORE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "projectforge", "ideas.sqlite3"))
+VECTOR_DIM = 256
+MIN_COVERAGE = 0.6      # share of query words an idea must contain to be served as-is
+FIELDS = ("name", "overview", "skills", "difficulty", "timeline")
+LABELS = {"project name": "name", "project overview": "overview", "project skills": "skills",
+          "project difficulty": "difficulty", "project timeline": "timeline"}
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+_LABEL_RE = re.compile(r"^\W*(project (?:name|overview|skills|difficulty|timeline))\W*:\s*(.*)$", re.IGNORECASE)
+STOPWORDS = frozenset("a an and are as at be by for from i in into is it me my of on or the to want with would "
+                      "project projects idea ideas none no not sure yet some".split())
+
+
+def parse_idea(text: str) -> Dict[str, str]:
+    """Split 'Project Name: … / Project Overview: …' text into fields."""
+    parsed = {field: "" for field in FIELDS}
+    current = None
+    for line in text.splitlines():
+        match = _LABEL_RE.match(line.strip())
+        if match:
+            current = LABELS[match.group(1).lower()]
+            parsed[current] = match.group(2).strip().strip("*").strip()
+        elif current and line.strip():
+            parsed[current] = f"{parsed[current]} {line.strip()}".strip()
+    return parsed
+
+
+def keywords(text: str) -> List[str]:
+    return [w for w in dict.fromkeys(_WORD_RE.findall((text or "").lower())) if w not in STOPWORDS and len(w) > 1]
+
+
+def embed(text: str) -> np.ndarray:
+    """Hashed, L2-normalized bag-of-words vector."""
+    vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for word in _WORD_RE.findall(text.lower()):
+        if word not in STOPWORDS:
+            digest = hashlib.blake2b(word.encode(), digest_size=4).digest()
+            bucket = int.from_bytes(digest, "little")
+            vector[bucket % VECTOR_DIM] += 1.0 if bucket & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class IdeaStore:
+    """SQLite + FTS5 idea corpus, safe to share between request threads."""
+
+    def __init__(self, path: str = STORE_PATH, use_vectors: bool = True):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.use_vectors = use_vectors
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS ideas (
+                id INTEGER PRIMARY KEY,
+                fingerprint TEXT UNIQUE NOT NULL,
+                text TEXT NOT NULL,
+                name TEXT, overview TEXT, skills TEXT, difficulty TEXT, timeline TEXT,
+                project_type TEXT, interest TEXT, technical TEXT, potential TEXT, additional TEXT,
+                source TEXT NOT NULL,
+                generated_count INTEGER NOT NULL DEFAULT 0,
+                served_count INTEGER NOT NULL DEFAULT 0,
+                accepted_count INTEGER NOT NULL DEFAULT 0,
+                vector BLOB,
+                created_at TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS ideas_fts USING fts5(
+                name, overview, skills, project_type, interest, technical,
+                content='ideas', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS ideas_ai AFTER INSERT ON ideas BEGIN
+                INSERT INTO ideas_fts(rowid, name, overview, skills, project_type, interest, technical)
+                VALUES (new.id, new.name, new.overview, new.skills, new.project_type, new.interest, new.technical);
+            END;
+        """)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM ideas").fetchone()[0]
+
+    # ───── Writing ──────────────────────────────────────────────────────
+
+    def add(self, text: str, inputs: Optional[Dict[str, Any]] = None, source: str = "generated") -> int:
+        """Store an idea (once per normalized text) with the form inputs it answered; returns its id."""
+        inputs = inputs or {}
+        fields = parse_idea(text)
+        fingerprint = hashlib.blake2b(" ".join(_WORD_RE.findall(text.lower())).encode(), digest_size=16).hexdigest()
+        counter = "accepted_count" if source == "accepted" else "generated_count"
+        vector = embed(" ".join(fields.values()) or text).tobytes() if self.use_vectors else None
+        with self._lock, self._db:
+            self._db.execute(
+                f"""INSERT INTO ideas (fingerprint, text, name, overview, skills, difficulty, timeline,
+                        project_type, interest, technical, potential, additional, source, {counter}, vector, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+                    ON CONFLICT(fingerprint) DO UPDATE SET {counter} = {counter} + 1""",
+                (fingerprint, text, fields["name"] or text[:80], fields["overview"], fields["skills"],
+                 fields["difficulty"], fields["timeline"], inputs.get("project_type"), inputs.get("project_interest"),
+                 inputs.get("project_technical"), inputs.get("project_potential"), inputs.get("project_additional"),
+                 source, vector, datetime.now(timezone.utc).isoformat()),
+            )
+            return self._db.execute("SELECT id FROM ideas WHERE fingerprint = ?", (fingerprint,)).fetchone()[0]
+
+    def add_many(self, ideas: Iterable[str], inputs: Optional[Dict[str, Any]] = None, source: str = "generated") -> List[int]:
+        return [self.add(idea, inputs, source) for idea in ideas]
+
+    def mark_served(self, ids: Iterable[int]) -> None:
+        ids = list(ids)
+        if ids:
+            with self._lock, self._db:
+                self._db.executemany("UPDATE ideas SET served_count = served_count + 1 WHERE id = ?", [(i,) for i in ids])
+
+    # ───── Retrieval ────────────────────────────────────────────────────
+
+    def search(self, inputs: Dict[str, Any], limit: int = 5, candidates: int = 50,
+               exclude: Iterable[int] = ()) -> List[Dict[str, Any]]:
+        """Strong matches for a /generate form: bm25 candidates, coverage filter, optional vector re-rank."""
+        words = keywords(" ".join(str(inputs.get(k) or "") for k in ("project_type", "project_interest", "project_technical")))
+        if not words:
+            return []
+        # The interest domain must match; type and skills only rank. Keeps bm25 off ideas that share just "app"
+        interest = keywords(str(inputs.get("project_interest") or ""))
+        query = " OR ".join(f'"{w}"' for w in words)
+        if interest:
+            required = " OR ".join(f'"{w}"' for w in interest)
+            query = f"({required}) AND ({query})"
+        excluded = set(exclude)
+        with self._lock:
+            rows = self._db.execute(
+                """SELECT ideas.*, bm25(ideas_fts, 2.0, 1.0, 1.5, 1.5, 2.0, 1.5) AS rank
+                   FROM ideas_fts JOIN ideas ON ideas.id = ideas_fts.rowid
+                   WHERE ideas_fts MATCH ? ORDER BY rank LIMIT ?""",
+                (query, candidates),
+            ).fetchall()
+
+        query_vector = embed(" ".join(words)) if self.use_vectors else None
+        matches = []
+        for row in rows:
+            if row["id"] in excluded:
+                continue
+            haystack = set(keywords(" ".join(str(row[k] or "") for k in
+                                             ("name", "overview", "skills", "project_type", "interest", "technical"))))
+            coverage = sum(1 for w in words if w in haystack) / len(words)
+            if coverage < MIN_COVERAGE:
+                continue
+            score = -row["rank"] * (1 + 0.2 * math.log1p(row["accepted_count"]))
+            if query_vector is not None and row["vector"]:
+                score *= 1 + float(np.frombuffer(row["vector"], dtype=np.float32) @ query_vector)
+            matches.append({"id": row["id"], "text": row["text"], "name": row["name"], "difficulty": row["difficulty"],
+                            "timeline": row["timeline"], "coverage": round(coverage, 2), "score": round(score, 3)})
+        matches.sort(key=lambda m: m["score"], reverse=True)
+        return matches[:limit]
+
+
+_default_store: Optional[IdeaStore] = None
+
+
+def get_idea_store() -> IdeaStore:
+    """Process-wide store at IDEA_STORE_PATH, opened on first use."""
+    global _default_store
+    if _default_store is None:
+        _default_store = IdeaStore(STORE_PATH)
+    return _default_store
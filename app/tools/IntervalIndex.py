@@ -0,0 +1,262 @@
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator
+from datetime import datetime, timezone
+import random
+
+# Interval index over calendar_conflicts / optimal_work_blocks.
+# A treap keyed on (start, end, id) where every node also tracks the largest
+# end in its subtree, so overlap queries prune whole subtrees that finish
+# before the query window. Intervals are half-open [start, end) in epoch seconds.
+
+
+def to_epoch(value: Any, tz: timezone = timezone.utc) -> float:
+    """Convert a datetime, ISO-8601 string or epoch number into UTC epoch seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=tz)
+        return value.timestamp()
+    raise ValueError(f"Unrecognized timestamp: {value!r}")
+
+
+def from_epoch(value: float) -> datetime:
+    """Convert UTC epoch seconds into an aware datetime."""
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+def record_interval(record: Dict[str, Any], tz: timezone = timezone.utc) -> Optional[Tuple[float, float]]:
+    """Read a {start, end} record as an epoch interval; None if it is empty or malformed."""
+    try:
+        start, end = to_epoch(record["start"], tz), to_epoch(record["end"], tz)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (start, end) if end > start else None
+
+
+class _Node:
+    __slots__ = ("start", "end", "id", "data", "priority", "max_end", "left", "right")
+
+    def __init__(self, start: float, end: float, id: int, data: Any, priority: float):
+        self.start = start
+        self.end = end
+        self.id = id
+        self.data = data
+        self.priority = priority
+        self.max_end = end
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+    def key(self) -> Tuple[float, float, int]:
+        return (self.start, self.end, self.id)
+
+    def update(self) -> None:
+        max_end = self.end
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+class IntervalIndex:
+    """Augmented interval tree with overlap, free-gap and incremental update queries."""
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, Any]] = (), seed: Optional[int] = None):
+        self._random = random.Random(seed)
+        self._root: Optional[_Node] = None
+        self._keys: Dict[int, Tuple[float, float, int]] = {}
+        self._next_id = 0
+        self._build(intervals)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], tz: timezone = timezone.utc) -> "IntervalIndex":
+        """Index {start, end, ...} dicts (ISO strings, datetimes or epochs); malformed records are skipped."""
+        intervals = []
+        for record in records:
+            interval = record_interval(record, tz)
+            if interval is not None:
+                intervals.append((interval[0], interval[1], record))
+        return cls(intervals)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[Tuple[float, float, Any]]:
+        """All intervals in start order."""
+        stack: List[_Node] = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield (node.start, node.end, node.data)
+            node = node.right
+
+    # ───── Updates ──────────────────────────────────────────────────────
+
+    def insert(self, start: float, end: float, data: Any = None) -> int:
+        """Add an interval and return its handle for later removal."""
+        if end <= start:
+            raise ValueError(f"Empty interval: [{start}, {end})")
+        node = self._new_node(start, end, data)
+        self._root = self._insert(self._root, node)
+        return node.id
+
+    def remove(self, handle: int) -> bool:
+        """Remove an interval by handle; False if it is not in the index."""
+        key = self._keys.pop(handle, None)
+        if key is None:
+            return False
+        self._root = self._remove(self._root, key)
+        return True
+
+    # ───── Queries ──────────────────────────────────────────────────────
+
+    def overlaps(self, start: float, end: float) -> List[Tuple[float, float, Any]]:
+        """Intervals intersecting [start, end), in start order."""
+        return [(node.start, node.end, node.data) for node in self._walk(start, end)]
+
+    def any_overlap(self, start: float, end: float) -> bool:
+        """Whether anything intersects [start, end)."""
+        return next(self._walk(start, end), None) is not None
+
+    def count_overlaps(self, start: float, end: float) -> int:
+        """Number of intervals intersecting [start, end)."""
+        return sum(1 for _ in self._walk(start, end))
+
+    def free_gaps(self, start: float, end: float, min_length: float = 0.0) -> List[Tuple[float, float]]:
+        """Uncovered stretches of [start, end) at least min_length seconds long."""
+        gaps: List[Tuple[float, float]] = []
+        cursor = start
+        for node in self._walk(start, end):
+            if node.start > cursor and node.start - cursor >= min_length:
+                gaps.append((cursor, node.start))
+            if node.end > cursor:
+                cursor = node.end
+        if end > cursor and end - cursor >= min_length:
+            gaps.append((cursor, end))
+        return gaps
+
+    def covered(self, start: float, end: float) -> List[Tuple[float, float]]:
+        """Merged busy stretches within [start, end)."""
+        merged: List[Tuple[float, float]] = []
+        for node in self._walk(start, end):
+            lo, hi = max(node.start, start), min(node.end, end)
+            if merged and lo <= merged[-1][1]:
+                if hi > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], hi)
+            else:
+                merged.append((lo, hi))
+        return merged
+
+    # ───── Internals ────────────────────────────────────────────────────
+
+    def _new_node(self, start: float, end: float, data: Any) -> _Node:
+        node = _Node(float(start), float(end), self._next_id, data, self._random.random())
+        self._keys[node.id] = node.key()
+        self._next_id += 1
+        return node
+
+    def _build(self, intervals: Iterable[Tuple[float, float, Any]]) -> None:
+        """Bulk load in O(n log n): sort, then build the treap as a Cartesian tree on a stack."""
+        nodes = [self._new_node(s, e, d) for s, e, d in intervals if e > s]
+        nodes.sort(key=_Node.key)
+        stack: List[_Node] = []
+        for node in nodes:
+            last = None
+            while stack and stack[-1].priority < node.priority:
+                last = stack.pop()
+            node.left = last
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        self._root = self._fix_max(stack[0]) if stack else None
+
+    def _fix_max(self, node: _Node) -> _Node:
+        """Recompute max_end bottom-up over the whole tree (used once after bulk build)."""
+        order: List[_Node] = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            order.append(current)
+            if current.left is not None:
+                stack.append(current.left)
+            if current.right is not None:
+                stack.append(current.right)
+        for current in reversed(order):
+            current.update()
+        return node
+
+    def _insert(self, root: Optional[_Node], node: _Node) -> _Node:
+        if root is None:
+            return node
+        if node.key() < root.key():
+            root.left = self._insert(root.left, node)
+            if root.left.priority > root.priority:
+                root = self._rotate_right(root)
+        else:
+            root.right = self._insert(root.right, node)
+            if root.right.priority > root.priority:
+                root = self._rotate_left(root)
+        root.update()
+        return root
+
+    def _remove(self, root: Optional[_Node], key: Tuple[float, float, int]) -> Optional[_Node]:
+        if root is None:
+            return None
+        current = root.key()
+        if key < current:
+            root.left = self._remove(root.left, key)
+        elif key > current:
+            root.right = self._remove(root.right, key)
+        else:
+            if root.left is None:
+                return root.right
+            if root.right is None:
+                return root.left
+            if root.left.priority > root.right.priority:
+                root = self._rotate_right(root)
+                root.right = self._remove(root.right, key)
+            else:
+                root = self._rotate_left(root)
+                root.left = self._remove(root.left, key)
+        root.update()
+        return root
+
+    @staticmethod
+    def _rotate_right(node: _Node) -> _Node:
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        node.update()
+        pivot.update()
+        return pivot
+
+    @staticmethod
+    def _rotate_left(node: _Node) -> _Node:
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        node.update()
+        pivot.update()
+        return pivot
+
+    def _walk(self, start: float, end: float) -> Iterator[_Node]:
+        """In-order walk of nodes intersecting [start, end), skipping subtrees that end too early."""
+        stack: List[_Node] = []
+        node = self._root
+        while True:
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if node.start >= end:
+                return  # everything after this starts too late
+            if node.end > start:
+                yield node
+            node = node.right
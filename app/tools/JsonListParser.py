@@ -0,0 +1,79 @@
+from typing import List, Any, Iterable, Iterator, Optional
+import ast
+import json
+
+# Incremental parser for a JSON array arriving in pieces (LLM token stream).
+# It scans characters once, tracking string/escape state and bracket depth,
+# and hands back each top-level element as soon as the ',' or ']' after it
+# arrives. Text before the opening '[' (a code fence, a field header) is
+# skipped. Elements that are not strict JSON (single quotes, True/None) are
+# retried as Python literals, which is what LLMs most often emit instead.
+
+
+class JsonListParser:
+    """Feed text chunks; get back the array elements completed by each chunk."""
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self._depth = 0            # bracket depth inside the top-level array
+        self._quote: Optional[str] = None
+        self._escape = False
+        self._item: List[str] = []
+        self.errors: List[str] = []
+
+    def feed(self, chunk: str) -> List[Any]:
+        items = []
+        for ch in chunk:
+            if self.done:
+                break
+            if not self.started:
+                if ch == "[":
+                    self.started = True
+                continue
+            if self._quote:
+                self._item.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == self._quote:
+                    self._quote = None
+                continue
+            if ch in "\"'":
+                self._quote = ch
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                if self._depth == 0:   # closes the top-level array
+                    self._emit(items)
+                    self.done = True
+                    continue
+                self._depth -= 1
+            elif ch == "," and self._depth == 0:
+                self._emit(items)
+                continue
+            self._item.append(ch)
+        return items
+
+    def _emit(self, items: List[Any]) -> None:
+        text = "".join(self._item).strip()
+        self._item = []
+        if not text:
+            return
+        try:
+            items.append(json.loads(text))
+        except json.JSONDecodeError:
+            try:
+                items.append(ast.literal_eval(text))
+            except (ValueError, SyntaxError) as e:
+                self.errors.append(f"Unparseable list item {text[:60]!r}: {e}")
+
+
+def iter_json_list(chunks: Iterable[str]) -> Iterator[Any]:
+    """Elements of a streamed JSON array, yielded as they complete."""
+    parser = JsonListParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
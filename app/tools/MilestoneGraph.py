@@ -0,0 +1,266 @@
+from typing import List, Dict, Optional, Any
+from collections import deque
+import re
+from pydantic import BaseModel, Field
+from app.tools.TimelineSolver import milestone_hours, milestone_title
+
+# Milestone dependency graph.
+# Milestones carry an "id" and a "depends_on" list of predecessor ids (or
+# titles). Durations are hours converted to weeks at the weekly commitment;
+# topological order, earliest/latest times, slack and the critical path all
+# come from one Kahn pass plus one backward pass, O(V + E).
+#
+# The topological order replays the list as if it were arriving: a milestone
+# is released when it arrives with every dependency already released, or as
+# soon as its last dependency is released after that (in list order among
+# milestones freed together). So a list that already respects its
+# dependencies keeps its order, and StreamingOrder, which applies the same
+# rule while milestones really are still arriving, yields the same order.
+# A repeated id or title refers to its first occurrence in both; repeated ids
+# are renamed and reported in issues.
+
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+class GraphAnalysis(BaseModel):
+    """Dependency analysis of a milestone plan."""
+    order: List[str] = Field(default_factory=list, description="Milestone ids in dependency order")
+    critical_path: List[str] = Field(default_factory=list, description="Ids of the longest dependency chain")
+    critical_path_weeks: float = Field(default=0.0, description="Length of the critical path in weeks")
+    total_hours: float = Field(default=0.0, description="Sum of milestone hours")
+    capacity_hours: float = Field(default=0.0, description="hours_per_week × weeks (× team size for teams)")
+    earliest_start: Dict[str, float] = Field(default_factory=dict, description="Earliest start week offset per milestone")
+    latest_start: Dict[str, float] = Field(default_factory=dict, description="Latest start week offset that keeps the deadline")
+    slack: Dict[str, float] = Field(default_factory=dict, description="Weeks each milestone can slip without missing the deadline")
+    feasible: bool = Field(default=True, description="Whether the plan fits the timeline")
+    issues: List[str] = Field(default_factory=list, description="Why the plan is infeasible, plus unresolved links")
+
+
+def parse_weekly_hours(text: Any) -> Optional[float]:
+    """Read '8-10 hours' or '6' as hours per week (midpoint of a range)."""
+    if isinstance(text, (int, float)):
+        return float(text)
+    numbers = [float(n) for n in _NUMBER_RE.findall(str(text or ""))]
+    return sum(numbers[:2]) / len(numbers[:2]) if numbers else None
+
+
+class MilestoneGraph:
+    """Predecessor graph over milestone dicts."""
+
+    def __init__(self, milestones: List[Dict[str, Any]]):
+        self.milestones = milestones
+        self.ids: List[str] = []
+        self.issues: List[str] = []
+        lookup: Dict[str, int] = {}
+        titles: Dict[str, int] = {}
+        for i, milestone in enumerate(milestones):
+            mid = str(milestone.get("id") or i + 1)
+            if mid in lookup:
+                unique = f"{mid}-{i + 1}"
+                self.issues.append(f"Duplicate milestone id {mid!r} ('{milestone_title(milestone, i)}') renamed to "
+                                   f"{unique!r}; links to {mid!r} mean the first one")
+                mid = unique
+            lookup.setdefault(mid, i)
+            titles.setdefault(milestone_title(milestone, i).strip().lower(), i)
+            self.ids.append(mid)
+
+        self.predecessors: List[List[int]] = []
+        for i, milestone in enumerate(milestones):
+            links = milestone.get("depends_on") or milestone.get("dependencies") or []
+            if not isinstance(links, list):
+                links = [links]
+            resolved = []
+            for link in links:
+                j = lookup.get(str(link).strip(), titles.get(str(link).strip().lower()))
+                if j is None:
+                    self.issues.append(f"'{milestone_title(milestone, i)}' depends on unknown milestone {link!r}")
+                elif j == i:
+                    self.issues.append(f"'{milestone_title(milestone, i)}' depends on itself")
+                elif j not in resolved:
+                    resolved.append(j)
+            self.predecessors.append(resolved)
+
+    def topological_order(self) -> Optional[List[int]]:
+        """Kahn's algorithm in arrival order (see the module comment); None if there is a cycle."""
+        indegree = [len(preds) for preds in self.predecessors]
+        successors: List[List[int]] = [[] for _ in self.milestones]
+        for i, preds in enumerate(self.predecessors):
+            for j in preds:
+                successors[j].append(i)
+        order = []
+        for arrived in range(len(self.milestones)):
+            if indegree[arrived]:
+                continue   # released later, by its last dependency
+            ready = deque([arrived])
+            while ready:
+                i = ready.popleft()
+                order.append(i)
+                for k in successors[i]:
+                    indegree[k] -= 1
+                    if indegree[k] == 0 and k < arrived:   # later milestones are released on arrival
+                        ready.append(k)
+        return order if len(order) == len(self.milestones) else None
+
+    def analyze(self, hours_per_week: Optional[float], timeline_weeks: Optional[float],
+                team_size: int = 1) -> GraphAnalysis:
+        """Critical path, slack and feasibility against the timeline and weekly hours."""
+        issues = list(self.issues)
+        hours = [milestone_hours(m) for m in self.milestones]
+        total = sum(hours)
+        rate = float(hours_per_week) if hours_per_week else None
+        weeks = float(timeline_weeks) if timeline_weeks else None
+        capacity = rate * weeks * max(team_size, 1) if rate and weeks else 0.0
+
+        order = self.topological_order()
+        if order is None:
+            stuck = [self.ids[i] for i, preds in enumerate(self.predecessors) if preds]
+            issues.append(f"Milestone dependencies form a cycle (involving {', '.join(stuck)})")
+            return GraphAnalysis(order=[], total_hours=total, capacity_hours=capacity, feasible=False, issues=issues)
+
+        # Forward pass: earliest start/finish in weeks; one person per milestone
+        duration = [h / rate if rate else 0.0 for h in hours]
+        earliest = [0.0] * len(order)
+        finish = [0.0] * len(order)
+        via: List[Optional[int]] = [None] * len(order)
+        for i in order:
+            for j in self.predecessors[i]:
+                if finish[j] > earliest[i]:
+                    earliest[i], via[i] = finish[j], j
+            finish[i] = earliest[i] + duration[i]
+        length = max(finish, default=0.0)
+
+        # Backward pass against the deadline (or the critical path when there is none)
+        horizon = max(length, weeks or 0.0)
+        latest_finish = [horizon] * len(order)
+        for i in reversed(order):
+            for j in self.predecessors[i]:
+                latest_finish[j] = min(latest_finish[j], latest_finish[i] - duration[i])
+        latest = [lf - d for lf, d in zip(latest_finish, duration)]
+
+        path: List[str] = []
+        node: Optional[int] = max(range(len(order)), key=lambda i: finish[i]) if order else None
+        while node is not None:
+            path.append(self.ids[node])
+            node = via[node]
+        path.reverse()
+
+        feasible = True
+        if weeks and length > weeks + 1e-9:
+            feasible = False
+            issues.append(f"Critical path needs {length:.1f} weeks but the timeline is {weeks:g} weeks")
+        if capacity and total > capacity + 1e-9:
+            feasible = False
+            issues.append(f"Milestones need {total:.0f} hours but only {capacity:.0f} are available")
+
+        return GraphAnalysis(
+            order=[self.ids[i] for i in order],
+            critical_path=path,
+            critical_path_weeks=round(length, 2),
+            total_hours=round(total, 2),
+            capacity_hours=round(capacity, 2),
+            earliest_start={self.ids[i]: round(earliest[i], 2) for i in order},
+            latest_start={self.ids[i]: round(latest[i], 2) for i in order},
+            slack={self.ids[i]: round(max(latest[i] - earliest[i], 0.0), 2) for i in order},
+            feasible=feasible,
+            issues=issues,
+        )
+
+    def ordered_milestones(self, analysis: GraphAnalysis) -> List[Dict[str, Any]]:
+        """Milestones in dependency order with id, depends_on and slack filled in."""
+        if not analysis.order:
+            return list(self.milestones)
+        position = {mid: i for i, mid in enumerate(self.ids)}
+        critical = set(analysis.critical_path)
+        ordered = []
+        for mid in analysis.order:
+            i = position[mid]
+            ordered.append({
+                **self.milestones[i],
+                "id": mid,
+                "depends_on": [self.ids[j] for j in self.predecessors[i]],
+                "slack_weeks": analysis.slack.get(mid, 0.0),
+                "critical": mid in critical,
+            })
+        return ordered
+
+
+class StreamingOrder:
+    """Releases milestones in MilestoneGraph's topological order while the list is still arriving.
+
+    Same rule as MilestoneGraph.topological_order: a milestone is released on arrival if everything it
+    depends on has been released, otherwise as soon as its last dependency is. Links to milestones that
+    have not arrived yet wait for a later id or title to match. Milestones with links that never resolve
+    (unknown ids, cycles) stay pending; callers then fall back to ordering the complete list. O(V + E)
+    over the whole stream.
+    """
+
+    def __init__(self):
+        self.milestones: List[Dict[str, Any]] = []
+        self._ids: Dict[str, int] = {}
+        self._titles: Dict[str, int] = {}
+        self._released: set = set()
+        self._missing: List[int] = []               # unreleased (or unresolved) dependencies per milestone
+        self._deps: List[set] = []
+        self._successors: List[List[int]] = []
+        self._awaiting_id: Dict[str, List[list]] = {}      # link key -> [waiter, resolved] cells
+        self._awaiting_title: Dict[str, List[list]] = {}
+
+    def _link(self, waiter: int, j: int, counted: bool) -> None:
+        """waiter depends on j; `counted` when the link is already in waiter's missing count."""
+        duplicate = j == waiter or j in self._deps[waiter]
+        if not duplicate:
+            self._deps[waiter].add(j)
+        if duplicate or j in self._released:
+            self._missing[waiter] -= counted   # nothing (more) to wait for
+        else:
+            self._successors[j].append(waiter)
+            self._missing[waiter] += not counted
+
+    def add(self, milestone: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Register the next milestone; returns those that can now be placed, in final order."""
+        i = len(self.milestones)
+        self.milestones.append(milestone)
+        self._missing.append(0)
+        self._deps.append(set())
+        self._successors.append([])
+        mid, title = str(milestone.get("id") or i + 1), milestone_title(milestone, i).strip().lower()
+        waiters = []
+        if mid not in self._ids:
+            self._ids[mid] = i
+            waiters += self._awaiting_id.pop(mid, [])
+        if title not in self._titles:
+            self._titles[title] = i
+            waiters += self._awaiting_title.pop(title, [])
+        for cell in sorted(waiters, key=lambda c: c[0]):
+            if not cell[1]:
+                cell[1] = True
+                self._link(cell[0], i, counted=True)
+
+        links = milestone.get("depends_on") or milestone.get("dependencies") or []
+        for link in links if isinstance(links, list) else [links]:
+            key = str(link).strip()
+            j = self._ids.get(key, self._titles.get(key.lower()))
+            if j is None:
+                cell = [i, False]
+                self._awaiting_id.setdefault(key, []).append(cell)
+                self._awaiting_title.setdefault(key.lower(), []).append(cell)
+                self._missing[i] += 1
+            else:
+                self._link(i, j, counted=False)
+
+        released = []
+        ready = deque([i] if self._missing[i] == 0 else [])
+        while ready:
+            k = ready.popleft()
+            self._released.add(k)
+            released.append(self.milestones[k])
+            for w in self._successors[k]:
+                self._missing[w] -= 1
+                if self._missing[w] == 0:
+                    ready.append(w)
+        return released
+
+    @property
+    def pending(self) -> int:
+        """Milestones that arrived but could not be released yet."""
+        return len(self.milestones) - len(self._released)
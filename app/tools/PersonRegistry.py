@@ -0,0 +1,280 @@
+from typing import List, Dict, Optional, Any, Iterable, Set, Tuple
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import os
+import threading
+import ormsgpack
+from app.person import Person, PersonSummary, ProjectMemberProfile
+from app.codec import PERSON_SCHEMA, CodecError, decode, encode
+
+# In-memory Person repository with secondary indexes.
+# Equality fields (skills, user_type, experience_level) map to sets of
+# person ids. Skill levels are filed cumulatively: an advanced Python user is
+# under ("python", "beginner"), ("python", "intermediate") and ("python",
+# "advanced"), so "intermediate or better" is one set lookup. Weekly hours
+# are a sorted (value, id) list searched with bisect. Timezones are filed by
+# IANA name and turned into UTC offsets when a query runs, one lookup per
+# distinct zone, so DST changes never leave stale offsets behind; people
+# whose zone doesn't resolve are left out of offset queries. A query
+# intersects the equality sets smallest-first and checks ranges against the
+# survivors; only an hours-only query scans the hours index.
+#
+# A skill listed in technical_skills without an entry in skill_levels is
+# indexed at the person's overall experience_level.
+
+REGISTRY_PATH = os.getenv("PERSON_REGISTRY_PATH", os.path.join(os.path.expanduser("~"), ".cache", "projectforge", "people.msgpack"))
+LEVELS = ("beginner", "intermediate", "advanced")
+
+
+def normalize_skill(skill: str) -> str:
+    return " ".join(skill.lower().split())
+
+
+def valid_zone(tz_name: Optional[str]) -> Optional[str]:
+    """The IANA zone name if it resolves, else None (no timezone, or one like 'Mars/Base')."""
+    if not tz_name:
+        return None
+    try:
+        ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    return tz_name
+
+
+def utc_offset_hours(tz_name: Optional[str], at: Optional[datetime] = None) -> Optional[float]:
+    """UTC offset of an IANA zone in hours at `at` (default now), or None for a missing or unknown zone."""
+    if not valid_zone(tz_name):
+        return None
+    offset = (at or datetime.now(timezone.utc)).astimezone(ZoneInfo(tz_name)).utcoffset()
+    return offset.total_seconds() / 3600
+
+
+class _RangeIndex:
+    """Sorted (value, id) pairs for inclusive range lookups, plus id -> value for filtering small sets."""
+
+    def __init__(self):
+        self._entries: List[Tuple[float, str]] = []
+        self._values: Dict[str, float] = {}
+
+    def add(self, value: Optional[float], person_id: str) -> None:
+        if value is not None:
+            insort(self._entries, (value, person_id))
+            self._values[person_id] = value
+
+    def remove(self, value: Optional[float], person_id: str) -> None:
+        if value is not None:
+            i = bisect_left(self._entries, (value, person_id))
+            if i < len(self._entries) and self._entries[i] == (value, person_id):
+                del self._entries[i]
+            self._values.pop(person_id, None)
+
+    def rebuild(self, pairs: Iterable[Tuple[Optional[float], str]]) -> None:
+        self._values = {pid: v for v, pid in pairs if v is not None}
+        self._entries = sorted((v, pid) for pid, v in self._values.items())
+
+    def filter(self, ids: Iterable[str], low: Optional[float] = None, high: Optional[float] = None) -> Set[str]:
+        low = float("-inf") if low is None else low
+        high = float("inf") if high is None else high
+        nan, values = float("nan"), self._values
+        return {pid for pid in ids if low <= values.get(pid, nan) <= high}
+
+    def between(self, low: Optional[float] = None, high: Optional[float] = None) -> Set[str]:
+        lo = 0 if low is None else bisect_left(self._entries, (low, ""))
+        hi = len(self._entries) if high is None else bisect_right(self._entries, (high, "\U0010ffff"))
+        return {pid for _, pid in self._entries[lo:hi]}
+
+
+class PersonRegistry:
+    """Person store indexed by skill, level, user type, experience, weekly hours and timezone."""
+
+    def __init__(self, people: Iterable[Person] = ()):
+        self._lock = threading.RLock()
+        self._people: Dict[str, Person] = {}
+        self._keys: Dict[str, Dict[str, Any]] = {}   # person_id -> index keys it was filed under
+        self._skills: Dict[str, Set[str]] = {}
+        self._skill_levels: Dict[Tuple[str, str], Set[str]] = {}
+        self._user_types: Dict[str, Set[str]] = {}
+        self._experience: Dict[str, Set[str]] = {}
+        self._hours = _RangeIndex()
+        self._zones: Dict[str, Set[str]] = {}   # valid IANA zone -> person ids
+        self.bulk_load(people)
+
+    def __len__(self) -> int:
+        return len(self._people)
+
+    def __contains__(self, person_id: str) -> bool:
+        return person_id in self._people
+
+    def get(self, person_id: str) -> Optional[Person]:
+        return self._people.get(person_id)
+
+    # ───── Indexing ─────────────────────────────────────────────────────
+
+    @staticmethod
+    def _index_keys(person: Person) -> Dict[str, Any]:
+        levels = {normalize_skill(s): level for s, level in person.skill_levels.items()}
+        for skill in person.technical_skills:
+            levels.setdefault(normalize_skill(skill), person.experience_level)
+        return {"skill_levels": levels, "user_type": person.user_type, "experience_level": person.experience_level,
+                "hours": person.weekly_hours_available, "zone": valid_zone(person.timezone)}
+
+    def _file(self, person_id: str, keys: Dict[str, Any]) -> None:
+        for skill, level in keys["skill_levels"].items():
+            self._skills.setdefault(skill, set()).add(person_id)
+            for at_least in LEVELS[:LEVELS.index(level) + 1]:
+                self._skill_levels.setdefault((skill, at_least), set()).add(person_id)
+        self._user_types.setdefault(keys["user_type"], set()).add(person_id)
+        self._experience.setdefault(keys["experience_level"], set()).add(person_id)
+        if keys["zone"]:
+            self._zones.setdefault(keys["zone"], set()).add(person_id)
+
+    def _unfile(self, person_id: str, keys: Dict[str, Any]) -> None:
+        for skill, level in keys["skill_levels"].items():
+            self._skills[skill].discard(person_id)
+            for at_least in LEVELS[:LEVELS.index(level) + 1]:
+                self._skill_levels[(skill, at_least)].discard(person_id)
+        self._user_types[keys["user_type"]].discard(person_id)
+        self._experience[keys["experience_level"]].discard(person_id)
+        self._hours.remove(keys["hours"], person_id)
+        if keys["zone"]:
+            self._zones[keys["zone"]].discard(person_id)
+
+    def add(self, person: Person) -> None:
+        """Insert or replace a person and re-index them."""
+        with self._lock:
+            self.remove(person.person_id)
+            keys = self._index_keys(person)
+            self._people[person.person_id] = person
+            self._keys[person.person_id] = keys
+            self._file(person.person_id, keys)
+            self._hours.add(keys["hours"], person.person_id)
+
+    update = add
+
+    def remove(self, person_id: str) -> Optional[Person]:
+        with self._lock:
+            person = self._people.pop(person_id, None)
+            if person is not None:
+                self._unfile(person_id, self._keys.pop(person_id))
+            return person
+
+    def bulk_load(self, people: Iterable[Person]) -> int:
+        """Add many people at once; the range indexes are sorted once at the end."""
+        with self._lock:
+            count = 0
+            for person in people:
+                if person.person_id in self._people:
+                    self._unfile(person.person_id, self._keys[person.person_id])
+                keys = self._index_keys(person)
+                self._people[person.person_id] = person
+                self._keys[person.person_id] = keys
+                self._file(person.person_id, keys)
+                count += 1
+            self._hours.rebuild((k["hours"], pid) for pid, k in self._keys.items())
+            return count
+
+    # ───── Queries ──────────────────────────────────────────────────────
+
+    def find_ids(self, skills: Iterable[str] = (), min_level: Optional[str] = None,
+                 user_type: Optional[str] = None, experience_level: Optional[str] = None,
+                 min_hours: Optional[int] = None, max_hours: Optional[int] = None,
+                 utc_offset: Optional[Tuple[float, float]] = None, at: Optional[datetime] = None) -> Set[str]:
+        """Ids of people matching every given filter (all listed skills, each at min_level or better).
+
+        utc_offset is an inclusive (low, high) range of hours, matched against each zone's offset at `at`
+        (default now).
+        """
+        if min_level is not None and min_level not in LEVELS:
+            raise ValueError(f"Unknown level: {min_level}")
+        with self._lock:
+            candidates: List[Set[str]] = []
+            for skill in skills:
+                key = normalize_skill(skill)
+                index = self._skills.get(key) if min_level is None else self._skill_levels.get((key, min_level))
+                candidates.append(index or set())
+            if user_type is not None:
+                candidates.append(self._user_types.get(user_type, set()))
+            if experience_level is not None:
+                candidates.append(self._experience.get(experience_level, set()))
+            ranges = []
+            if min_hours is not None or max_hours is not None:
+                ranges.append((self._hours, min_hours, max_hours))
+            if utc_offset is not None:
+                candidates.append(self._in_offsets(*utc_offset, at=at))
+
+            if candidates:
+                candidates.sort(key=len)
+                ids = set(candidates[0]).intersection(*candidates[1:])
+            elif ranges:
+                index, low, high = ranges.pop(0)
+                ids = index.between(low, high)
+            else:
+                return set(self._people)
+            for index, low, high in ranges:
+                ids = index.filter(ids, low, high)
+            return ids
+
+    def _in_offsets(self, low: Optional[float], high: Optional[float], at: Optional[datetime] = None) -> Set[str]:
+        """People whose zone is at a UTC offset in [low, high] at `at` (default now)."""
+        low = float("-inf") if low is None else low
+        high = float("inf") if high is None else high
+        at = at or datetime.now(timezone.utc)
+        ids: Set[str] = set()
+        for zone, members in self._zones.items():
+            if members and low <= utc_offset_hours(zone, at) <= high:
+                ids |= members
+        return ids
+
+    def find(self, **filters) -> List[Person]:
+        """People matching find_ids() filters, most available first."""
+        ids = self.find_ids(**filters)
+        return sorted((self._people[pid] for pid in ids), key=lambda p: (-p.weekly_hours_available, p.name))
+
+    def skill_counts(self) -> Dict[str, int]:
+        return {skill: len(ids) for skill, ids in self._skills.items() if ids}
+
+    # ───── Projections ──────────────────────────────────────────────────
+
+    def summary(self, person_id: str) -> PersonSummary:
+        """PersonSummary from already-validated fields, without re-validating."""
+        p = self._people[person_id]
+        return PersonSummary.model_construct(person_id=p.person_id, name=p.name, user_type=p.user_type,
+                                             experience_level=p.experience_level)
+
+    def member_profile(self, person_id: str) -> ProjectMemberProfile:
+        p = self._people[person_id]
+        return ProjectMemberProfile.model_construct(
+            person_id=p.person_id, name=p.name, technical_skills=p.technical_skills,
+            experience_level=p.experience_level, weekly_hours_available=p.weekly_hours_available,
+            work_style=p.work_style, timezone=p.timezone)
+
+    def summaries(self, ids: Iterable[str]) -> List[PersonSummary]:
+        return [self.summary(pid) for pid in ids]
+
+    def member_profiles(self, ids: Iterable[str]) -> List[ProjectMemberProfile]:
+        return [self.member_profile(pid) for pid in ids]
+
+    # ───── Persistence ──────────────────────────────────────────────────
+
+    def save(self, path: str = REGISTRY_PATH) -> None:
+        """Write every person as a codec record, atomically replacing the file."""
+        with self._lock:
+            blob = ormsgpack.packb([encode(p, PERSON_SCHEMA) for p in self._people.values()])
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = REGISTRY_PATH, validate: bool = False) -> "PersonRegistry":
+        """Registry from save() output; an empty one if the file does not exist yet."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as f:
+            try:
+                records = ormsgpack.unpackb(f.read())
+            except ormsgpack.MsgpackDecodeError as e:
+                raise CodecError(f"Corrupt person registry {path}: {e}") from e
+        return cls(decode(record, validate=validate) for record in records)
@@ -0,0 +1,171 @@
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+from collections import Counter, defaultdict
+from functools import lru_cache
+import heapq
+import json
+import math
+import os
+import re
+
+# Local learning-resource catalog.
+# Resources (tutorials, docs, courses, books) are tagged by skill, level and
+# project type and indexed once into an inverted index whose postings already
+# hold each term's BM25 weight for the document. A query is a handful of dict
+# lookups and additions plus a heap select, so top-k takes microseconds and
+# every user asking the same question gets the same answer.
+
+CATALOG_PATH = os.getenv("RESOURCE_CATALOG_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "resource_catalog.json"))
+K1, B = 1.2, 0.75
+FIELD_WEIGHTS = {"skills": 3.0, "project_types": 2.0, "title": 1.5, "description": 1.0}
+LEVELS = {"simple": 0, "beginner": 0, "medium": 1, "intermediate": 1, "complex": 2, "advanced": 2}
+LEVEL_BOOST = (1.25, 1.0, 0.7)   # by distance between resource level and project complexity
+# Free-text project types from the classifier mapped onto catalog vocabulary
+TYPE_ALIASES = {
+    "application": "app", "website": "web", "frontend": "web", "fullstack": "web",
+    "ml": "machine learning", "ai": "machine learning",
+    "android": "mobile", "ios": "mobile", "backend": "api backend", "server": "api backend",
+    "iot": "hardware iot", "embedded": "hardware iot", "robotics": "hardware iot",
+    "analytics": "data analysis", "visualization": "data analysis", "cybersecurity": "security",
+    "language": "nlp", "chatbot": "nlp", "paper": "research", "thesis": "research",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class ResourceCatalog:
+    """BM25-ranked inverted index over a JSON resource catalog."""
+
+    def __init__(self, resources: List[Dict[str, Any]], project_skills: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        self.resources = resources
+        self.project_skills = project_skills or {}
+        self.project_types = sorted({t for r in resources for t in r.get("project_types", [])} | set(self.project_skills))
+        self.skill_vocabulary = sorted({s.lower() for r in resources for s in r.get("skills", [])}, key=len, reverse=True)
+        self._skill_patterns = [(s, re.compile(rf"(?<![a-z0-9]){re.escape(s)}(?![a-z0-9])")) for s in self.skill_vocabulary]
+        self.stats: Counter = Counter()
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        self._build()
+
+    @classmethod
+    def load(cls, path: str = CATALOG_PATH) -> "ResourceCatalog":
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+        return cls(data.get("resources", []), data.get("project_skills", {}))
+
+    def save(self, path: str = CATALOG_PATH) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump({"version": 1, "project_skills": self.project_skills, "resources": self.resources}, handle, indent=2)
+        os.replace(tmp, path)
+
+    def add(self, resource: Dict[str, Any]) -> None:
+        """Add or replace a resource (matched by id) and rebuild the index."""
+        stats = self.stats
+        self.__init__([r for r in self.resources if r.get("id") != resource.get("id")] + [resource], self.project_skills)
+        self.stats = stats
+
+    # ───── Index ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _document_terms(resource: Dict[str, Any]) -> Counter:
+        """Field-weighted term frequencies; tags are indexed whole and as words."""
+        terms: Counter = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            value = resource.get(field) or []
+            for item in value if isinstance(value, list) else [value]:
+                if field in ("skills", "project_types"):
+                    terms[f"{field}:{item.lower()}"] += weight
+                for token in tokenize(item):
+                    terms[token] += weight
+        return terms
+
+    def _build(self) -> None:
+        documents = [self._document_terms(r) for r in self.resources]
+        count = len(documents)
+        lengths = [sum(doc.values()) for doc in documents]
+        average = sum(lengths) / count if count else 1.0
+        frequency: Counter = Counter(term for doc in documents for term in doc)
+        postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for i, doc in enumerate(documents):
+            norm = K1 * (1 - B + B * lengths[i] / average)
+            for term, tf in doc.items():
+                idf = math.log(1 + (count - frequency[term] + 0.5) / (frequency[term] + 0.5))
+                postings[term].append((i, idf * tf * (K1 + 1) / (tf + norm)))
+        self._postings = dict(postings)
+
+    # ───── Queries ──────────────────────────────────────────────────────
+
+    def normalize_project_type(self, project_type: Optional[str]) -> Optional[str]:
+        """Closest catalog project type for a free-text label, by token overlap."""
+        words = set()
+        for token in tokenize(project_type or ""):
+            words.update(tokenize(TYPE_ALIASES.get(token, token)))
+        best, best_score = None, 0.0
+        for candidate in self.project_types:
+            parts = set(tokenize(candidate))
+            score = len(parts & words) / len(parts)
+            if score > best_score:
+                best, best_score = candidate, score
+        return best if best_score >= 0.5 else None
+
+    def extract_skills(self, text: Any) -> List[str]:
+        """Known skill tags mentioned in free text (or a list of skills)."""
+        text = ", ".join(text) if isinstance(text, (list, tuple)) else str(text or "")
+        text = text.lower()
+        found = []
+        for skill, pattern in self._skill_patterns:   # longest first, so 'react native' wins over 'react'
+            if pattern.search(text):
+                found.append(skill)
+                text = pattern.sub(" ", text)
+        return found
+
+    def skill_gaps(self, project_type: Optional[str], complexity: Optional[str], technical_skills: Iterable[str]) -> List[str]:
+        """Skills the project type needs at this complexity that the user does not list."""
+        kind = self.normalize_project_type(project_type)
+        needed = self.project_skills.get(kind, {}).get((complexity or "medium").lower(), [])
+        known = {s.lower().strip() for s in technical_skills or []}
+        return [s for s in needed if s not in known]
+
+    def search(self, terms: Dict[str, float], level: Optional[str] = None, k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k resources for weighted query terms, boosted toward the project's level."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in terms.items():
+            for doc, score in self._postings.get(term, ()):
+                scores[doc] += weight * score
+        target = LEVELS.get((level or "").lower())
+        if target is not None:
+            for doc in scores:
+                scores[doc] *= LEVEL_BOOST[abs(LEVELS.get(self.resources[doc].get("level"), 1) - target)]
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [{**self.resources[doc], "score": round(score, 3)} for doc, score in top]
+
+    def recommend(self, project_type: Optional[str], complexity: Optional[str], skill_gaps: Any,
+                  k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k resources for (project_type, complexity, skill_gaps)."""
+        terms: Dict[str, float] = defaultdict(float)
+        kind = self.normalize_project_type(project_type)
+        if kind:
+            terms[f"project_types:{kind}"] += 1.0
+        for token in tokenize(project_type or ""):
+            terms[token] += 0.5
+        for skill in self.extract_skills(skill_gaps):
+            terms[f"skills:{skill}"] += 2.0
+            for token in tokenize(skill):
+                terms[token] += 0.5
+        results = self.search(terms, complexity, k)
+        self.stats["queries"] += 1
+        return results
+
+    @staticmethod
+    def format(resource: Dict[str, Any]) -> str:
+        """One-line form used in StateModel.recommended_resources."""
+        return f"{resource['title']} ({resource.get('kind', 'resource')}, {resource.get('level', 'any level')}) - {resource['url']}"
+
+
+@lru_cache(maxsize=4)
+def load_catalog(path: str = CATALOG_PATH) -> ResourceCatalog:
+    """Process-wide catalog, built once per path."""
+    return ResourceCatalog.load(path)
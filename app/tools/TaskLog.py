@@ -0,0 +1,274 @@
+from typing import List, Dict, Optional, Any, Iterable
+from datetime import datetime, timezone
+import os
+import threading
+import numpy as np
+
+# Append-only, column-oriented work log for one person.
+# Each event is a fixed-size record (timestamp, milestone code, hours,
+# status) kept in a growable NumPy structured array and, when the log has a
+# path, appended to a flat binary file that np.fromfile reads back in one
+# call. Milestone ids are interned to int codes in a sidecar text file, also
+# append-only. Totals, per-status counts, finished milestones and per-week
+# hours/completions are updated as each event arrives, so progress summaries
+# never walk the history.
+
+LOG_DIR = os.getenv("TASK_LOG_DIR", os.path.join(os.path.expanduser("~"), ".cache", "projectforge", "task_logs"))
+RECORD = np.dtype([("timestamp", "<f8"), ("milestone", "<i4"), ("hours", "<f4"), ("status", "u1")])
+STATUSES = ("completed", "in_progress", "blocked", "skipped")
+NO_MILESTONE = -1
+WEEK_SECONDS = 7 * 24 * 3600
+_EPOCH_MONDAY = datetime(1970, 1, 5, tzinfo=timezone.utc).timestamp()   # weeks start on Monday, UTC
+
+
+def week_of(timestamp: float) -> int:
+    return int((timestamp - _EPOCH_MONDAY) // WEEK_SECONDS)
+
+
+def week_start(week: int) -> datetime:
+    return datetime.fromtimestamp(_EPOCH_MONDAY + week * WEEK_SECONDS, tz=timezone.utc)
+
+
+def validate_log_id(log_id: str) -> str:
+    """Log ids name files in the log directory, so they must be a single plain file name."""
+    if not log_id or log_id in (".", "..") or any(c in log_id for c in ("/", "\\", "\0")):
+        raise ValueError(f"Invalid task log id: {log_id!r}")
+    return log_id
+
+
+def _timestamp(value: Any) -> float:
+    if value is None:
+        return datetime.now(timezone.utc).timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TaskLog:
+    """Typed columns of one person's work events plus running aggregates."""
+
+    def __init__(self, person_id: str, directory: Optional[str] = None):
+        self.person_id = validate_log_id(person_id)
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._records = np.empty(16, dtype=RECORD)
+        self._size = 0
+        self.milestone_ids: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._reset_aggregates()
+        if directory is not None:
+            self._read()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.directory, f"{self.person_id}.log")
+
+    @property
+    def _milestone_path(self) -> str:
+        return os.path.join(self.directory, f"{self.person_id}.milestones")
+
+    # ───── Aggregates ───────────────────────────────────────────────────
+
+    def _reset_aggregates(self) -> None:
+        self.total_hours = 0.0
+        self.status_counts = {status: 0 for status in STATUSES}
+        self.completed_milestones: set = set()
+        self.weekly_hours: Dict[int, float] = {}
+        self.weekly_completions: Dict[int, int] = {}
+        self.first_timestamp: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+
+    def _account(self, timestamp: float, milestone: int, hours: float, status: int) -> None:
+        """Fold one event into the running aggregates."""
+        week = week_of(timestamp)
+        self.total_hours += hours
+        self.status_counts[STATUSES[status]] += 1
+        self.weekly_hours[week] = self.weekly_hours.get(week, 0.0) + hours
+        if status == 0:
+            self.weekly_completions[week] = self.weekly_completions.get(week, 0) + 1
+            if milestone != NO_MILESTONE:
+                self.completed_milestones.add(milestone)
+        if self.first_timestamp is None or timestamp < self.first_timestamp:
+            self.first_timestamp = timestamp
+        if self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp = timestamp
+
+    def _account_bulk(self, records: np.ndarray) -> None:
+        """Aggregates for many records at once (loading from disk)."""
+        if not records.size:
+            return
+        weeks = ((records["timestamp"] - _EPOCH_MONDAY) // WEEK_SECONDS).astype(np.int64)
+        hours = records["hours"].astype(np.float64)
+        done = records["status"] == 0
+        self.total_hours += float(hours.sum())
+        for code, count in zip(*np.unique(records["status"], return_counts=True)):
+            self.status_counts[STATUSES[code]] += int(count)
+        for week, total in zip(*self._group_sum(weeks, hours)):
+            self.weekly_hours[int(week)] = self.weekly_hours.get(int(week), 0.0) + float(total)
+        for week, count in zip(*np.unique(weeks[done], return_counts=True)):
+            self.weekly_completions[int(week)] = self.weekly_completions.get(int(week), 0) + int(count)
+        milestones = records["milestone"][done]
+        self.completed_milestones.update(int(m) for m in np.unique(milestones[milestones != NO_MILESTONE]))
+        lo, hi = float(records["timestamp"].min()), float(records["timestamp"].max())
+        self.first_timestamp = lo if self.first_timestamp is None else min(self.first_timestamp, lo)
+        self.last_timestamp = hi if self.last_timestamp is None else max(self.last_timestamp, hi)
+
+    @staticmethod
+    def _group_sum(keys: np.ndarray, values: np.ndarray):
+        unique, inverse = np.unique(keys, return_inverse=True)
+        return unique, np.bincount(inverse, weights=values)
+
+    @property
+    def milestones_done(self) -> int:
+        return len(self.completed_milestones)
+
+    def hours_per_week(self, weeks: Optional[int] = None, now: Any = None) -> List[Dict[str, Any]]:
+        """Hours logged per calendar week, oldest first; the trailing `weeks` only if given."""
+        if weeks is None:
+            span = sorted(self.weekly_hours)
+        else:
+            current = week_of(_timestamp(now))
+            span = range(current - weeks + 1, current + 1)
+        return [{"week_start": week_start(w).date().isoformat(), "hours": round(self.weekly_hours.get(w, 0.0), 2)}
+                for w in span]
+
+    def velocity(self, weeks: int = 4, now: Any = None) -> float:
+        """Completed tasks per week over the trailing `weeks` calendar weeks."""
+        current = week_of(_timestamp(now))
+        return sum(self.weekly_completions.get(w, 0) for w in range(current - weeks + 1, current + 1)) / weeks
+
+    def active_weeks(self) -> float:
+        """Weeks between the first and last event, at least one."""
+        if self.first_timestamp is None:
+            return 0.0
+        return max((self.last_timestamp - self.first_timestamp) / WEEK_SECONDS, 1.0)
+
+    def summary(self, now: Any = None) -> Dict[str, Any]:
+        return {
+            "events": self._size,
+            "total_hours": round(self.total_hours, 2),
+            "milestones_done": self.milestones_done,
+            "status_counts": dict(self.status_counts),
+            "average_weekly_hours": round(self.total_hours / self.active_weeks(), 2) if self._size else 0.0,
+            "velocity": self.velocity(now=now),
+            "first_event": datetime.fromtimestamp(self.first_timestamp, tz=timezone.utc).isoformat() if self._size else None,
+            "last_event": datetime.fromtimestamp(self.last_timestamp, tz=timezone.utc).isoformat() if self._size else None,
+        }
+
+    # ───── Appending ────────────────────────────────────────────────────
+
+    def _milestone_code(self, milestone_id: Optional[str]) -> int:
+        if not milestone_id:
+            return NO_MILESTONE
+        code = self._codes.get(milestone_id)
+        if code is None:
+            if "\n" in milestone_id:
+                raise ValueError("Milestone ids cannot contain newlines")
+            code = self._codes[milestone_id] = len(self.milestone_ids)
+            self.milestone_ids.append(milestone_id)
+            if self.directory is not None:
+                with open(self._milestone_path, "a", encoding="utf-8") as f:
+                    f.write(milestone_id + "\n")
+        return code
+
+    def append(self, hours: float, milestone_id: Optional[str] = None, status: str = "completed",
+               timestamp: Any = None) -> None:
+        """Record one event; amortized O(1), aggregates included."""
+        if status not in STATUSES:
+            raise ValueError(f"Unknown task status: {status}")
+        if hours < 0:
+            raise ValueError("Hours cannot be negative")
+        with self._lock:
+            if self._size == len(self._records):
+                self._records = np.resize(self._records, 2 * len(self._records))
+            record = self._records[self._size:self._size + 1]
+            record["timestamp"] = _timestamp(timestamp)
+            record["milestone"] = self._milestone_code(milestone_id)
+            record["hours"] = hours
+            record["status"] = STATUSES.index(status)
+            if self.directory is not None:
+                # Opened per append: the store keeps every log it has served, so a held handle per log would
+                # pin one descriptor per person
+                with open(self._log_path, "ab") as f:
+                    f.write(record.tobytes())
+            self._size += 1
+            self._account(float(record["timestamp"][0]), int(record["milestone"][0]), float(record["hours"][0]),
+                          int(record["status"][0]))
+
+    def extend(self, tasks: Iterable[Dict[str, Any]]) -> int:
+        """Import legacy Person.completed_tasks dicts ({hours, milestone/task, status, completed_at})."""
+        count = 0
+        for task in tasks:
+            self.append(float(task.get("hours", 0) or 0), task.get("milestone_id") or task.get("milestone"),
+                        task.get("status") if task.get("status") in STATUSES else "completed",
+                        task.get("completed_at") or task.get("timestamp"))
+            count += 1
+        return count
+
+    # ───── Reading ──────────────────────────────────────────────────────
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Read-only views of the typed columns."""
+        view = self._records[:self._size]
+        columns = {name: view[name] for name in RECORD.names}
+        for column in columns.values():
+            column.flags.writeable = False
+        return columns
+
+    def events(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most recent events as dicts (newest last), for display."""
+        view = self._records[max(self._size - limit, 0) if limit else 0:self._size]
+        return [{"timestamp": datetime.fromtimestamp(float(r["timestamp"]), tz=timezone.utc).isoformat(),
+                 "milestone_id": self.milestone_ids[r["milestone"]] if r["milestone"] != NO_MILESTONE else None,
+                 "hours": round(float(r["hours"]), 2), "status": STATUSES[r["status"]]} for r in view]
+
+    def _read(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self._milestone_path):
+            with open(self._milestone_path, encoding="utf-8") as f:
+                self.milestone_ids = f.read().splitlines()
+            self._codes = {m: i for i, m in enumerate(self.milestone_ids)}
+        if os.path.exists(self._log_path):
+            count = os.path.getsize(self._log_path) // RECORD.itemsize
+            with open(self._log_path, "r+b") as f:
+                f.truncate(count * RECORD.itemsize)   # drop a torn trailing write so later appends stay aligned
+            records = np.fromfile(self._log_path, dtype=RECORD, count=count)
+            self._records = np.empty(max(16, 2 * len(records)), dtype=RECORD)
+            self._records[:len(records)] = records
+            self._size = len(records)
+            self._account_bulk(records)
+
+
+class TaskLogStore:
+    """One TaskLog per person, opened from LOG_DIR on first use and kept in memory."""
+
+    def __init__(self, directory: Optional[str] = LOG_DIR):
+        self.directory = directory
+        self._logs: Dict[str, TaskLog] = {}
+        self._lock = threading.Lock()
+
+    def get(self, log_id: str) -> TaskLog:
+        with self._lock:
+            log = self._logs.get(log_id)
+            if log is None:
+                log = self._logs[log_id] = TaskLog(log_id, self.directory)
+            return log
+
+
+_default_store: Optional[TaskLogStore] = None
+
+
+def get_task_log_store() -> TaskLogStore:
+    """Process-wide store at TASK_LOG_DIR."""
+    global _default_store
+    if _default_store is None:
+        _default_store = TaskLogStore(LOG_DIR)
+    return _default_store
@@ -0,0 +1,243 @@
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Union
+from datetime import datetime, timedelta, timezone
+import re
+import numpy as np
+from app.person import Person
+from app.tools.IntervalIndex import from_epoch, record_interval
+from app.tools.TimelineSolver import get_zone, parse_clock, parse_days
+
+# Team common-availability finder.
+# Every member becomes a row of a (members × slots) bool matrix in UTC, one
+# column per 15-minute slot of the project window. Common and k-of-n blocks
+# fall out of a column sum and a run-length pass, so a 50-person team over a
+# 16-week semester is a ~50 × 10752 array and a handful of NumPy calls.
+
+DEFAULT_WORKING_HOURS = ["daily 09:00-21:00"]  # used when a member hasn't said anything
+PERIODS = {
+    "morning": (8 * 60, 12 * 60), "mornings": (8 * 60, 12 * 60),
+    "afternoon": (12 * 60, 17 * 60), "afternoons": (12 * 60, 17 * 60),
+    "evening": (18 * 60, 22 * 60), "evenings": (18 * 60, 22 * 60),
+    "night": (20 * 60, 24 * 60), "nights": (20 * 60, 24 * 60),
+}
+
+_CLOCK = r"\d{1,2}(?::\d{2})?\s*(?:am|pm)?"
+_RANGE_RE = re.compile(rf"({_CLOCK})\s*(?:-|–|to)\s*({_CLOCK})", re.IGNORECASE)
+
+WorkingHours = Union[str, Dict[str, Any]]
+
+
+def parse_working_hours(entry: WorkingHours) -> List[Tuple[List[int], int, int]]:
+    """Parse 'Mon-Fri 18:00-21:00', 'weekends mornings' or a {days, start, end} dict into (days, start_min, end_min)."""
+    if isinstance(entry, dict):
+        days = parse_days(entry.get("days", entry.get("day", "daily")))
+        return [(days, parse_clock(entry["start"]), parse_clock(entry["end"]))]
+    text = entry.strip().lower()
+    windows: List[Tuple[int, int]] = []
+    for match in _RANGE_RE.finditer(text):
+        windows.append((parse_clock(match.group(1)), parse_clock(match.group(2))))
+    text = _RANGE_RE.sub(" ", text)
+    for word, window in PERIODS.items():
+        if re.search(rf"\b{word}\b", text):
+            windows.append(window)
+            text = re.sub(rf"\b{word}\b", " ", text)
+    if not windows:
+        raise ValueError(f"No time range in {entry!r}")
+    days: List[int] = []
+    for token in re.split(r"[\s,/&]+", text):
+        try:
+            days.extend(d for d in parse_days(token) if d not in days)
+        except ValueError:
+            continue  # filler words like "on" or "after"
+    days = days or parse_days("daily")
+    return [(days, start, end) for start, end in windows]
+
+
+class TeamAvailability:
+    """Bitmap availability for a team over a fixed project window."""
+
+    def __init__(self, start: datetime, weeks: int, slot_minutes: int = 15):
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        self.start = start.astimezone(timezone.utc)
+        self.weeks = weeks
+        self.slot_minutes = slot_minutes
+        self.slot_seconds = slot_minutes * 60
+        self.slots_per_day = 24 * 60 // slot_minutes
+        self.slot_count = weeks * 7 * self.slots_per_day
+        self.member_ids: List[str] = []
+        self.profiles: Dict[str, Dict[str, Any]] = {}   # inputs per member, so state_fields() round-trips
+        self.warnings: List[str] = []
+        self._rows: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._day_run_cache: Dict[str, List[Tuple[int, np.ndarray, int]]] = {}
+
+    @classmethod
+    def from_people(cls, people: Iterable[Person], start: datetime, weeks: int,
+                    calendars: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> "TeamAvailability":
+        """Build from Person models plus optional per-person busy calendars."""
+        team = cls(start, weeks)
+        calendars = calendars or {}
+        for person in people:
+            team.add_member(person.person_id, person.timezone, person.preferred_working_hours,
+                            calendars.get(person.person_id, []))
+        return team
+
+    @classmethod
+    def from_state_field(cls, team_availability: Dict[str, Any], start: datetime, weeks: int) -> "TeamAvailability":
+        """Build from StateModel.team_availability: {"members": {person_id: {timezone, working_hours, busy}}}
+        (as written by state_fields()), or that members mapping on its own."""
+        team = cls(start, weeks)
+        for person_id, info in team_availability.get("members", team_availability).items():
+            if isinstance(info, dict):
+                team.add_member(person_id, info.get("timezone"), info.get("working_hours", []), info.get("busy", []))
+        return team
+
+    # ───── Building the bitmap ──────────────────────────────────────────
+
+    def add_member(self, person_id: str, tz_name: Optional[str], working_hours: List[WorkingHours],
+                   busy: Iterable[Dict[str, Any]] = ()) -> None:
+        """Add one member's working hours (in their timezone) minus their busy calendar."""
+        busy = list(busy)
+        zone = get_zone(tz_name)
+        template = np.zeros((7, self.slots_per_day * 2), dtype=bool)  # second day absorbs past-midnight spill
+        for entry in working_hours or DEFAULT_WORKING_HOURS:
+            try:
+                for days, begin, finish in parse_working_hours(entry):
+                    if finish <= begin:
+                        finish += 24 * 60
+                    lo, hi = begin // self.slot_minutes, -(-finish // self.slot_minutes)
+                    template[days, lo:hi] = True
+            except (KeyError, ValueError) as e:
+                self.warnings.append(f"{person_id}: ignored working hours {entry!r} ({e})")
+
+        row = np.zeros(self.slot_count + 4 * self.slots_per_day, dtype=bool)  # a day of padding either side, plus spill
+        origin = self.start.timestamp()
+        spd = self.slots_per_day
+        # Lay local days down in runs that share a UTC offset, so DST changes land on the right day
+        for first, weekdays, position in self._day_runs(zone):
+            width = weekdays.size * spd
+            lo = position + 2 * spd
+            row[lo:lo + width] |= template[weekdays, :spd].reshape(-1)
+            row[lo + spd:lo + spd + width] |= template[weekdays, spd:].reshape(-1)
+        row = row[2 * spd:2 * spd + self.slot_count]
+
+        intervals = [interval for interval in (record_interval(record, zone) for record in busy) if interval]
+        if intervals:
+            bounds = np.array(intervals, dtype=np.float64)
+            starts = np.clip(np.floor((bounds[:, 0] - origin) / self.slot_seconds), 0, self.slot_count).astype(np.int64)
+            ends = np.clip(np.ceil((bounds[:, 1] - origin) / self.slot_seconds), 0, self.slot_count).astype(np.int64)
+            delta = np.zeros(self.slot_count + 1, dtype=np.int32)
+            np.add.at(delta, starts, 1)
+            np.add.at(delta, ends, -1)
+            row &= np.cumsum(delta[:-1]) == 0
+
+        self.member_ids.append(person_id)
+        self.profiles[person_id] = {"timezone": tz_name, "working_hours": list(working_hours or []),
+                                    "busy": busy}
+        self._rows.append(row)
+        self._matrix = None
+
+    def _day_runs(self, zone) -> List[Tuple[int, np.ndarray, int]]:
+        """(first day offset, weekday indexes, slot position) for runs of local days with one UTC offset."""
+        key = str(zone)
+        if key not in self._day_run_cache:
+            origin = self.start.timestamp()
+            first_local = self.start.astimezone(zone).date() - timedelta(days=1)
+            days = [first_local + timedelta(days=offset) for offset in range(self.weeks * 7 + 2)]
+            positions = [
+                int((datetime.combine(day, datetime.min.time(), tzinfo=zone).timestamp() - origin) // self.slot_seconds)
+                for day in days
+            ]
+            weekdays = np.array([day.weekday() for day in days])
+            runs = []
+            begin = 0
+            for i in range(1, len(days) + 1):
+                # A run continues while each day starts exactly one day after the previous one
+                if i == len(days) or positions[i] - positions[i - 1] != self.slots_per_day:
+                    runs.append((begin, weekdays[begin:i], positions[begin]))
+                    begin = i
+            self._day_run_cache[key] = runs
+        return self._day_run_cache[key]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """(members × slots) availability bitmap."""
+        if self._matrix is None:
+            self._matrix = np.vstack(self._rows) if self._rows else np.zeros((0, self.slot_count), dtype=bool)
+        return self._matrix
+
+    # ───── Queries ──────────────────────────────────────────────────────
+
+    def available_counts(self) -> np.ndarray:
+        """Number of members free in each slot."""
+        return self.matrix.sum(axis=0, dtype=np.int32)
+
+    def common_blocks(self, min_minutes: int = 30, limit: int = 20) -> List[Dict[str, Any]]:
+        """Blocks where every member is free, longest first."""
+        return self.quorum_blocks(len(self.member_ids), min_minutes, limit)
+
+    def quorum_blocks(self, k: int, min_minutes: int = 30, limit: int = 20) -> List[Dict[str, Any]]:
+        """Blocks where at least k members are free, ranked by head-count then length."""
+        if not self.member_ids or k < 1:
+            return []
+        k = min(k, len(self.member_ids))
+        counts = self.available_counts()
+        starts, ends = self._runs(counts >= k)
+        keep = (ends - starts) * self.slot_minutes >= min_minutes
+        starts, ends = starts[keep], ends[keep]
+        if starts.size == 0:
+            return []
+
+        # Members free for the whole block: AND over each run via reduceat on the matrix columns
+        cols = np.empty(starts.size * 2, dtype=np.int64)
+        cols[0::2], cols[1::2] = starts, ends
+        all_free = np.logical_and.reduceat(self.matrix, np.minimum(cols, self.slot_count - 1), axis=1)[:, 0::2]
+        if ends[-1] == self.slot_count:
+            all_free[:, -1] = self.matrix[:, starts[-1]:].all(axis=1)
+        attendees = all_free.sum(axis=0)
+        lengths = ends - starts
+        order = np.lexsort((starts, -lengths, -attendees))[:limit]
+
+        blocks = []
+        origin = self.start.timestamp()
+        for i in order:
+            blocks.append({
+                "start": from_epoch(origin + int(starts[i]) * self.slot_seconds).isoformat(),
+                "end": from_epoch(origin + int(ends[i]) * self.slot_seconds).isoformat(),
+                "hours": round(int(lengths[i]) * self.slot_minutes / 60, 2),
+                "available": int(attendees[i]),
+                "members": [self.member_ids[m] for m in np.flatnonzero(all_free[:, i])],
+            })
+        return blocks
+
+    def weekly_overlap_hours(self, k: Optional[int] = None) -> List[float]:
+        """Hours per project week with at least k members (default: everyone) free."""
+        k = len(self.member_ids) if k is None else k
+        free = (self.available_counts() >= max(k, 1)).reshape(self.weeks, -1)
+        return (free.sum(axis=1) * self.slot_minutes / 60).round(2).tolist()
+
+    def state_fields(self, quorum: Optional[int] = None, limit: int = 20) -> Dict[str, Any]:
+        """team_availability / optimal_work_blocks values for the StateModel."""
+        members = len(self.member_ids)
+        quorum = quorum or max(1, -(-members * 2 // 3))  # default: two thirds of the team
+        common = self.common_blocks(limit=limit)
+        return {
+            "team_availability": {
+                "slot_minutes": self.slot_minutes,
+                "start_date": self.start.isoformat(),
+                "weeks": self.weeks,
+                "member_ids": self.member_ids,
+                "members": self.profiles,
+                "common_hours_by_week": self.weekly_overlap_hours(),
+                "quorum": quorum,
+                "quorum_blocks": self.quorum_blocks(quorum, limit=limit),
+                "warnings": self.warnings,
+            },
+            "optimal_work_blocks": [{"start": b["start"], "end": b["end"]} for b in common],
+        }
+
+    @staticmethod
+    def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Start/end (exclusive) indexes of each run of True values."""
+        edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+        return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
@@ -0,0 +1,271 @@
+from typing import List, Dict, Optional, Any, Iterable, Tuple
+import re
+import numpy as np
+from app.person import Person, TeamMember
+from app.state import StateModel
+from app.tools.PersonRegistry import normalize_skill
+from app.tools.ResourceCatalog import ResourceCatalog, load_catalog
+
+# Cohort team formation.
+# People become rows of a (people × skills) level matrix (beginner 1/3,
+# intermediate 2/3, advanced 1) and projects become weighted requirement
+# vectors over the same skill columns: skill_gaps at full weight, skills
+# taught by the recommended_resources at half. A member covers a required
+# skill in proportion to their level against the project's complexity, and a
+# team covers it with its best member, so team coverage is a column max and
+# a weighted sum.
+#
+# Teams are built greedily (neediest project picks the person with the
+# largest marginal gain, round-robin), then improved by member swaps between
+# project pairs. Swap gains for every member pair of two teams are evaluated
+# at once from each team's best and second-best member per skill.
+
+LEVEL_VALUES = {"beginner": 1 / 3, "intermediate": 2 / 3, "advanced": 1.0}
+COMPLEXITY_LEVELS = {"simple": 1 / 3, "medium": 2 / 3, "complex": 1.0}
+GAP_WEIGHT, RESOURCE_WEIGHT = 1.0, 0.5
+HOURS_WEIGHT = 0.25          # share of a project's score that comes from meeting its weekly hours
+DEFAULT_HOURS_PER_MEMBER = 10
+_URL_RE = re.compile(r"https?://\S+")
+
+
+def project_requirements(state: StateModel, project_id: Optional[str] = None,
+                         catalog: Optional[ResourceCatalog] = None) -> Dict[str, Any]:
+    """Requirement record for one project: weighted skills, required level, team size and weekly hours."""
+    catalog = catalog or load_catalog()
+    skills: Dict[str, float] = {}
+    gaps = catalog.extract_skills(state.skill_gaps or "")
+    if not gaps:   # nobody has listed gaps yet; the project type's full skill set stands in
+        gaps = catalog.skill_gaps(state.project_type, state.complexity_level, [])
+    for skill in gaps:
+        skills[skill] = GAP_WEIGHT
+    by_url = {r["url"]: r for r in catalog.resources}
+    for line in state.recommended_resources:
+        match = _URL_RE.search(line)
+        resource = by_url.get(match.group(0).rstrip(").,")) if match else None
+        for skill in (resource or {}).get("skills") or catalog.extract_skills(line):
+            skills.setdefault(skill, RESOURCE_WEIGHT)
+    team_size = max(state.team_size, 1)
+    per_member = state.time_commitment.hours_per_week if state.time_commitment and state.time_commitment.hours_per_week else DEFAULT_HOURS_PER_MEMBER
+    return {
+        "project_id": project_id or state.session_id,
+        "skills": skills,
+        "level": state.complexity_level or "medium",
+        "team_size": team_size,
+        "weekly_hours": per_member * team_size,
+    }
+
+
+class TeamFormation:
+    """Assigns a cohort of people to projects so each team covers its project's skills."""
+
+    def __init__(self, people: List[Person], projects: List[Dict[str, Any]],
+                 catalog: Optional[ResourceCatalog] = None, seed: int = 0):
+        if not projects:
+            raise ValueError("No projects to staff")
+        self.people = list(people)
+        self.projects = list(projects)
+        self.catalog = catalog or load_catalog()
+        self.rng = np.random.default_rng(seed)
+        self._encode()
+
+    # ───── Encoding ─────────────────────────────────────────────────────
+
+    def _person_skills(self, person: Person) -> Dict[str, float]:
+        """Catalog skill tag -> level value, keeping the best level when several entries map to one tag."""
+        levels = {normalize_skill(s): lv for s, lv in person.skill_levels.items()}
+        out: Dict[str, float] = {}
+        for skill in dict.fromkeys(list(person.technical_skills) + list(person.skill_levels)):
+            level = LEVEL_VALUES[levels.get(normalize_skill(skill), person.experience_level)]
+            for tag in self.catalog.extract_skills(skill) or [normalize_skill(skill)]:
+                out[tag] = max(out.get(tag, 0.0), level)
+        return out
+
+    def _encode(self) -> None:
+        person_skills = [self._person_skills(p) for p in self.people]
+        vocab = sorted({s for p in self.projects for s in p["skills"]})
+        self.skills = vocab
+        self._column = column = {s: i for i, s in enumerate(vocab)}
+        n, m, k = len(self.people), len(self.projects), len(vocab)
+
+        self.levels = np.zeros((n, k), dtype=np.float32)           # person × skill level
+        for i, skills in enumerate(person_skills):
+            for skill, value in skills.items():
+                if skill in column:
+                    self.levels[i, column[skill]] = value
+        self.hours = np.array([p.weekly_hours_available for p in self.people], dtype=np.float32)
+
+        self.requirements = np.zeros((m, k), dtype=np.float32)     # project × skill weight
+        for j, project in enumerate(self.projects):
+            for skill, weight in project["skills"].items():
+                self.requirements[j, column[skill]] = weight
+        self.required_level = np.array([COMPLEXITY_LEVELS.get(p.get("level") or "medium", 2 / 3) for p in self.projects],
+                                       dtype=np.float32)
+        self.weekly_hours = np.array([p.get("weekly_hours") or DEFAULT_HOURS_PER_MEMBER * p.get("team_size", 1)
+                                      for p in self.projects], dtype=np.float32)
+        self.total_weight = np.maximum(self.requirements.sum(axis=1), 1e-9)
+        # Per-project views: required columns, their weights, and every person's coverage of them
+        self._columns = [np.flatnonzero(row) for row in self.requirements]
+        self._weights = [self.requirements[j, cols] / self.total_weight[j] for j, cols in enumerate(self._columns)]
+        self._coverage = [np.minimum(self.levels[:, cols] / self.required_level[j], 1.0)
+                          for j, cols in enumerate(self._columns)]
+
+    def fit_matrix(self) -> np.ndarray:
+        """(people × projects) share of each project's weighted skills a person covers alone."""
+        cover = np.minimum(self.levels[:, None, :] / self.required_level[None, :, None], 1.0)
+        return np.einsum("ijk,jk->ij", cover, self.requirements) / self.total_weight
+
+    # ───── Scoring ──────────────────────────────────────────────────────
+
+    def _score(self, j: int, skill_cover: np.ndarray, hours: np.ndarray) -> np.ndarray:
+        """Project utility from per-skill coverage (last axis) and team hours; concave, so weak teams gain most."""
+        coverage = skill_cover @ self._weights[j] if self._weights[j].size else np.ones(np.shape(hours))
+        met = np.minimum(hours / self.weekly_hours[j], 1.0)
+        return (1 - HOURS_WEIGHT) * (1 - (1 - coverage) ** 2) + HOURS_WEIGHT * met
+
+    def team_score(self, j: int, members: List[int]) -> float:
+        cover = self._coverage[j][members].max(axis=0) if members else np.zeros(self._columns[j].size)
+        return float(self._score(j, cover, np.float32(self.hours[members].sum())))
+
+    # ───── Greedy assignment ────────────────────────────────────────────
+
+    def _capacities(self) -> np.ndarray:
+        sizes = np.array([max(int(p.get("team_size", 1)), 1) for p in self.projects])
+        n = len(self.people)
+        if sizes.sum() < n:   # everyone gets a team: spread the surplus evenly
+            extra = n - sizes.sum()
+            sizes += extra // len(sizes)
+            sizes[: extra % len(sizes)] += 1
+        return sizes
+
+    def greedy(self) -> List[List[int]]:
+        teams: List[List[int]] = [[] for _ in self.projects]
+        capacity = self._capacities()
+        free = np.ones(len(self.people), dtype=bool)
+        cover = [np.zeros(cols.size, dtype=np.float32) for cols in self._columns]
+        hours = np.zeros(len(self.projects), dtype=np.float32)
+        scores = np.array([self.team_score(j, []) for j in range(len(self.projects))])
+
+        while free.any():
+            open_projects = [j for j in range(len(self.projects)) if len(teams[j]) < capacity[j]]
+            if not open_projects:
+                break
+            # One pick per open project per round, neediest first
+            for j in sorted(open_projects, key=lambda j: scores[j]):
+                candidates = np.flatnonzero(free)
+                if candidates.size == 0:
+                    break
+                gains = self._score(j, np.maximum(self._coverage[j][candidates], cover[j]),
+                                    hours[j] + self.hours[candidates]) - scores[j]
+                best = candidates[int(np.argmax(gains))]
+                teams[j].append(int(best))
+                free[best] = False
+                cover[j] = np.maximum(cover[j], self._coverage[j][best])
+                hours[j] += self.hours[best]
+                scores[j] = self.team_score(j, teams[j])
+        return teams
+
+    # ───── Local search ─────────────────────────────────────────────────
+
+    def _without_each(self, j: int, members: List[int]) -> np.ndarray:
+        """(members × skills) team coverage with each member removed, via best and second-best per skill."""
+        cover = self._coverage[j][members]
+        if len(members) == 1:
+            return np.zeros_like(cover)
+        order = np.argsort(-cover, axis=0)
+        best = np.take_along_axis(cover, order[:1], axis=0)[0]
+        second = np.take_along_axis(cover, order[1:2], axis=0)[0]
+        top = order[0]
+        return np.where(np.arange(len(members))[:, None] == top[None, :], second[None, :], best[None, :])
+
+    def _swap_gains(self, a: int, b: int, teams: List[List[int]]) -> np.ndarray:
+        """Score change for every (member of a, member of b) swap."""
+        ta, tb = teams[a], teams[b]
+        ha, hb = self.hours[ta], self.hours[tb]
+        # a loses member x and gains member y: shape (|a|, |b|, skills)
+        a_cover = np.maximum(self._without_each(a, ta)[:, None, :], self._coverage[a][tb][None, :, :])
+        b_cover = np.maximum(self._without_each(b, tb)[None, :, :], self._coverage[b][ta][:, None, :])
+        a_hours = ha.sum() - ha[:, None] + hb[None, :]
+        b_hours = hb.sum() - hb[None, :] + ha[:, None]
+        return (self._score(a, a_cover, a_hours) + self._score(b, b_cover, b_hours)
+                - self.team_score(a, ta) - self.team_score(b, tb))
+
+    def improve(self, teams: List[List[int]], rounds: int = 3, pairs_per_round: Optional[int] = None) -> int:
+        """Apply improving swaps between random project pairs; returns how many were made."""
+        m = len(teams)
+        if m < 2:
+            return 0
+        pairs_per_round = pairs_per_round or 10 * m
+        swaps = 0
+        for _ in range(rounds):
+            made = 0
+            # Pair the weakest teams with random partners so the search spends effort where coverage is low
+            scores = np.array([self.team_score(j, teams[j]) for j in range(m)])
+            weak = np.argsort(scores)[: max(m // 2, 1)]
+            for _ in range(pairs_per_round):
+                a = int(self.rng.choice(weak))
+                b = int(self.rng.integers(m))
+                if a == b or not teams[a] or not teams[b]:
+                    continue
+                gains = self._swap_gains(a, b, teams)
+                x, y = np.unravel_index(int(np.argmax(gains)), gains.shape)
+                if gains[x, y] > 1e-6:
+                    teams[a][x], teams[b][y] = teams[b][y], teams[a][x]
+                    made += 1
+            swaps += made
+            if not made:
+                break
+        return swaps
+
+    # ───── Output ───────────────────────────────────────────────────────
+
+    def _members(self, j: int, members: List[int]) -> List[TeamMember]:
+        cols, weights = self._columns[j], self._weights[j]
+        cover = self._coverage[j][members]
+        # Credit each required skill to the member who covers it best
+        credit = np.zeros(len(members))
+        owners = np.argmax(cover, axis=0) if cols.size else np.array([], dtype=int)
+        for c, owner in enumerate(owners):
+            credit[owner] += weights[c] * cover[owner, c]
+        hours = self.hours[members]
+        skill_share = credit / credit.sum() if credit.sum() > 0 else np.full(len(members), 1 / len(members))
+        share = 0.5 * skill_share + 0.5 * hours / max(hours.sum(), 1e-9)
+
+        result = []
+        for r, i in enumerate(members):
+            owned = [self.skills[cols[c]] for c in range(cols.size) if owners[c] == r and cover[r, c] > 0]
+            owned.sort(key=lambda s: -self.requirements[j, self._column[s]])
+            role = f"{owned[0]} lead" if owned else "contributor"
+            result.append(TeamMember(
+                person_id=self.people[i].person_id, project_role=role[:50], responsibilities=owned[:10],
+                contribution_percentage=round(float(share[r]) * 100, 1),
+            ))
+        return result
+
+    def report(self, teams: List[List[int]]) -> List[Dict[str, Any]]:
+        report = []
+        for j, members in enumerate(teams):
+            cols = self._columns[j]
+            cover = self._coverage[j][members].max(axis=0) if members else np.zeros(cols.size)
+            report.append({
+                "project_id": self.projects[j]["project_id"],
+                "members": self._members(j, members) if members else [],
+                "skill_coverage": round(float(cover @ self._weights[j]) if cols.size else 1.0, 3),
+                "missing_skills": [self.skills[cols[c]] for c in range(cols.size) if cover[c] == 0],
+                "weekly_hours": float(self.hours[members].sum()),
+                "score": round(self.team_score(j, members), 3),
+            })
+        return report
+
+    def form(self, rounds: int = 3) -> List[Dict[str, Any]]:
+        """Greedy teams improved by swaps; one record per project with TeamMember assignments."""
+        teams = self.greedy()
+        self.swaps = self.improve(teams, rounds)
+        return self.report(teams)
+
+
+def form_teams(people: Iterable[Person], projects: Iterable[Any], catalog: Optional[ResourceCatalog] = None,
+               rounds: int = 3, seed: int = 0) -> List[Dict[str, Any]]:
+    """Teams for a cohort; projects may be StateModels or project_requirements() dicts."""
+    catalog = catalog or load_catalog()
+    records = [project_requirements(p, catalog=catalog) if isinstance(p, StateModel) else p for p in projects]
+    return TeamFormation(list(people), records, catalog, seed).form(rounds)
@@ -0,0 +1,222 @@
+"""
+Local time estimator for MilestoneGenerator's TimeEstimator step.
+
+Usage:
+    $ python -m app.tools.TimeEstimateModel train     # refit from logged samples
+    $ python -m app.tools.TimeEstimateModel info      # show the saved model
+"""
+from typing import List, Dict, Optional, Any, Iterable
+from datetime import datetime, timezone
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import numpy as np
+from pydantic import BaseModel, Field
+from app.tools.MilestoneGraph import parse_weekly_hours
+
+# Weighted ridge regression over hashed one-hot features, fitted on logged
+# TimeEstimator outputs and, with more weight, on actual completed work
+# (samples logged with source="actual"). Nothing marks a project finished
+# yet, so no actual samples are logged; a completion flow should call
+# log_sample(..., source="actual") with the hours from the person's TaskLog.
+# Targets are modelled in log space (hours and weeks are multiplicative).
+# Confidence comes from the statistical leverage of the query: inputs that
+# look like many training samples get a high score, unseen combinations a
+# low one, and low-confidence queries fall back to the LLM.
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.getenv("TIME_ESTIMATOR_DIR", os.path.join(os.path.expanduser("~"), ".cache", "projectforge", "time_estimator"))
+FEATURE_DIM = 512
+RIDGE_ALPHA = 1.0
+MIN_SAMPLES = 30            # below this the model never claims full confidence
+ACTUAL_WEIGHT = 3.0         # real completions count more than LLM guesses
+TARGETS = ("estimated_hours", "weekly_hours", "timeline_weeks")
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#.]+")
+
+
+class LocalEstimate(BaseModel):
+    """Estimate in the same shape as the TimeEstimator signature's outputs."""
+    estimated_hours: int = Field(..., description="Total estimated hours needed for project")
+    weekly_commitment: str = Field(..., description="Recommended hours per week (e.g., '8-10 hours')")
+    timeline_weeks: int = Field(..., description="Suggested project duration in weeks")
+    confidence: float = Field(..., ge=0.0, le=1.0, description="How well the training data covers this input")
+    source: str = Field(default="local", description="Where the estimate came from")
+
+
+def _bucket(name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=4).digest(), "little") % (FEATURE_DIM - 1) + 1
+
+
+def featurize(project_type: Optional[str], complexity_level: Optional[str],
+              technical_skills: Iterable[str], has_team: bool) -> np.ndarray:
+    """Hashed one-hot vector; slot 0 is the bias term."""
+    x = np.zeros(FEATURE_DIM)
+    x[0] = 1.0
+    x[_bucket(f"complexity={(complexity_level or 'medium').lower()}")] = 1.0
+    x[_bucket(f"team={bool(has_team)}")] = 1.0
+    kind = (project_type or "").lower().strip()
+    if kind:
+        x[_bucket(f"type={kind}")] = 1.0
+        for token in _TOKEN_RE.findall(kind):
+            x[_bucket(f"type_token={token}")] += 0.5
+    skills = [s.lower().strip() for s in technical_skills or [] if s and s.strip()]
+    for skill in skills:
+        x[_bucket(f"skill={skill}")] += 1.0 / np.sqrt(len(skills))
+    return x
+
+
+class TimeEstimateModel:
+    """Ridge regressor with leverage-based confidence, persisted as .npz + JSON log."""
+
+    def __init__(self, model_dir: Optional[str] = MODEL_DIR):
+        self.model_dir = model_dir
+        self.weights: Optional[np.ndarray] = None     # FEATURE_DIM × len(TARGETS)
+        self.inverse: Optional[np.ndarray] = None     # (XᵀWX + αI)⁻¹ for leverage
+        self.residual_sd: Optional[np.ndarray] = None
+        self.sample_weight = 0.0
+        self.trained_at: Optional[str] = None
+
+    # ───── Paths ────────────────────────────────────────────────────────
+
+    @property
+    def samples_path(self) -> Optional[str]:
+        return os.path.join(self.model_dir, "samples.jsonl") if self.model_dir else None
+
+    @property
+    def model_path(self) -> Optional[str]:
+        return os.path.join(self.model_dir, "model.npz") if self.model_dir else None
+
+    # ───── Logging samples ──────────────────────────────────────────────
+
+    def log_sample(self, project_type: Optional[str], complexity_level: Optional[str], technical_skills: List[str],
+                   has_team: bool, estimated_hours: Any, weekly_commitment: Any, timeline_weeks: Any,
+                   source: str = "llm") -> None:
+        """Append one labelled example (an LLM output, or actual completion data) to the sample log."""
+        if not self.samples_path:
+            return
+        weekly = parse_weekly_hours(weekly_commitment)
+        try:
+            record = {
+                "project_type": project_type, "complexity_level": complexity_level,
+                "technical_skills": list(technical_skills or []), "has_team": bool(has_team),
+                "estimated_hours": float(estimated_hours), "weekly_hours": float(weekly) if weekly else None,
+                "timeline_weeks": float(timeline_weeks), "source": source,
+                "logged_at": datetime.now(timezone.utc).isoformat(),
+            }
+        except (TypeError, ValueError) as e:
+            logger.error(f"Not logging unusable time estimate sample: {e}")
+            return
+        try:
+            os.makedirs(self.model_dir, exist_ok=True)
+            with open(self.samples_path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.error(f"Could not log time estimate sample: {e}")
+
+    # ───── Training ─────────────────────────────────────────────────────
+
+    def fit(self, samples: List[Dict[str, Any]]) -> "TimeEstimateModel":
+        """Weighted ridge fit in log space; weekly_hours falls back to hours / weeks when missing."""
+        rows, targets, weights = [], [], []
+        for sample in samples:
+            try:
+                hours, weeks = float(sample["estimated_hours"]), float(sample["timeline_weeks"])
+                weekly = float(sample.get("weekly_hours") or hours / max(weeks, 1.0))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if hours <= 0 or weeks <= 0 or weekly <= 0:
+                continue
+            rows.append(featurize(sample.get("project_type"), sample.get("complexity_level"),
+                                  sample.get("technical_skills") or [], sample.get("has_team", False)))
+            targets.append(np.log([hours, weekly, weeks]))
+            weights.append(ACTUAL_WEIGHT if sample.get("source") == "actual" else 1.0)
+        if not rows:
+            raise ValueError("No usable samples to fit the time estimator")
+
+        X, Y, w = np.vstack(rows), np.vstack(targets), np.asarray(weights)
+        gram = X.T @ (X * w[:, None]) + RIDGE_ALPHA * np.eye(FEATURE_DIM)
+        self.inverse = np.linalg.inv(gram)
+        self.weights = self.inverse @ (X.T @ (Y * w[:, None]))
+        residuals = Y - X @ self.weights
+        self.residual_sd = np.sqrt((w[:, None] * residuals ** 2).sum(axis=0) / w.sum())
+        self.sample_weight = float(w.sum())
+        self.trained_at = datetime.now(timezone.utc).isoformat()
+        return self
+
+    def train_from_log(self) -> "TimeEstimateModel":
+        """Refit from every sample in the log and save the artifacts."""
+        with open(self.samples_path, "r", encoding="utf-8") as handle:
+            samples = [json.loads(line) for line in handle if line.strip()]
+        return self.fit(samples).save()
+
+    # ───── Prediction ───────────────────────────────────────────────────
+
+    @property
+    def is_trained(self) -> bool:
+        return self.weights is not None
+
+    def predict(self, project_type: Optional[str], complexity_level: Optional[str],
+                technical_skills: List[str], has_team: bool) -> Optional[LocalEstimate]:
+        """Estimate hours, weekly commitment and weeks; None when no model is loaded."""
+        if not self.is_trained:
+            return None
+        x = featurize(project_type, complexity_level, technical_skills, has_team)
+        hours, weekly, weeks = np.exp(x @ self.weights)
+        leverage = float(x @ self.inverse @ x)
+        # Leverage ~ 1 / (similar training samples); scale down further until the model has seen enough data
+        confidence = (1.0 / (1.0 + 5.0 * leverage)) * min(1.0, self.sample_weight / MIN_SAMPLES)
+        # Wide residual spread in the training data also means less trust
+        confidence *= float(np.exp(-self.residual_sd.mean()))
+        low, high = max(1, int(np.floor(weekly * 0.85))), max(1, int(np.ceil(weekly * 1.15)))
+        return LocalEstimate(
+            estimated_hours=max(1, int(round(hours))),
+            weekly_commitment=f"{low}-{high} hours" if high > low else f"{low} hours",
+            timeline_weeks=max(1, int(round(weeks))),
+            confidence=round(min(max(confidence, 0.0), 1.0), 3),
+        )
+
+    # ───── Persistence ──────────────────────────────────────────────────
+
+    def save(self) -> "TimeEstimateModel":
+        if not self.model_path or not self.is_trained:
+            return self
+        os.makedirs(self.model_dir, exist_ok=True)
+        tmp = f"{self.model_path}.tmp.npz"
+        np.savez_compressed(tmp, weights=self.weights, inverse=self.inverse, residual_sd=self.residual_sd,
+                            meta=np.array(json.dumps({"sample_weight": self.sample_weight, "trained_at": self.trained_at,
+                                                      "feature_dim": FEATURE_DIM, "targets": TARGETS})))
+        os.replace(tmp, self.model_path)
+        return self
+
+    @classmethod
+    def load(cls, model_dir: Optional[str] = MODEL_DIR) -> "TimeEstimateModel":
+        """Load saved artifacts; returns an untrained model if there are none."""
+        model = cls(model_dir)
+        if not model.model_path or not os.path.exists(model.model_path):
+            return model
+        try:
+            with np.load(model.model_path) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("feature_dim") != FEATURE_DIM:
+                    raise ValueError("feature layout changed; retrain the model")
+                model.weights, model.inverse, model.residual_sd = data["weights"], data["inverse"], data["residual_sd"]
+            model.sample_weight, model.trained_at = meta["sample_weight"], meta["trained_at"]
+        except (OSError, KeyError, ValueError) as e:
+            logger.error(f"Ignoring time estimator artifacts at {model.model_path}: {e}")
+            model.weights = model.inverse = model.residual_sd = None
+        return model
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "info"
+    if command == "train":
+        trained = TimeEstimateModel(MODEL_DIR).train_from_log()
+        print(f"Trained on weight {trained.sample_weight:.0f}; residual sd (log) {trained.residual_sd.round(3).tolist()}")
+    else:
+        loaded = TimeEstimateModel.load(MODEL_DIR)
+        print(f"trained={loaded.is_trained} sample_weight={loaded.sample_weight} trained_at={loaded.trained_at}")
@@ -0,0 +1,441 @@
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Union
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import hashlib
+import json
+import math
+import re
+from pydantic import BaseModel, Field
+from app.state import StateModel, TimeCommitment
+from app.tools.IntervalIndex import IntervalIndex, from_epoch, record_interval
+from tools.metrics import cache_result
+
+# Deterministic timeline scheduler.
+# Milestone hours are packed, in order, into the user's work blocks after
+# calendar conflicts and busy periods have been carved out. All times are
+# handled internally as UTC epoch seconds.
+
+HOUR = 3600.0
+MIN_SESSION_HOURS = 0.25  # don't schedule fragments shorter than 15 minutes
+CONFLICT_INDEXES = 32     # calendar_conflicts indexes kept for reuse by the solver and the report
+
+DAY_INDEX = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tue": 1, "tues": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thurs": 3, "friday": 4, "fri": 4, "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+}
+DAY_GROUPS = {
+    "daily": [0, 1, 2, 3, 4, 5, 6], "everyday": [0, 1, 2, 3, 4, 5, 6],
+    "weekdays": [0, 1, 2, 3, 4], "weekday": [0, 1, 2, 3, 4],
+    "weekends": [5, 6], "weekend": [5, 6],
+}
+
+_CLOCK_RE = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*$", re.IGNORECASE)
+_DATE = r"\d{4}-\d{2}-\d{2}"
+_DATE_RANGE_RE = re.compile(rf"({_DATE})(?:\s*(?:to|until|through|\.\.|–|—)\s*({_DATE}))?", re.IGNORECASE)
+_WEEK_RANGE_RE = re.compile(r"weeks?\s*(\d+)(?:\s*(?:-|–|to|through)\s*(\d+))?", re.IGNORECASE)
+
+
+class ScheduledSession(BaseModel):
+    """A single work session assigned to a milestone."""
+    milestone_index: int = Field(..., description="Position of the milestone in the scheduled order")
+    milestone: str = Field(..., description="Milestone title")
+    week: int = Field(..., ge=1, description="1-based project week of the session")
+    start: datetime = Field(..., description="Session start (UTC)")
+    end: datetime = Field(..., description="Session end (UTC)")
+    hours: float = Field(..., ge=0.0, description="Hours of milestone work in this session")
+
+
+class SolverResult(BaseModel):
+    """Output data from the local timeline solver."""
+    timeline_weeks: int = Field(..., description="Number of weeks the schedule covers")
+    start_date: datetime = Field(..., description="Start of week 1 (UTC)")
+    weekly_schedule: Dict[str, Dict[str, Any]] = Field(default_factory=dict, description="{week1: {tasks: [], hours: 8.0}, ...}")
+    milestone_weeks: List[Dict[str, Any]] = Field(default_factory=list, description="First/last week and scheduled hours per milestone")
+    sessions: List[ScheduledSession] = Field(default_factory=list, description="Concrete work sessions in chronological order")
+    capacity_by_week: List[float] = Field(default_factory=list, description="Usable hours per week after conflicts and caps")
+    unscheduled_hours: float = Field(default=0.0, description="Milestone hours that did not fit in the timeline")
+    warnings: List[str] = Field(default_factory=list, description="Scheduling warnings and conflicts")
+
+
+# ───── Parsing helpers ──────────────────────────────────────────────────
+
+def get_zone(name: Optional[str]) -> tzinfo:
+    """Resolve an IANA timezone name, falling back to UTC."""
+    if not name:
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def parse_clock(value: Any) -> int:
+    """Parse '18:00', '6pm' or '6:30 pm' into minutes after midnight."""
+    if isinstance(value, (int, float)):
+        return int(value * 60)
+    match = _CLOCK_RE.match(str(value))
+    if not match:
+        raise ValueError(f"Unrecognized time of day: {value!r}")
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), (match.group(3) or "").lower()
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 24 or minute > 59:
+        raise ValueError(f"Unrecognized time of day: {value!r}")
+    return hour * 60 + minute
+
+
+def parse_days(value: Any) -> List[int]:
+    """Parse a day name, day group ('weekdays'), weekday index or list of those into weekday indexes."""
+    if isinstance(value, (list, tuple)):
+        days: List[int] = []
+        for item in value:
+            days.extend(d for d in parse_days(item) if d not in days)
+        return days
+    if isinstance(value, int) and 0 <= value <= 6:
+        return [value]
+    key = str(value).strip().lower()
+    if key in DAY_GROUPS:
+        return list(DAY_GROUPS[key])
+    if key in DAY_INDEX:
+        return [DAY_INDEX[key]]
+    if "-" in key:  # "mon-fri"
+        first, last = (part.strip() for part in key.split("-", 1))
+        if first in DAY_INDEX and last in DAY_INDEX:
+            lo, hi = DAY_INDEX[first], DAY_INDEX[last]
+            return list(range(lo, hi + 1)) if lo <= hi else list(range(lo, 7)) + list(range(0, hi + 1))
+    raise ValueError(f"Unrecognized day: {value!r}")
+
+
+def merge_intervals(intervals: Iterable[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Sort and merge overlapping or touching intervals."""
+    merged: List[Tuple[float, float]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(free: List[Tuple[float, float]], busy: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Remove merged, sorted busy intervals from merged, sorted free intervals in one sweep."""
+    result: List[Tuple[float, float]] = []
+    j = 0
+    for start, end in free:
+        while j < len(busy) and busy[j][1] <= start:
+            j += 1
+        cursor, k = start, j
+        while k < len(busy) and busy[k][0] < end:
+            if busy[k][0] > cursor:
+                result.append((cursor, busy[k][0]))
+            cursor = max(cursor, busy[k][1])
+            k += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def milestone_hours(milestone: Dict[str, Any]) -> float:
+    """Estimated hours of a milestone dict, 0 when missing or malformed."""
+    for key in ("estimated_hours", "hours", "duration_hours"):
+        if key in milestone:
+            try:
+                return max(0.0, float(milestone[key]))
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
+
+
+def milestone_title(milestone: Dict[str, Any], index: int) -> str:
+    """Display title of a milestone dict."""
+    return str(milestone.get("title") or milestone.get("name") or f"Milestone {index + 1}")
+
+
+def conflict_index(records: List[Dict[str, Any]], zone: tzinfo) -> IntervalIndex:
+    """Index calendar_conflicts read in `zone`; the same records in the same zone share one (read-only) index."""
+    key = hashlib.blake2b(json.dumps([str(zone), records], sort_keys=True, default=str).encode(),
+                          digest_size=16).hexdigest()
+    index = _conflict_indexes.get(key)
+    cache_result("conflict_index", index is not None)
+    if index is None:
+        index = _conflict_indexes[key] = IntervalIndex.from_records(records, zone)
+        if len(_conflict_indexes) > CONFLICT_INDEXES:
+            _conflict_indexes.popitem(last=False)
+    else:
+        _conflict_indexes.move_to_end(key)
+    return index
+
+
+_conflict_indexes: "OrderedDict[str, IntervalIndex]" = OrderedDict()
+
+
+# ───── Solver ───────────────────────────────────────────────────────────
+
+class TimelineSolver:
+    """Packs milestone hours into free work blocks, week by week."""
+
+    DEFAULT_HOURS_PER_WEEK = 10
+    DEFAULT_WEEKS = 8
+
+    def __init__(self, time_commitment: Optional[TimeCommitment] = None):
+        self.commitment = time_commitment or TimeCommitment()
+        self.zone = get_zone(self.commitment.timezone)
+
+    # -- week grid --------------------------------------------------------
+
+    def week_starts(self, start: datetime, weeks: int) -> List[float]:
+        """Epoch start of each project week, aligned to local Monday midnight."""
+        local = start.astimezone(self.zone) if start.tzinfo else start.replace(tzinfo=self.zone)
+        monday = (local - timedelta(days=local.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        # Build each week in local time so DST shifts don't drift the grid
+        return [
+            datetime.combine(monday.date() + timedelta(weeks=w), monday.timetz()).replace(tzinfo=self.zone).timestamp()
+            for w in range(weeks + 1)
+        ]
+
+    def default_blocks(self) -> List[Dict[str, Any]]:
+        """Derive weekly work blocks from hours_per_week when the user has none."""
+        hours = self.commitment.hours_per_week or self.DEFAULT_HOURS_PER_WEEK
+        preference = self.commitment.consistency_preference
+        if preference == "few_long_sessions":
+            days, start = DAY_GROUPS["weekends"], 10 * 60
+        elif preference == "daily_small_chunks":
+            days, start = DAY_GROUPS["daily"], 19 * 60
+        else:
+            days, start = DAY_GROUPS["weekdays"], 18 * 60
+        per_day = min(hours * 60 / len(days), 16 * 60)
+        start = min(start, 24 * 60 - per_day)
+        return [{"days": days, "start": start / 60, "end": (start + per_day) / 60}]
+
+    def expand_blocks(self, blocks: List[Dict[str, Any]], week_starts: List[float],
+                      warnings: List[str]) -> List[Tuple[float, float]]:
+        """Expand recurring ({day(s), start, end}) and dated ({start, end}) blocks into intervals."""
+        window = (week_starts[0], week_starts[-1])
+        intervals: List[Tuple[float, float]] = []
+        for block in blocks:
+            try:
+                if "day" in block or "days" in block:
+                    days = parse_days(block.get("days", block.get("day")))
+                    begin, finish = parse_clock(block["start"]), parse_clock(block["end"])
+                    if finish <= begin:
+                        finish += 24 * 60  # block runs past midnight
+                    for week_start in week_starts[:-1]:
+                        monday = datetime.fromtimestamp(week_start, tz=self.zone)
+                        for day in days:
+                            base = monday + timedelta(days=day)
+                            lo = datetime.combine(base.date(), datetime.min.time(), tzinfo=self.zone) + timedelta(minutes=begin)
+                            hi = datetime.combine(base.date(), datetime.min.time(), tzinfo=self.zone) + timedelta(minutes=finish)
+                            intervals.append((lo.timestamp(), hi.timestamp()))
+                else:
+                    interval = record_interval(block, self.zone)
+                    if interval is None:
+                        raise ValueError("missing or empty start/end")
+                    intervals.append(interval)
+            except (KeyError, ValueError) as e:
+                warnings.append(f"Ignored work block {block!r}: {e}")
+        return [(max(lo, window[0]), min(hi, window[1])) for lo, hi in merge_intervals(intervals)
+                if hi > window[0] and lo < window[1]]
+
+    def busy_intervals(self, conflicts: IntervalIndex, week_starts: List[float],
+                       warnings: List[str]) -> List[Tuple[float, float]]:
+        """Calendar conflicts inside the project window plus busy periods that can be placed on the calendar."""
+        busy = conflicts.covered(week_starts[0], week_starts[-1])
+        weeks = len(week_starts) - 1
+        for period in self.commitment.busy_periods:
+            week_match = _WEEK_RANGE_RE.search(period)
+            date_match = _DATE_RANGE_RE.search(period)
+            if date_match:
+                try:
+                    first = datetime.fromisoformat(date_match.group(1)).replace(tzinfo=self.zone)
+                    last = datetime.fromisoformat(date_match.group(2) or date_match.group(1)).replace(tzinfo=self.zone)
+                except ValueError as e:
+                    warnings.append(f"Ignored busy period '{period}': {e}")
+                    continue
+                busy.append((first.timestamp(), (last + timedelta(days=1)).timestamp()))
+            elif week_match:
+                lo = int(week_match.group(1))
+                hi = int(week_match.group(2) or lo)
+                lo, hi = max(1, min(lo, hi)), min(weeks, max(lo, hi))
+                if lo <= hi:
+                    busy.append((week_starts[lo - 1], week_starts[hi]))
+            else:
+                warnings.append(f"Busy period '{period}' has no dates; plan extra slack around it")
+        return merge_intervals(busy)
+
+    # -- packing ----------------------------------------------------------
+
+    def packer(self, work_blocks: List[Dict[str, Any]],
+               calendar_conflicts: Union[List[Dict[str, Any]], IntervalIndex], timeline_weeks: Optional[int] = None,
+               start: Optional[datetime] = None) -> "SchedulePacker":
+        """Incremental scheduler: place milestones one at a time, then read the result."""
+        return SchedulePacker(self, work_blocks, calendar_conflicts, timeline_weeks, start)
+
+    def solve(self, milestones: Iterable[Dict[str, Any]], work_blocks: List[Dict[str, Any]],
+              calendar_conflicts: Union[List[Dict[str, Any]], IntervalIndex], timeline_weeks: Optional[int] = None,
+              start: Optional[datetime] = None) -> SolverResult:
+        """Schedule milestones in order; each one starts after the previous one finishes.
+
+        `milestones` may be a generator: each milestone is placed as soon as it is produced.
+        """
+        packer = self.packer(work_blocks, calendar_conflicts, timeline_weeks, start)
+        for milestone in milestones:
+            packer.place(milestone)
+        return packer.result()
+
+    def state_inputs(self, state: StateModel, timeline: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """solve()/packer() arguments from a StateModel (timeline overrides state.timeline)."""
+        timeline = state.timeline if timeline is None else timeline
+        start = (timeline or {}).get("start_date") or state.session_start_time
+        if isinstance(start, str):
+            start = datetime.fromisoformat(start.replace("Z", "+00:00"))
+        return {
+            "work_blocks": state.optimal_work_blocks,
+            "calendar_conflicts": state.calendar_conflicts,
+            "timeline_weeks": (timeline or {}).get("timeline_weeks"),
+            "start": start,
+        }
+
+    def schedule_key(self, milestones: Iterable[Dict[str, Any]], work_blocks: List[Dict[str, Any]],
+                     calendar_conflicts: Union[List[Dict[str, Any]], IntervalIndex],
+                     timeline_weeks: Optional[int] = None, start: Optional[datetime] = None) -> str:
+        """Digest of everything solve() depends on, so a stored result can be reused safely."""
+        if isinstance(calendar_conflicts, IntervalIndex):
+            calendar_conflicts = [(start_, end_) for start_, end_, _ in calendar_conflicts]
+        payload = [
+            [(milestone_title(m, i), milestone_hours(m), m.get("week")) for i, m in enumerate(milestones)],
+            work_blocks, calendar_conflicts, timeline_weeks, start.isoformat() if start else None,
+            self.commitment.model_dump(mode="json"),
+        ]
+        return hashlib.blake2b(json.dumps(payload, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+    def solve_state(self, state: StateModel, inputs: Optional[Dict[str, Any]] = None) -> SolverResult:
+        """Run the solver on the scheduling fields of a StateModel (or on inputs already read from it)."""
+        return self.solve(milestones=state.milestones, **(inputs or self.state_inputs(state)))
+
+    @staticmethod
+    def _week_of(moment: float, week_starts: List[float]) -> int:
+        """0-based week index containing an epoch moment (clamped to the grid)."""
+        lo, hi = 0, len(week_starts) - 2
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if week_starts[mid] <= moment:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def _next_slot(self, free: List[Tuple[float, float]], slot: int, week: int, used: List[float],
+                   cap: float, week_starts: List[float]) -> Tuple[int, float]:
+        """Advance past the current block, skipping to next week when the cap is spent."""
+        if cap - used[week] < MIN_SESSION_HOURS and week + 1 < len(week_starts) - 1:
+            boundary = week_starts[week + 1]
+            while slot < len(free) and free[slot][1] <= boundary:
+                slot += 1
+            return slot, boundary
+        slot += 1
+        return slot, free[slot][0] if slot < len(free) else 0.0
+
+
+class SchedulePacker:
+    """State of one solve: free time is carved out up front, then milestones are packed as they come."""
+
+    def __init__(self, solver: TimelineSolver, work_blocks: List[Dict[str, Any]],
+                 calendar_conflicts: Union[List[Dict[str, Any]], IntervalIndex], timeline_weeks: Optional[int] = None,
+                 start: Optional[datetime] = None):
+        self.solver = solver
+        self.weeks = weeks = int(timeline_weeks or solver.DEFAULT_WEEKS)
+        start = start or datetime.now(timezone.utc)
+        self.warnings: List[str] = []
+        self.week_starts = week_starts = solver.week_starts(start, weeks)
+        if not isinstance(calendar_conflicts, IntervalIndex):
+            calendar_conflicts = conflict_index(calendar_conflicts, solver.zone)
+        self.conflicts = calendar_conflicts
+
+        free = solver.expand_blocks(work_blocks or solver.default_blocks(), week_starts, self.warnings)
+        free = subtract_intervals(free, solver.busy_intervals(calendar_conflicts, week_starts, self.warnings))
+        origin = start.timestamp() if start.tzinfo else start.replace(tzinfo=solver.zone).timestamp()
+        self.free = free = [(max(lo, origin), hi) for lo, hi in free if hi > origin]  # nothing before the project starts
+
+        self.cap = float(solver.commitment.hours_per_week) if solver.commitment.hours_per_week else math.inf
+        capacity = [0.0] * weeks
+        for lo, hi in free:
+            capacity[solver._week_of(lo, week_starts)] += (hi - lo) / HOUR
+        self.capacity = [min(c, self.cap) for c in capacity]
+
+        self.used = [0.0] * weeks
+        self.sessions: List[ScheduledSession] = []
+        self.milestone_weeks: List[Dict[str, Any]] = []
+        self.unscheduled = 0.0
+        self.slot = 0  # index into free; free[slot] may be partially consumed
+        self.cursor = free[0][0] if free else 0.0
+
+    def place(self, milestone: Dict[str, Any]) -> Dict[str, Any]:
+        """Pack the next milestone after the previous one; returns its milestone_weeks entry."""
+        solver, free, week_starts, used, cap = self.solver, self.free, self.week_starts, self.used, self.cap
+        index = len(self.milestone_weeks)
+        title = milestone_title(milestone, index)
+        remaining = milestone_hours(milestone)
+        placed = 0.0
+        first_week = last_week = None
+        span: List[ScheduledSession] = []
+        while remaining > 1e-9 and self.slot < len(free):
+            lo = max(self.cursor, free[self.slot][0])
+            week = solver._week_of(lo, week_starts)
+            hi = min(free[self.slot][1], week_starts[week + 1])
+            room = min((hi - lo) / HOUR, cap - used[week], remaining)
+            if room < min(MIN_SESSION_HOURS, remaining) - 1e-9:
+                # Block exhausted or weekly cap reached: move to the next usable block
+                self.slot, self.cursor = solver._next_slot(free, self.slot, week, used, cap, week_starts)
+                continue
+            end = lo + room * HOUR
+            span.append(ScheduledSession(
+                milestone_index=index, milestone=title, week=week + 1,
+                start=from_epoch(lo), end=from_epoch(end), hours=round(room, 2),
+            ))
+            used[week] += room
+            remaining -= room
+            placed += room
+            first_week = week + 1 if first_week is None else first_week
+            last_week = week + 1
+            self.cursor = end
+        self.sessions.extend(span)
+        if remaining > 1e-9:
+            self.unscheduled += remaining
+            self.warnings.append(f"'{title}' needs {remaining:.1f} more hours than fit in {self.weeks} weeks")
+        target = milestone.get("week")
+        if isinstance(target, int) and last_week and last_week > target:
+            self.warnings.append(f"'{title}' finishes in week {last_week}, after its planned week {target}")
+        # Calendar events during the milestone's span: sessions avoid them, but they signal a crowded stretch
+        nearby = self.conflicts.count_overlaps(span[0].start.timestamp(), span[-1].end.timestamp()) if span else 0
+        entry = {
+            "title": title, "start_week": first_week, "end_week": last_week,
+            "hours": round(placed, 2), "unscheduled_hours": round(remaining, 2),
+            "calendar_conflicts": nearby,
+        }
+        self.milestone_weeks.append(entry)
+        return entry
+
+    def result(self) -> SolverResult:
+        weekly_schedule: Dict[str, Dict[str, Any]] = {
+            f"week{w + 1}": {"tasks": [], "hours": round(self.used[w], 2)} for w in range(self.weeks)
+        }
+        for session in self.sessions:
+            tasks = weekly_schedule[f"week{session.week}"]["tasks"]
+            if session.milestone not in tasks:
+                tasks.append(session.milestone)
+
+        return SolverResult(
+            timeline_weeks=self.weeks,
+            start_date=from_epoch(self.week_starts[0]),
+            weekly_schedule=weekly_schedule,
+            milestone_weeks=list(self.milestone_weeks),
+            sessions=list(self.sessions),
+            capacity_by_week=[round(c, 2) for c in self.capacity],
+            unscheduled_hours=round(self.unscheduled, 2),
+            warnings=list(self.warnings),
+        )
@@ -0,0 +1,90 @@
+from typing import Dict, Any, AsyncIterator, Callable, Optional
+from functools import wraps
+import logging
+import time
+from langgraph.graph import StateGraph, START, END
+from app.state import StateModel, StatePatch
+from app.nodes.ClassifyNode import classify_node
+from app.nodes.MilestoneNode import milestone_node
+from app.nodes.TimelineNode import timeline_node
+from app.nodes.ResourceNode import resource_node
+from app.nodes.ReportNode import report_node
+from tools.metrics import instrument_node
+from tools.tracing import trace_node
+from tools.resilience import UpstreamUnavailable, call_ledger
+
+# Planning pipeline over StateModel:
+#
+#     classify → milestones ─┬─ timeline ──┬─ report
+#                            └─ resources ─┘
+#
+# timeline and resources write disjoint fields, so LangGraph runs them in the
+# same step, concurrently, and report waits for both. Streaming with
+# stream_mode="updates" yields each node's patch as soon as that node
+# finishes, which lets the client show the classification long before the
+# report exists. The milestone node also writes a "custom" event for every
+# milestone it places on the timeline while the LLM is still listing them.
+# Every node runs under a call ledger: model-call retries and failures are
+# added to retry_count / errors, and a node whose model calls are refused
+# (open breaker, retries exhausted) contributes only those errors instead of
+# failing the whole run.
+
+logger = logging.getLogger(__name__)
+
+PLANNING_NODES = ("classify", "milestones", "timeline", "resources", "report")
+
+
+def tracked(name: str, node: Callable[[StateModel], StatePatch]) -> Callable[[StateModel], StatePatch]:
+    """Wrap a node so upstream retries and failures are recorded in the state, and the node is timed and traced."""
+    @instrument_node("planning", name)
+    @trace_node("planning", name)
+    @wraps(node)
+    def run(state: StateModel) -> StatePatch:
+        with call_ledger() as ledger:
+            try:
+                patch = node(state)
+            except UpstreamUnavailable as e:
+                logger.warning(f"{node.__name__} skipped, model unavailable: {e}")
+                patch = {}
+        # Deltas: the state's reducers add them to what other nodes (parallel ones too) have written
+        if ledger.retries:
+            patch = {**patch, "retry_count": ledger.retries}
+        if ledger.errors:
+            patch = {**patch, "errors": list(ledger.errors)}
+        return patch
+    return run
+
+
+def build_planning_graph(checkpointer: Optional[Any] = None):
+    """Planning pipeline graph. The shared planning_graph runs without a checkpointer (a run is one pass and jobs
+    keep their own results); pass e.g. MemorySaver(serde=CodecSerializer()) for resumable runs keyed by thread_id."""
+    builder = StateGraph(StateModel)
+    builder.add_node("classify", tracked("classify", classify_node))
+    builder.add_node("milestones", tracked("milestones", milestone_node))
+    builder.add_node("timeline", tracked("timeline", timeline_node))
+    builder.add_node("resources", tracked("resources", resource_node))
+    builder.add_node("report", tracked("report", report_node))
+
+    builder.add_edge(START, "classify")
+    builder.add_edge("classify", "milestones")
+    builder.add_edge("milestones", "timeline")
+    builder.add_edge("milestones", "resources")
+    builder.add_edge(["timeline", "resources"], "report")
+    builder.add_edge("report", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+planning_graph = build_planning_graph()
+
+
+async def stream_plan(state: StateModel, graph=None) -> AsyncIterator[Dict[str, Any]]:
+    """Yield {node, patch, elapsed_ms} as each planning node completes, and {progress, elapsed_ms} in between."""
+    graph = graph or planning_graph
+    begin = time.perf_counter()
+    async for mode, update in graph.astream(state, stream_mode=["updates", "custom"]):
+        elapsed_ms = round((time.perf_counter() - begin) * 1000, 1)
+        if mode == "custom":
+            yield {"progress": update, "elapsed_ms": elapsed_ms}
+            continue
+        for node, patch in update.items():
+            yield {"node": node, "patch": patch or {}, "elapsed_ms": elapsed_ms}
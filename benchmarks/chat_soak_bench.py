@@ -0,0 +1,172 @@
+"""
+Chat soak test: long scripted conversations on many threads through chatbot_backend's graph, with a fake chat model.
+
+Run from the repo root:
+    $ python -m benchmarks.chat_soak_bench --threads 20 --turns 200 --csv /tmp/soak.csv
+
+Every turn, for each thread: one user message (rejections and preferences mixed in, never an acceptance), one
+graph run. Per turn it records latency (p50/p95 over threads), the chatbot prompt size, MemorySaver bytes per
+thread and process RSS, prints an ASCII chart of each against turn number, and fits a slope over the second
+half of the run (where superlinear growth shows). Exits 1 when a slope is above its --max-*-slope limit.
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+VOCAB = ("sensor dashboard garden music budget recipe fitness language tutor map weather transit quiz habit "
+         "library volunteer chess photo journal recycling energy podcast calendar flashcard inventory pet "
+         "carpool bird hiking study playlist grocery charity forum resume portfolio game translator chatbot "
+         "timeline tracker planner scanner visualiser simulator recommender marketplace archive").split()
+SCRIPT = ("REJECT", "PREFERENCE", "OTHER", "REJECT", "OTHER", "PREFERENCE")
+
+
+class FakeChatModel:
+    """Stands in for the LangChain chat model: answers intents from the script and writes varied ideas."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.last_prompt_chars = 0
+        self.calls = 0
+
+    def invoke(self, prompt):
+        from langchain_core.messages import AIMessage
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if isinstance(prompt, str):   # classify_intent / finalize
+            tag = prompt.rsplit("User:", 1)[-1].strip()
+            return AIMessage(content=tag[1:tag.index("]")] if tag.startswith("[") else "OTHER")
+        self.last_prompt_chars = sum(len(m["content"] if isinstance(m, dict) else m.content) for m in prompt)
+        rng = random.Random(self.calls)
+        words = rng.sample(VOCAB, 12)
+        return AIMessage(content=f"Project Name: {' '.join(words[:3]).title()}\n"
+                                 f"Project Overview: build a {' '.join(words[3:])} app.")
+
+
+def user_turn(thread: int, turn: int) -> str:
+    intent = SCRIPT[(thread + turn) % len(SCRIPT)]
+    topic = VOCAB[(thread * 7 + turn) % len(VOCAB)]
+    text = {"REJECT": f"Not that one, I don't want anything about {topic}.",
+            "PREFERENCE": f"I prefer projects that involve {topic}.",
+            "OTHER": f"What would the first week look like if it used {topic}?"}[intent]
+    return f"[{intent}] {text}"
+
+
+def checkpoint_bytes(saver) -> int:
+    """Serialized bytes MemorySaver holds over all threads: checkpoints, metadata, channel blobs, pending writes."""
+    total = 0
+    for namespaces in saver.storage.values():
+        for checkpoints in namespaces.values():
+            for checkpoint, metadata, _ in checkpoints.values():
+                total += len(checkpoint[1]) + len(metadata[1])
+    total += sum(len(blob[1]) for blob in saver.blobs.values())
+    for writes in saver.writes.values():
+        total += sum(len(write[2][1]) for write in writes.values())
+    return total
+
+
+def rss_mib() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:  # not Linux: peak RSS is the best available
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def ascii_chart(title: str, ys: list, width: int = 60, height: int = 8) -> str:
+    """Columns are turn buckets (bucket max), rows are value bands from min to max."""
+    buckets = np.array_split(np.asarray(ys, dtype=float), min(width, len(ys)))
+    heights = [bucket.max() for bucket in buckets]
+    low, high = min(heights), max(heights)
+    span = (high - low) or 1.0
+    rows = []
+    for level in range(height, 0, -1):
+        threshold = low + span * (level - 0.5) / height
+        label = f"{low + span * level / height:>10.1f} |" if level in (height, 1) else f"{'':>10} |"
+        rows.append(label + "".join("█" if value >= threshold else " " for value in heights))
+    rows.append(f"{'':>10} +" + "-" * len(heights))
+    rows.append(f"{'':>12}turn 1{'':>{max(len(heights) - 12, 1)}}turn {len(ys)}")
+    return f"{title}\n" + "\n".join(rows)
+
+
+def slope(ys: list) -> float:
+    """Least-squares growth per turn over the second half of the run."""
+    half = len(ys) // 2
+    xs = np.arange(half, len(ys))
+    return float(np.polyfit(xs, np.asarray(ys[half:], dtype=float), 1)[0]) if len(xs) > 1 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="fake model latency per call")
+    parser.add_argument("--csv", help="write the per-turn series here")
+    parser.add_argument("--max-latency-slope", type=float, default=0.05, help="ms per turn (p50)")
+    parser.add_argument("--max-prompt-slope", type=float, default=400.0, help="prompt characters per turn")
+    parser.add_argument("--max-checkpoint-slope", type=float, default=64.0, help="KiB per turn, per thread")
+    parser.add_argument("--max-rss-slope", type=float, default=0.5, help="MiB per turn, whole process")
+    args = parser.parse_args()
+
+    # Keep the soak's accepted/rejected ideas out of the real idea store
+    os.environ.setdefault("IDEA_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="chat-soak-"), "ideas.sqlite3"))
+    os.environ.setdefault("gemini_api_key", "soak")   # read at import; the fake model never calls out
+    import chatbot_backend
+    from tools.llm_provider import get_llm_provider
+
+    model = FakeChatModel(args.llm_ms)
+    provider = get_llm_provider()
+    provider._chat_model = model   # chat_model() returns it instead of building the Gemini client
+    provider.hedging = False       # measure the graph, not duplicate fake calls
+    graph, saver = chatbot_backend.graph, chatbot_backend.graph.checkpointer
+
+    columns = ("turn", "latency_p50_ms", "latency_p95_ms", "prompt_chars", "checkpoint_kib", "rss_mib")
+    rows = []
+    started = time.perf_counter()
+    for turn in range(1, args.turns + 1):
+        latencies, prompts = [], []
+        for thread in range(args.threads):
+            state = {"messages": [{"role": "user", "content": user_turn(thread, turn)}], "rejected_ideas": [],
+                     "preferences": []}
+            begin = time.perf_counter()
+            for _ in graph.stream(state, {"configurable": {"thread_id": f"soak-{thread}"}}, stream_mode="values"):
+                pass
+            latencies.append((time.perf_counter() - begin) * 1000)
+            prompts.append(model.last_prompt_chars)
+        rows.append((turn, float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95)),
+                     float(np.mean(prompts)), checkpoint_bytes(saver) / args.threads / 1024, rss_mib()))
+    print(f"{args.threads} threads x {args.turns} turns in {time.perf_counter() - started:.1f}s, "
+          f"{model.calls} fake model calls\n")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(rows)
+
+    series = {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+    limits = {"latency_p50_ms": args.max_latency_slope, "prompt_chars": args.max_prompt_slope,
+              "checkpoint_kib": args.max_checkpoint_slope, "rss_mib": args.max_rss_slope}
+    for name in columns[1:]:
+        print(ascii_chart(f"{name} (last {series[name][-1]:.1f})", series[name]) + "\n")
+
+    failures = []
+    print(f"{'series':<16} {'slope/turn':>12} {'limit':>10}")
+    for name, limit in limits.items():
+        growth = slope(series[name])
+        flag = "  FAIL" if growth > limit else ""
+        print(f"{name:<16} {growth:>12.3f} {limit:>10.3f}{flag}")
+        if flag:
+            failures.append(name)
+    if failures:
+        raise SystemExit(f"Growth above the configured slope for: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
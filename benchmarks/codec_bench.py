@@ -0,0 +1,92 @@
+"""
+Codec benchmark: binary records against the pydantic JSON path for StateModel, Person and chat state.
+
+Run from the repo root:
+    $ python -m benchmarks.codec_bench --sizes 10 1000 10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+from langchain_core.messages import AIMessage, HumanMessage, messages_from_dict, messages_to_dict
+
+from app.codec import decode, encode, encode_chat_state
+from app.person import Person
+from app.state import StateModel, TimeCommitment
+
+
+def make_state(size: int) -> StateModel:
+    return StateModel(
+        user_id="bench", session_id="bench", session_start_time=datetime(2025, 9, 1, 9, 30),
+        project_type="web app", complexity_level="medium", has_team=True, team_size=3,
+        time_commitment=TimeCommitment(hours_per_week=10, busy_periods=["weeks 6-7"]),
+        milestones=[{"id": str(i), "title": f"Milestone {i}", "estimated_hours": 4, "week": i % 16 + 1,
+                     "depends_on": [str(i - 1)] if i else []} for i in range(size)],
+        calendar_conflicts=[{"start": 1_700_000_000 + i * 3600, "end": 1_700_001_800 + i * 3600, "title": "Lecture"}
+                            for i in range(size)],
+        execution_history=[{"step": i, "node": "timeline", "result": "ok", "duration_ms": 12.5} for i in range(size)],
+        log={"debug": [f"scheduled milestone {i} in week {i % 16 + 1}" for i in range(size)]},
+    )
+
+
+def make_person(size: int) -> Person:
+    return Person(name="Bench Person", user_type="student", technical_skills=["python", "react"],
+                  progress_notes=[f"note {i}" for i in range(min(size, 100))])
+
+
+def make_chat(size: int) -> dict:
+    messages = []
+    for i in range(size):
+        messages.append(HumanMessage(content=f"message {i} from the user about their project"))
+        messages.append(AIMessage(content=f"Project Name: Idea {i}\nProject Overview: a reply with some detail"))
+    return {"messages": messages, "rejected_ideas": [f"idea {i}" for i in range(size // 4)],
+            "preferences": ["python"], "accepted_idea": None, "document_context": ""}
+
+
+def timed(fn, repeat: int) -> float:
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - begin) / repeat * 1e3
+
+
+def row(label, json_bytes, json_enc, json_dec, bin_bytes, bin_enc, bin_dec):
+    print(f"{label:<18} {len(json_bytes):>10} {len(bin_bytes):>10} {json_enc:>9.3f} {bin_enc:>9.3f} {json_dec:>9.3f} {bin_dec:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'record':<18} {'json B':>10} {'codec B':>10} {'json enc':>9} {'codec enc':>9} {'json dec':>9} {'codec dec':>9}  (ms)")
+    for size in args.sizes:
+        state = make_state(size)
+        blob, raw = state.model_dump_json().encode(), encode(state)
+        assert decode(raw) == state and decode(raw, validate=True) == state
+        row(f"StateModel {size}", blob,
+            timed(state.model_dump_json, args.repeat), timed(lambda: StateModel.model_validate_json(blob), args.repeat),
+            raw, timed(lambda: encode(state), args.repeat), timed(lambda: decode(raw), args.repeat))
+        print(f"{'  validated dec':<18} {'':>10} {'':>10} {'':>9} {'':>9} {'':>9} "
+              f"{timed(lambda: decode(raw, validate=True), args.repeat):>9.3f}")
+
+        person = make_person(size)
+        blob, raw = person.model_dump_json().encode(), encode(person)
+        assert decode(raw) == person
+        row(f"Person {min(size, 100)}", blob,
+            timed(person.model_dump_json, args.repeat), timed(lambda: Person.model_validate_json(blob), args.repeat),
+            raw, timed(lambda: encode(person), args.repeat), timed(lambda: decode(raw), args.repeat))
+
+        chat = make_chat(size)
+        to_json = lambda: json.dumps({**chat, "messages": messages_to_dict(chat["messages"])}).encode()
+        blob, raw = to_json(), encode_chat_state(chat)
+        assert [m.content for m in decode(raw)["messages"]] == [m.content for m in chat["messages"]]
+        from_json = lambda: (lambda d: {**d, "messages": messages_from_dict(d["messages"])})(json.loads(blob))
+        row(f"chat State {size}", blob, timed(to_json, args.repeat), timed(from_json, args.repeat),
+            raw, timed(lambda: encode_chat_state(chat), args.repeat), timed(lambda: decode(raw), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Hedging benchmark: a simulated model with a heavy latency tail, called with and without hedged requests.
+
+Run from the repo root:
+    $ python -m benchmarks.hedging_bench --calls 2000 --slow-rate 0.03 --budget 0.05
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from tools.llm_provider import LLMProvider
+
+
+def fake_model(slow_rate: float, slow_ms: float):
+    """Mostly 20-60 ms, occasionally slow_ms: the shape of the tail we see from Gemini."""
+    def call():
+        time.sleep((slow_ms if random.random() < slow_rate else random.uniform(20, 60)) / 1000)
+        return "ok"
+    return call
+
+
+def run(provider: LLMProvider, calls: int, concurrency: int, model) -> np.ndarray:
+    def timed(_):
+        begin = time.perf_counter()
+        provider.call("bench", model)
+        return time.perf_counter() - begin
+    with ThreadPoolExecutor(concurrency) as pool:
+        return np.array(list(pool.map(timed, range(calls)))) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--slow-rate", type=float, default=0.03)
+    parser.add_argument("--slow-ms", type=float, default=1500)
+    parser.add_argument("--quantile", type=float, default=0.95)
+    parser.add_argument("--budget", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    model = fake_model(args.slow_rate, args.slow_ms)
+    print(f"{args.calls} calls, {args.concurrency} concurrent, {args.slow_rate:.0%} take {args.slow_ms:.0f} ms")
+    for label, hedging in (("plain ", False), ("hedged", True)):
+        provider = LLMProvider(hedging=hedging, hedge_quantile=args.quantile, budget=args.budget)
+        latencies = run(provider, args.calls, args.concurrency, model)
+        stats = provider.stats()["bench"]
+        print(f"  {label}  p50 {np.percentile(latencies, 50):7.1f} ms  p95 {np.percentile(latencies, 95):7.1f} ms  "
+              f"p99 {np.percentile(latencies, 99):7.1f} ms  max {latencies.max():7.1f} ms  "
+              f"extra calls {stats['extra_call_ratio']:.1%} ({stats['hedge_wins']} hedges won)")
+
+
+if __name__ == "__main__":
+    main()
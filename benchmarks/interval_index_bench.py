@@ -0,0 +1,63 @@
+"""
+Interval index benchmark: overlap and free-gap queries against a linear scan.
+
+Run from the repo root:
+    $ python -m benchmarks.interval_index_bench --events 20000
+"""
+import argparse
+import random
+import time
+
+from app.tools.IntervalIndex import IntervalIndex
+
+SEMESTER = 16 * 7 * 86400
+
+
+def make_events(count: int, seed: int):
+    rnd = random.Random(seed)
+    events = []
+    for i in range(count):
+        start = rnd.uniform(0, SEMESTER)
+        events.append((start, start + rnd.uniform(15 * 60, 3 * 3600), i))
+    return events
+
+
+def timed(fn, queries):
+    begin = time.perf_counter()
+    for lo, hi in queries:
+        fn(lo, hi)
+    return (time.perf_counter() - begin) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    events = make_events(args.events, args.seed)
+    rnd = random.Random(args.seed + 1)
+    queries = [(lo, lo + rnd.uniform(3600, 4 * 3600)) for lo in (rnd.uniform(0, SEMESTER) for _ in range(args.queries))]
+
+    begin = time.perf_counter()
+    index = IntervalIndex(events, seed=args.seed)
+    build_ms = (time.perf_counter() - begin) * 1e3
+
+    def scan(lo, hi):
+        return [e for e in events if e[0] < hi and e[1] > lo]
+
+    print(f"events={args.events} build={build_ms:.1f} ms")
+    print(f"overlaps      {timed(index.overlaps, queries):8.1f} us/query")
+    print(f"free_gaps     {timed(index.free_gaps, queries):8.1f} us/query")
+    print(f"linear scan   {timed(scan, queries[:200]):8.1f} us/query")
+
+    handles = [index.insert(lo, hi) for lo, hi in queries]
+    begin = time.perf_counter()
+    for handle in handles:
+        index.remove(handle)
+    print(f"insert+remove {(time.perf_counter() - begin) / len(handles) * 1e6:8.1f} us/remove")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Metrics overhead benchmark: cost per recorded event for counters, histograms, the node wrapper and the HTTP middleware.
+
+Run from the repo root:
+    $ python -m benchmarks.metrics_bench --events 200000
+"""
+import argparse
+import asyncio
+import time
+
+from tools.metrics import REGISTRY, MetricsMiddleware, cache_result, instrument_node
+
+COUNTER = REGISTRY.counter("bench_events_total", "Benchmark counter", ("kind",))
+HISTOGRAM = REGISTRY.histogram("bench_duration_seconds", "Benchmark histogram", ("kind",))
+
+
+def per_event_us(fn, events: int) -> float:
+    begin = time.perf_counter()
+    for _ in range(events):
+        fn()
+    return (time.perf_counter() - begin) / events * 1e6
+
+
+def middleware_us(events: int) -> float:
+    """Overhead of MetricsMiddleware around a trivial ASGI app, net of the bare app."""
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(_):
+        pass
+
+    async def drive(app):
+        scope = {"type": "http", "method": "GET", "path": "/bench"}
+        begin = time.perf_counter()
+        for _ in range(events):
+            await app(scope, None, send)
+        return (time.perf_counter() - begin) / events * 1e6
+
+    wrapped = MetricsMiddleware(endpoint, app_name="bench")
+    return asyncio.run(drive(wrapped)) - asyncio.run(drive(endpoint))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    counter, histogram = COUNTER.labels("bench"), HISTOGRAM.labels("bench")
+    noop = lambda: None
+    node = instrument_node("bench")(noop)
+    baseline = per_event_us(noop, args.events)
+
+    rows = [
+        ("counter.inc (cached child)", per_event_us(counter.inc, args.events)),
+        ("counter.labels().inc", per_event_us(lambda: COUNTER.labels("bench").inc(), args.events)),
+        ("histogram.observe", per_event_us(lambda: histogram.observe(0.042), args.events)),
+        ("cache_result", per_event_us(lambda: cache_result("bench", True), args.events)),
+        ("instrument_node wrapper", per_event_us(node, args.events) - baseline),
+        ("MetricsMiddleware", middleware_us(args.events // 10)),
+    ]
+    print(f"{'event':<28} {'µs/event':>9}")
+    for name, cost in rows:
+        print(f"{name:<28} {cost:>9.3f}")
+
+    begin = time.perf_counter()
+    size = len(REGISTRY.render())
+    print(f"\n/metrics render: {size} bytes in {(time.perf_counter() - begin) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
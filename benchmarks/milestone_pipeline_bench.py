@@ -0,0 +1,122 @@
+"""
+Milestone pipeline benchmark: schedule milestones while a simulated LLM is still streaming them, against waiting for the full list.
+
+Run from the repo root:
+    $ python -m benchmarks.milestone_pipeline_bench --milestones 12 --runs 50 --token-ms 2
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+from app.state import TimeCommitment
+from app.tools.JsonListParser import JsonListParser
+from app.tools.MilestoneGraph import MilestoneGraph, StreamingOrder
+from app.tools.TimelineSolver import TimelineSolver
+
+START = datetime(2025, 9, 1, 9, tzinfo=timezone.utc)
+
+
+def make_milestones(count: int) -> list:
+    milestones = []
+    for i in range(count):
+        earlier = [m["id"] for m in milestones]
+        milestones.append({
+            "id": str(i + 1), "title": f"Milestone {i + 1}", "estimated_hours": random.randint(2, 16),
+            "depends_on": random.sample(earlier, min(len(earlier), random.randint(0, 2))),
+        })
+    # An occasional forward reference holds a milestone back until its dependency arrives
+    if count > 3 and random.random() < 0.5:
+        milestones[1]["depends_on"] = [milestones[3]["id"]]
+    return milestones
+
+
+def token_stream(milestones: list, token_ms: float, clock: dict):
+    """The milestone list as an LLM would write it: a few characters at a time, token_ms apart."""
+    text = json.dumps(milestones, indent=1)
+    position = 0
+    while position < len(text):
+        size = random.randint(3, 8)
+        time.sleep(token_ms / 1000)
+        yield text[position:position + size]
+        position += size
+    clock["stream_end"] = time.perf_counter()
+
+
+def make_conflicts(count: int) -> list:
+    """Busy evenings spread over the project weeks."""
+    conflicts = []
+    for _ in range(count):
+        day = START.timestamp() + random.randint(0, 12 * 7) * 86400 + random.randint(8, 20) * 3600
+        conflicts.append({"start": datetime.fromtimestamp(day, tz=timezone.utc).isoformat(),
+                          "end": datetime.fromtimestamp(day + 2 * 3600, tz=timezone.utc).isoformat()})
+    return conflicts
+
+
+def batch(chunks, solver: TimelineSolver, inputs: dict):
+    text = "".join(chunks)
+    graph = MilestoneGraph(json.loads(text))
+    ordered = graph.ordered_milestones(graph.analyze(10, 12))
+    return solver.solve(ordered, **inputs), None
+
+
+def pipelined(chunks, solver: TimelineSolver, inputs: dict):
+    parser, order, packer = JsonListParser(), StreamingOrder(), solver.packer(**inputs)
+    first_placed = None
+    begin = time.perf_counter()
+    for chunk in chunks:
+        for milestone in parser.feed(chunk):
+            for ready in order.add(milestone):
+                packer.place(ready)
+                first_placed = first_placed or time.perf_counter() - begin
+    graph = MilestoneGraph(order.milestones)
+    ordered = graph.ordered_milestones(graph.analyze(10, 12))
+    if order.pending:
+        return solver.solve(ordered, **inputs), first_placed
+    return packer.result(), first_placed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--milestones", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--token-ms", type=float, default=2.0)
+    parser.add_argument("--conflicts", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    solver = TimelineSolver(TimeCommitment(hours_per_week=10, timezone="UTC"))
+    inputs = {"work_blocks": [], "calendar_conflicts": make_conflicts(args.conflicts), "timeline_weeks": 12,
+              "start": START}
+    totals = {"batch": 0.0, "pipelined": 0.0}
+    tails = {"batch": 0.0, "pipelined": 0.0}
+    first = 0.0
+    mismatches = 0
+    for _ in range(args.runs):
+        milestones = make_milestones(args.milestones)
+        results = {}
+        for name, run in (("batch", batch), ("pipelined", pipelined)):
+            clock = {}
+            begin = time.perf_counter()
+            results[name], first_placed = run(token_stream(milestones, args.token_ms, clock), solver, inputs)
+            end = time.perf_counter()
+            totals[name] += end - begin
+            tails[name] += end - clock["stream_end"]
+            if first_placed is not None:
+                first += first_placed
+        mismatches += results["batch"].model_dump() != results["pipelined"].model_dump()
+
+    runs = args.runs
+    print(f"{runs} plans x {args.milestones} milestones, {args.token_ms} ms per streamed chunk")
+    print(f"  batch      {totals['batch'] / runs * 1000:8.1f} ms per plan, "
+          f"{tails['batch'] / runs * 1000:6.2f} ms of it after the stream ended")
+    print(f"  pipelined  {totals['pipelined'] / runs * 1000:8.1f} ms per plan, "
+          f"{tails['pipelined'] / runs * 1000:6.2f} ms of it after the stream ended")
+    print(f"  first milestone placed after {first / runs * 1000:.1f} ms; "
+          f"timelines identical to batch: {runs - mismatches}/{runs}")
+
+
+if __name__ == "__main__":
+    main()
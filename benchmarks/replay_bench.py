@@ -0,0 +1,160 @@
+"""
+Replay benchmark: re-run a chat conversation or the planning pipeline against a recorded LLM cassette.
+
+Record once against the live model (needs gemini_api_key), then replay offline as often as needed:
+    $ python -m benchmarks.replay_bench --scenario chat --cassette /tmp/chat.cassette --record
+    $ python -m benchmarks.replay_bench --scenario chat --cassette /tmp/chat.cassette --runs 10 --json /tmp/after.json \\
+          --baseline /tmp/before.json
+
+Replays sleep for the recorded latencies times --latency-scale (default 0: measure only our own CPU work).
+Wall and CPU time come from --runs plain runs; allocations from one extra run under tracemalloc.
+The idea store and time-estimator directories point at a scratch directory (unless set), so runs neither
+write to your data nor depend on how far the local estimator has been trained.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from tools.cassette import Cassette
+
+CHAT_TURNS = [
+    "I'd like a project that combines machine learning with healthcare.",
+    "That sounds too complex for me, something simpler please.",
+    "I prefer working in Python and I like data visualisation.",
+    "Can it use public datasets only?",
+    "Yes, that's perfect, I'll take it.",
+]
+
+
+def plan_state(path: str = None):
+    from app.state import StateModel
+    if path:
+        with open(path) as f:
+            return StateModel.model_validate_json(f.read())
+    return StateModel(
+        user_id="replay", session_id="replay",
+        session_start_time=datetime(2026, 1, 5, tzinfo=timezone.utc),   # pins the schedule's week grid
+        learning_goal="Learn to build and deploy a small web app",
+        interests=["music", "web development"], technical_skills=["python", "html"],
+        potential_ideas=["A practice tracker for musicians with weekly progress charts"],
+        end_goal="A deployed app I can show in my portfolio",
+    )
+
+
+def run_chat(run: int) -> None:
+    import chatbot_backend
+    cfg = {"configurable": {"thread_id": f"replay-{run}"}}   # fresh thread, same prompts every run
+    for turn in CHAT_TURNS:
+        # route_decision edits state lists in place; with checkpoints written in the background,
+        # whether an edit is saved depends on timing, so write them synchronously here
+        for _ in chatbot_backend.graph.stream({"messages": [{"role": "user", "content": turn}], "rejected_ideas": [],
+                                               "preferences": []}, cfg, stream_mode="values", durability="sync"):
+            pass
+
+
+def run_plan(state) -> None:
+    from app.workflow import stream_plan
+
+    async def drain():
+        async for _ in stream_plan(state):
+            pass
+    asyncio.run(drain())
+
+
+def measure(scenario, runs: int) -> dict:
+    walls, cpus = [], []
+    for run in range(runs):
+        wall, cpu = time.perf_counter(), time.process_time()
+        scenario(run)
+        walls.append((time.perf_counter() - wall) * 1000)
+        cpus.append((time.process_time() - cpu) * 1000)
+    tracemalloc.start()
+    scenario(runs)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"wall_ms": statistics.median(walls), "wall_ms_min": min(walls), "cpu_ms": statistics.median(cpus),
+            "cpu_ms_min": min(cpus), "peak_kib": peak / 1024, "retained_kib": current / 1024, "runs": runs}
+
+
+def compare(result: dict, baseline: dict) -> float:
+    """Print result against baseline; worst relative increase over the medians and peak memory."""
+    worst = 0.0
+    print(f"\n{'metric':<14} {'baseline':>10} {'now':>10} {'change':>8}")
+    for metric in ("wall_ms", "cpu_ms", "peak_kib", "retained_kib"):
+        before, now = baseline.get(metric), result[metric]
+        if not before:
+            continue
+        change = (now - before) / before * 100
+        if metric != "retained_kib":
+            worst = max(worst, change)
+        print(f"{metric:<14} {before:>10.1f} {now:>10.1f} {change:>+7.1f}%")
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=["chat", "plan"], default="chat")
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--record", action="store_true", help="call the live model and write the cassette")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-scale", type=float, default=0.0)
+    parser.add_argument("--state", help="StateModel JSON for the plan scenario")
+    parser.add_argument("--json", help="write the measurements here")
+    parser.add_argument("--baseline", help="measurements of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, help="exit 1 if wall/cpu/peak grew by more than this %%")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="replay-bench-")
+    os.environ.setdefault("IDEA_STORE_PATH", os.path.join(scratch, "ideas.sqlite3"))
+    os.environ.setdefault("TIME_ESTIMATOR_DIR", os.path.join(scratch, "time_estimator"))
+    if not args.record:
+        os.environ.setdefault("gemini_api_key", "replay")   # read at import; replay never calls out
+    from tools.llm_provider import get_llm_provider
+
+    if args.record and os.path.exists(args.cassette):
+        os.remove(args.cassette)   # one cassette per recording session
+    cassette = Cassette(args.cassette, "record" if args.record else "replay", latency_scale=args.latency_scale)
+    provider = get_llm_provider()
+    provider.cassette = cassette   # before the DSPy LM is built, so recording turns its cache off
+    if args.scenario == "plan":
+        import dspy
+        dspy.configure(lm=provider.dspy_lm())
+        state = plan_state(args.state)
+        scenario = lambda run: run_plan(state)
+    else:
+        scenario = run_chat
+
+    if args.record:
+        scenario(0)
+        print(f"Recorded {cassette.recorded} calls to {args.cassette}")
+        return
+
+    scenario(-1)   # warm-up: imports, compiled graphs, lazily built clients
+    cassette.rewind()
+    print(f"{args.scenario}: replaying {len(cassette)} recorded calls at latency x{args.latency_scale}")
+
+    def replayed(run: int) -> None:
+        cassette.rewind()
+        scenario(run)
+
+    result = {"scenario": args.scenario, "latency_scale": args.latency_scale, **measure(replayed, args.runs)}
+    for metric, value in result.items():
+        print(f"{metric:<14} {value:>10.1f}" if isinstance(value, float) else f"{metric:<14} {value:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            worst = compare(result, json.load(f))
+        if args.max_regression is not None and worst > args.max_regression:
+            raise SystemExit(f"Regression of {worst:.1f}% exceeds {args.max_regression}%")
+
+
+if __name__ == "__main__":
+    main()
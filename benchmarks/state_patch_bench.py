@@ -0,0 +1,62 @@
+"""
+State patch benchmark: per-node overhead of apply_patch against whole-state revalidation.
+
+Run from the repo root:
+    $ python -m benchmarks.state_patch_bench --sizes 10 1000 20000
+"""
+import argparse
+import time
+
+from app.state import StateModel, apply_patch
+
+
+def make_state(size: int) -> StateModel:
+    """A state whose large fields (milestones, calendar, logs, history) hold `size` entries each."""
+    return StateModel(
+        user_id="bench",
+        session_id="bench",
+        milestones=[{"id": str(i), "title": f"Milestone {i}", "estimated_hours": 4, "week": i % 16 + 1} for i in range(size)],
+        calendar_conflicts=[{"start": 1_700_000_000 + i * 3600, "end": 1_700_001_800 + i * 3600, "title": "busy"} for i in range(size)],
+        calendar_data={"events": [{"uid": str(i), "summary": "event"} for i in range(size)]},
+        execution_history=[{"step": i, "result": "ok"} for i in range(size)],
+        log={"debug": [f"line {i}" for i in range(size)]},
+    )
+
+
+def node_patch(state: StateModel) -> dict:
+    """What a timeline-style node returns: a merged dict and one extra warning."""
+    return {"timeline": {**state.timeline, "timeline_weeks": 12}, "warnings": state.warnings + ["week 3 is busy"],
+            "current_node": "timeline"}
+
+
+def whole_state(state: StateModel, patch: dict) -> StateModel:
+    """The pre-patch path: mutate, then revalidate every field at the node boundary."""
+    return StateModel.model_validate({**state.model_dump(), **patch})
+
+
+def timed(fn, state: StateModel, repeat: int) -> float:
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        fn(state, node_patch(state))
+    return (time.perf_counter() - begin) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'apply_patch':>14} {'revalidate':>14} {'speedup':>9}")
+    for size in args.sizes:
+        state = make_state(size)
+        patched = apply_patch(state, node_patch(state))
+        assert patched.milestones is state.milestones, "untouched fields should be shared"
+        assert patched.timeline["timeline_weeks"] == 12 and state.timeline == {}
+        patch_us = timed(apply_patch, state, args.repeat)
+        full_us = timed(whole_state, state, max(args.repeat // 20, 3))
+        print(f"{size:>8} {patch_us:>11.1f} us {full_us:>11.1f} us {full_us / patch_us:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
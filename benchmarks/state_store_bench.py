@@ -0,0 +1,61 @@
+"""
+State store benchmark: bytes and time per chat turn with hot/cold sections against whole-state records.
+
+Run from the repo root:
+    $ python -m benchmarks.state_store_bench --sizes 10 1000 10000
+"""
+import argparse
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.codec import decode, encode
+from app.state_store import StateStore
+from benchmarks.codec_bench import make_state
+
+
+def chat_turn(state, turn: int):
+    """What a chat turn touches: messages, topic and a couple of workflow fields."""
+    state.messages = state.messages + [HumanMessage(content=f"question {turn}"), AIMessage(content=f"answer {turn}")]
+    state.current_topic = f"topic {turn}"
+    state.current_node = "chat"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'hot/cold bytes':>15} {'hot/cold time':>14} {'whole bytes':>12} {'whole time':>12}")
+    for size in args.sizes:
+        store = StateStore(":memory:")
+        store.save(make_state(size))
+
+        before = dict(store.stats)
+        begin = time.perf_counter()
+        for turn in range(args.turns):
+            state = store.load("bench")
+            chat_turn(state, turn)
+            store.save(state)
+        split_us = (time.perf_counter() - begin) / args.turns * 1e6
+        split_bytes = (store.stats["bytes_read"] - before["bytes_read"]
+                       + store.stats["bytes_written"] - before["bytes_written"]) / args.turns
+
+        state = store.load("bench")
+        assert not state.loaded_sections, "a chat turn should not touch cold sections"
+        assert len(state.milestones) == size and state.current_topic == f"topic {args.turns - 1}"
+
+        # Whole-state path: decode and re-encode the full record every turn
+        blob = encode(make_state(size))
+        begin = time.perf_counter()
+        for turn in range(args.turns):
+            full = decode(blob)
+            chat_turn(full, turn)
+            blob = encode(full)
+        whole_us = (time.perf_counter() - begin) / args.turns * 1e6
+        print(f"{size:>8} {split_bytes:>12.0f} B {split_us / 1000:>11.2f} ms {2 * len(blob):>10} B {whole_us / 1000:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
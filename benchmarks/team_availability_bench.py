@@ -0,0 +1,67 @@
+"""
+Team availability benchmark: bitmap build and common/k-of-n block queries.
+
+Run from the repo root:
+    $ python -m benchmarks.team_availability_bench --members 50 --weeks 16
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.person import Person
+from app.tools.TeamAvailability import TeamAvailability
+
+# A team spread over nearby timezones with overlapping evening/weekend hours, so common blocks exist
+TIMEZONES = ["Europe/London", "Europe/Lisbon", "Europe/Berlin", "Europe/Paris", "UTC"]
+HOURS = [["weekdays 17:00-22:00", "weekends 10am-6pm"], ["Mon-Thu evenings", "weekends afternoons"],
+         ["daily 16:00-22:00"], []]
+
+
+def make_team(members: int, weeks: int, events: int, start: datetime, seed: int):
+    rnd = random.Random(seed)
+    people, calendars = [], {}
+    for i in range(members):
+        person = Person(name=f"member-{i}", user_type="student",
+                        timezone=rnd.choice(TIMEZONES), preferred_working_hours=rnd.choice(HOURS))
+        busy = []
+        for _ in range(events):
+            begin = start + timedelta(minutes=15 * rnd.randrange(weeks * 7 * 96))
+            busy.append({"start": begin.isoformat(), "end": (begin + timedelta(hours=rnd.choice([1, 1.5, 2, 3]))).isoformat()})
+        people.append(person)
+        calendars[person.person_id] = busy
+    return people, calendars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--weeks", type=int, default=16)
+    parser.add_argument("--events", type=int, default=60, help="busy calendar events per member")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    start = datetime(2025, 1, 13, tzinfo=timezone.utc)
+    people, calendars = make_team(args.members, args.weeks, args.events, start, args.seed)
+
+    begin = time.perf_counter()
+    team = TeamAvailability.from_people(people, start, args.weeks, calendars)
+    matrix = team.matrix
+    built = time.perf_counter()
+    common = team.common_blocks()
+    quorum = team.quorum_blocks(max(1, args.members * 2 // 3))
+    done = time.perf_counter()
+
+    restored = TeamAvailability.from_state_field(team.state_fields()["team_availability"], start, args.weeks)
+    assert restored.member_ids == team.member_ids and (restored.matrix == matrix).all(), \
+        "team_availability state does not round-trip"
+
+    print(f"members={args.members} weeks={args.weeks} bitmap={matrix.shape} ({matrix.nbytes / 1024:.0f} KiB)")
+    print(f"build   {(built - begin) * 1e3:7.1f} ms")
+    print(f"queries {(done - built) * 1e3:7.1f} ms  common={len(common)} quorum={len(quorum)}")
+    if quorum:
+        print(f"best quorum block: {quorum[0]['start']} ({quorum[0]['hours']} h, {quorum[0]['available']} members)")
+
+
+if __name__ == "__main__":
+    main()
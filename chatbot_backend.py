@@ -18,25 +18,35 @@ Response: {
 """
 
 # ────────────────────────── 1.  Imports & setup ──────────────────────────
-import os, uuid
+import logging, os, uuid
 from typing import Annotated, List, TypedDict
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 #from langchain_tavily import TavilySearch     # ← keep if you add tools later
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.memory import MemorySaver
 
+from app.codec import CodecSerializer
+from app.tools.IdeaDedup import idea_filter
+from app.tools.IdeaStore import get_idea_store
+from tools.llm_provider import get_llm_provider
+from tools.metrics import instrument_app, instrument_node
+from tools.resilience import UpstreamUnavailable
+from tools.tracing import set_thread_id, trace_app, trace_node, traced_checkpointer
+
 # ────────────────────────── 2.  Env & LLM ────────────────────────────
+logger = logging.getLogger(__name__)
 load_dotenv()
 os.environ["GOOGLE_API_KEY"] = os.getenv("gemini_api_key")       # Gemini key (Google GenAI)
-llm = init_chat_model("google_genai:gemini-2.0-flash")
+llm = get_llm_provider()             # chat model is built on first call; slow calls are hedged
 
 # ────────────────────────── 3.  State schema ─────────────────────────
 def add_lists(old: List[str], new: List[str]) -> List[str]:
@@ -50,7 +60,11 @@ class State(TypedDict):
     document_context: str | None
 
 # ────────────────────────── 4.  Node definitions ─────────────────────
-def chatbot(state: State):
+MAX_REGENERATIONS = 2   # extra LLM calls allowed when a reply repeats a rejected idea
+
+@instrument_node("chatbot")
+@trace_node("chatbot")
+def chatbot(state: State, config: RunnableConfig):
     document_context = state.get('document_context', '')
     system = (
         "You are an idea-generation bot.\n"
@@ -60,7 +74,22 @@ def chatbot(state: State):
         "Return ONE new project idea (or ask up to 2 clarifying questions)."
     )
     prompt = [{"role": "system", "content": system}] + state["messages"]
-    return {"messages": [llm.invoke(prompt)]}
+
+    # The prompt only lists five rejections; the LSH index remembers all of them
+    thread_id = config.get("configurable", {}).get("thread_id")
+    idea_filter.record(thread_id, state["rejected_ideas"], "rejected")
+    reply = llm.invoke(prompt, call_type="chatbot")
+    for _ in range(MAX_REGENERATIONS):
+        match = idea_filter.check(thread_id, reply.content, kinds=["rejected"])
+        if match is None:
+            break
+        prompt = prompt + [{"role": "system", "content": (
+            f"Your draft repeats an idea the user already rejected:\n{match.text}\n"
+            "Propose a substantially different idea instead."
+        )}]
+        reply = llm.invoke(prompt, call_type="chatbot")
+    idea_filter.record(thread_id, [reply.content], "shown")
+    return {"messages": [reply]}
 
 def _last_ai_message(state: State) -> str:
     for m in reversed(state["messages"]):
@@ -75,11 +104,15 @@ def classify_intent(text: str) -> str:
         "Only say ACCEPT if the user clearly approves the ENTIRE idea.\n\n"
         f"User: {text}"
     )
-    return llm.invoke(instruction).content.strip().upper()
+    return llm.invoke(instruction, call_type="classify_intent").content.strip().upper()
 
+@instrument_node("chatbot", "router")
+@trace_node("chatbot", "router")
 def router_node(_: State) -> dict:
     return {}          # no-op; required update dict
 
+@instrument_node("chatbot")
+@trace_node("chatbot")
 def route_decision(state: State) -> str:
     intent = classify_intent(state["messages"][-1].content)
     if intent == "ACCEPT":
@@ -101,6 +134,8 @@ TEMPLATE = (
     "Project Timeline: {timeline}"
 )
 
+@instrument_node("chatbot")
+@trace_node("chatbot")
 def finalize(state: State):
     raw = _last_ai_message(state)            # most recent idea from assistant
     formatted = llm.invoke(
@@ -108,9 +143,14 @@ def finalize(state: State):
         "\n\n---\nGiven the text below, fill in the brackets ONLY. ONLY Fill in the template and bold the headers."
         "Dont make the description of the overview too long, make it easy to read for the user, but also "
         "make the overview detailed enough for a student to follow.\n\n" +
-        raw
+        raw,
+        call_type="finalize"
     ).content
     state["accepted_idea"] = formatted
+    try:
+        get_idea_store().add(formatted, source="accepted")   # accepted ideas rank higher for /generate reuse
+    except Exception:
+        logger.warning("Could not save the accepted idea to the idea store", exc_info=True)
     return {"messages": [AIMessage(content=formatted)]}
 
 # ────────────────────────── 5.  Build the graph ──────────────────────
@@ -127,7 +167,7 @@ graph_builder.add_conditional_edges(
 graph_builder.add_edge("chatbot", END)
 graph_builder.add_edge("finalize", END)
 
-graph = graph_builder.compile(checkpointer=MemorySaver())
+graph = graph_builder.compile(checkpointer=traced_checkpointer(MemorySaver(serde=CodecSerializer())))
 
 # ────────────────────────── 6.  FastAPI layer ────────────────────────
 app = FastAPI()
@@ -137,6 +177,8 @@ app.add_middleware(
     allow_methods=["POST"],
     allow_headers=["*"],
 )
+instrument_app(app, "chatbot_backend")    # request metrics + GET /metrics
+trace_app(app)                            # request spans; `python -m tools.tracing show <thread_id>`
 
 class ChatRequest(BaseModel):
     thread_id: str | None = None
@@ -157,6 +199,7 @@ class ChatResponse(BaseModel):
 def simple_chat(req: ChatRequest):
     # pick / reuse thread id
     thread_id = req.thread_id or uuid.uuid4().hex
+    set_thread_id(thread_id)
 
     # last user message = newest with role 'user'
     last_user = next(m for m in reversed(req.messages) if m["role"] == "user")
@@ -179,10 +222,16 @@ Please consider these guidelines when generating project ideas and responding to
         "document_context": document_context,
     }
     cfg = {"configurable": {"thread_id": thread_id}}
+    idea_filter.record(thread_id, req.rejected_ideas or [], "rejected")   # rejections the FE kept from earlier sessions
 
     final_state = None
-    for final_state in graph.stream(init_state, cfg, stream_mode="values"):
-        pass
+    try:
+        for final_state in graph.stream(init_state, cfg, stream_mode="values"):
+            pass
+    except UpstreamUnavailable as e:
+        # Fail fast with a retry hint rather than letting every client retry at once
+        return JSONResponse(status_code=503, content={"error": str(e)},
+                            headers={"Retry-After": str(max(1, round(e.retry_after)))})
 
     return ChatResponse(
         assistant_message = final_state["messages"][-1].content,
@@ -1,17 +1,26 @@
 # main.py  ---------------------------------------------------------------
 from fastapi import FastAPI, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from typing import List, Dict, Optional
-import os, uuid
-import google.generativeai as genai
+import os, uuid, json, logging
+import dspy
 from dotenv import load_dotenv
+from app.tools.IdeaDedup import idea_filter
+from app.tools.IdeaStore import get_idea_store
+from tools.hedged_lm import PredictorMetrics, PredictorSpans
+from tools.llm_provider import get_llm_provider
+from tools.metrics import instrument_app
+from tools.resilience import UpstreamUnavailable
+from tools.tracing import set_thread_id, trace_app
 
 # ───── Env & Gemini model ───────────────────────────────────────────────
+logger = logging.getLogger(__name__)
 load_dotenv()
-genai.configure(api_key=os.getenv("gemini_api_key"))
-gemini_model = genai.GenerativeModel("gemini-2.0-flash")
+llm = get_llm_provider()              # Gemini clients are built on first call, every call is hedged
+dspy.configure(lm=llm.dspy_lm(), callbacks=[PredictorMetrics(), PredictorSpans()])   # planning modules
 
 # ───── FastAPI instance & CORS ──────────────────────────────────────────
 app = FastAPI()
@@ -21,6 +30,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+instrument_app(app, "main")               # request metrics + GET /metrics (Prometheus text format)
+trace_app(app)                            # request spans → TRACE_PATH; `python -m tools.tracing show <id>`
+
+def _unavailable(e: UpstreamUnavailable) -> JSONResponse:
+    """503 with a Retry-After, so clients back off instead of retrying straight away."""
+    return JSONResponse(status_code=503, content={"error": str(e)},
+                        headers={"Retry-After": str(max(1, round(e.retry_after)))})
+
+IDEAS_PER_REQUEST = 6      # retrieve-first mode tops stored matches up to this many
+RETRIEVE_FIRST = os.getenv("IDEA_RETRIEVE_FIRST", "").lower() in ("1", "true", "yes")
 
 # ════════════════════════════════════════════════════════════════════════
 # 1)  GENERATE IDEAS (Gemini, no chat / memory)
@@ -32,9 +51,30 @@ class InputData(BaseModel):
     project_potential: str
     project_additional: str
     uploaded_document: Optional[dict] = None
+    thread_id: Optional[str] = None   # lets repeated /generate calls skip ideas already shown or rejected
+    retrieve_first: Optional[bool] = None   # serve stored matches before generating; defaults to IDEA_RETRIEVE_FIRST
 
 @app.post("/generate")
 def generate_ideas(data: InputData):
+    store = get_idea_store()
+    inputs = data.model_dump(include={"project_type", "project_interest", "project_technical", "project_potential", "project_additional"})
+
+    # Retrieve-first: stored strong matches the thread hasn't seen; uploaded guidelines always need fresh ideas
+    reused = []
+    use_store = data.retrieve_first if data.retrieve_first is not None else RETRIEVE_FIRST
+    if use_store and not (data.uploaded_document and data.uploaded_document.get('content')):
+        for match in store.search(inputs, limit=IDEAS_PER_REQUEST * 2):
+            if len(reused) < IDEAS_PER_REQUEST and idea_filter.check(data.thread_id, match["text"]) is None:
+                reused.append(match)
+    remaining = IDEAS_PER_REQUEST - len(reused)
+    if remaining <= 0:
+        store.mark_served(m["id"] for m in reused)
+        idea_filter.record(data.thread_id, [m["text"] for m in reused], "shown")
+        return {"ideas": [m["text"] for m in reused], "duplicates_removed": 0, "reused": len(reused)}
+    idea_count = str(remaining) if reused else "5-10"
+    avoid = "".join(f"\n    - {m['name']}" for m in reused)
+    avoid = f"\n\n    Do not repeat these existing ideas:{avoid}" if avoid else ""
+
     # Build the prompt with document content if available
     document_context = ""
     if data.uploaded_document and data.uploaded_document.get('content'):
@@ -50,16 +90,16 @@ Please consider these guidelines when generating project ideas.
     You are an extremely skilled idea generator, that can come up with extremely creative and applicable ideas for 
     projects for students/users that want to create projects either by themselves or in a group. These ideas may be fully thought out or 
     not thought out at all. Your job is to help them develop the idea into something concrete and adheres to their wishes, no matter 
-    how crazy the idea sounds. Specifically, you will take five inputs, and use the responses of the inputs to give the user a set of 5-10 concrete, creative, and applicable project ideas.
+    how crazy the idea sounds. Specifically, you will take five inputs, and use the responses of the inputs to give the user a set of {idea_count} concrete, creative, and applicable project ideas.
     
     Here are the inputs:
     - Project Type: {data.project_type}
     - Interest Domain: {data.project_interest}
     - Technical Skills: {data.project_technical}
     - Ideation Status: {data.project_potential}
-    - Additional Notes: {data.project_additional}{document_context}
+    - Additional Notes: {data.project_additional}{document_context}{avoid}
 
-    Please provide 5-10 project ideas. For each idea, use this exact format:
+    Please provide {idea_count} project ideas. For each idea, use this exact format:
 
     Project Name: [Name of the project]
     Project Overview: [Brief description of what the project does]
@@ -69,7 +109,10 @@ Please consider these guidelines when generating project ideas.
 
     Make sure each idea is separated by a blank line and follows this exact format.
     """
-    raw = gemini_model.generate_content(prompt).text.strip()
+    try:
+        raw = llm.generate(prompt, call_type="generate").strip()
+    except UpstreamUnavailable as e:
+        return _unavailable(e)
 
     # Split into individual ideas (same logic as before)
     ideas, current = [], []
@@ -80,7 +123,13 @@ Please consider these guidelines when generating project ideas.
             ideas.append("\n".join(current)); current = []
     if current:
         ideas.append("\n".join(current))
-    return {"ideas": ideas}
+
+    # Drop near-duplicates of each other and of ideas this thread already saw or rejected
+    idea_filter.record(data.thread_id, [m["text"] for m in reused], "shown")
+    ideas, repeats = idea_filter.filter(data.thread_id, ideas)
+    store.add_many(ideas, inputs)
+    store.mark_served(m["id"] for m in reused)
+    return {"ideas": [m["text"] for m in reused] + ideas, "duplicates_removed": len(repeats), "reused": len(reused)}
 
 # ════════════════════════════════════════════════════════════════════════
 # 2)  SIMPLE GEMINI CHAT  (unchanged)
@@ -112,13 +161,16 @@ async def simple_chat(request: Request):
         messages = body.get("messages", [])
 
         chat_history = [{"role": m["role"], "parts": [m["content"]]} for m in messages]
-        convo  = gemini_model.start_chat(history=chat_history)
-        reply  = convo.send_message(prompt_intro).text.strip()
+        reply  = llm.call("simple_chat", lambda: llm.gemini().start_chat(history=chat_history)
+                                                .send_message(prompt_intro).text,
+                          request={"history": chat_history, "prompt": prompt_intro}).strip()
 
         return JSONResponse(content={
             "assistant_message": reply,
             "final_idea": reply if reply.startswith("Project Name:") else None
         })
+    except UpstreamUnavailable as e:
+        return _unavailable(e)
     except Exception as e:
         print("🔥 simple-chat error:", e)
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -142,6 +194,7 @@ class LGResponse(BaseModel):
 @app.post("/lg-chat", response_model=LGResponse)
 def lg_chat(data: LGRequest = Body(...)):
     thread_id = data.thread_id or uuid.uuid4().hex
+    set_thread_id(thread_id)
     last_user = next(m for m in reversed(data.messages) if m["role"] == "user")
 
     init_state = {
@@ -153,12 +206,118 @@ def lg_chat(data: LGRequest = Body(...)):
 
     # run exactly one LangGraph pass
     final_state = None
-    for final_state in graph.stream(init_state, cfg, stream_mode="values"):
-        pass
+    try:
+        for final_state in graph.stream(init_state, cfg, stream_mode="values"):
+            pass
+    except UpstreamUnavailable as e:
+        return _unavailable(e)
 
     return LGResponse(
         assistant_message = final_state["messages"][-1].content,
         final_idea        = final_state.get("accepted_idea"),
         thread_id         = thread_id,
         is_final          = final_state.get("accepted_idea") is not None,
-    )
\ No newline at end of file
+    )
+
+# ════════════════════════════════════════════════════════════════════════
+# 4)  PLANNING PIPELINE  (/plan/stream)
+# ════════════════════════════════════════════════════════════════════════
+from app.state import StateModel
+from app.workflow import stream_plan
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@app.post("/plan/stream")
+async def plan_stream(state: StateModel = Body(...)):
+    """Server-sent events: one `node` event per finished planning node, `progress` events while
+    milestones are being scheduled, then `done` (or `error`)."""
+    set_thread_id(state.session_id)
+
+    async def events():
+        completed = []
+        try:
+            async for update in stream_plan(state):
+                if "progress" in update:
+                    yield _sse("progress", update)
+                    continue
+                completed.append(update["node"])
+                yield _sse("node", update)
+            yield _sse("done", {"session_id": state.session_id, "nodes": completed})
+        except Exception as e:
+            logger.exception("plan-stream error")
+            yield _sse("error", {"error": str(e), "nodes": completed})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ════════════════════════════════════════════════════════════════════════
+# 5)  PLANNING JOBS  (/jobs)
+# ════════════════════════════════════════════════════════════════════════
+from fastapi import Header
+from app.jobs import get_job_queue, QueueFull, UnknownJob
+
+jobs = get_job_queue()
+
+@app.on_event("startup")
+async def start_jobs():
+    await jobs.start()
+
+@app.on_event("shutdown")
+async def stop_jobs():
+    await jobs.stop()
+
+def _job_missing(job_id: str) -> JSONResponse:
+    return JSONResponse(status_code=404, content={"error": f"Unknown job {job_id}"})
+
+@app.post("/jobs", status_code=202)
+async def submit_job(state: StateModel = Body(...), kind: str = "plan", priority: int = 0):
+    """Queue a plan (or report) job and return its id at once; 429 when the queue is full."""
+    try:
+        return await jobs.submit(state, kind=kind, priority=priority)
+    except QueueFull as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": "30"})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str, include_result: bool = True):
+    try:
+        return jobs.status(job_id, include_result=include_result)
+    except UnknownJob:
+        return _job_missing(job_id)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    try:
+        return await jobs.cancel(job_id)
+    except UnknownJob:
+        return _job_missing(job_id)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, last_event_id: Optional[int] = Header(default=None)):
+    """Server-sent events for one job, replayed from the start (or after Last-Event-ID) until it finishes."""
+    try:
+        jobs.status(job_id)
+    except UnknownJob:
+        return _job_missing(job_id)
+
+    async def events():
+        async for event in jobs.subscribe(job_id, after=last_event_id or 0):
+            if event["event"] == "ping":
+                yield ": ping\n\n"
+                continue
+            yield f"id: {event['id']}\n" + _sse(event["event"], event["data"])
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ════════════════════════════════════════════════════════════════════════
+# 6)  LLM PROVIDER  (/llm/stats: hedging, retries, breaker state)
+# ════════════════════════════════════════════════════════════════════════
+@app.get("/llm/stats")
+def llm_stats():
+    """Breaker state, plus per call type: latency with and without hedging, extra calls, retries, failures."""
+    return {"hedging": llm.hedging, "budget": llm.budget, "breaker": llm.breaker.summary(), "calls": llm.stats()}
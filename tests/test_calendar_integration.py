@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+from app.state import StateModel, apply_patch
+from app.tools import CalendarIntegration
+from app.tools.CalendarIntegration import CalendarImporter
+
+ICS = """BEGIN:VCALENDAR
+BEGIN:VEVENT
+UID:standup
+SUMMARY:Standup
+DTSTART:20250303T090000Z
+DTEND:20250303T093000Z
+RRULE:FREQ=DAILY;COUNT=3
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def calendar(tmp_path, name="work.ics", text=ICS):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def state(**fields):
+    return StateModel(user_id="u", session_id="s", timeline={"start_date": "2025-03-03T00:00:00+00:00",
+                                                             "timeline_weeks": 1}, **fields)
+
+
+def test_apply_to_state_returns_a_patch_and_leaves_the_state_alone(tmp_path):
+    path = calendar(tmp_path)
+    before = state(calendar_conflicts=[{"start": "2025-03-04T12:00:00+00:00", "end": "2025-03-04T13:00:00+00:00",
+                                        "source": "other.ics"}])
+    patch = CalendarImporter(cache_dir=None).apply_to_state(before, path)
+    assert before.calendar_conflicts == [before.calendar_conflicts[0]] and before.calendar_data == {}
+
+    after = apply_patch(before, patch)
+    assert [c["source"] for c in after.calendar_conflicts] == ["other.ics", path, path, path]
+    assert after.calendar_data["sources"][path]["conflict_count"] == 3
+
+    # Re-importing the same file replaces its conflicts instead of adding them again
+    again = apply_patch(after, CalendarImporter(cache_dir=None).apply_to_state(after, path))
+    assert len(again.calendar_conflicts) == 4
+
+
+def test_in_memory_imports_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(CalendarIntegration, "MEMORY_ENTRIES", 2)
+    importer = CalendarImporter(cache_dir=None)
+    paths = [calendar(tmp_path, f"{i}.ics", ICS.replace("Standup", f"Standup {i}")) for i in range(3)]
+    for path in paths:
+        importer.apply_to_state(state(), path)
+    assert len(importer._memory) == 2
+    start = datetime(2025, 3, 3, tzinfo=timezone.utc)
+    assert importer.load(paths[-1], start, start + timedelta(weeks=1)).cached
@@ -0,0 +1,81 @@
+import ormsgpack
+import pytest
+from langchain_core.messages import (AIMessage, AIMessageChunk, ChatMessage, FunctionMessage, HumanMessage,
+                                     HumanMessageChunk, RemoveMessage, SystemMessage, ToolMessage)
+
+from app import codec
+from app.state import StateModel, TimeCommitment
+
+MESSAGES = [
+    HumanMessage("hello", id="m1"),
+    AIMessage("answer", id="m2", tool_calls=[{"name": "search", "args": {"q": "x"}, "id": "t1"}],
+              invalid_tool_calls=[{"name": "f", "args": "{", "id": "t2", "error": "bad json",
+                                   "type": "invalid_tool_call"}],
+              usage_metadata={"input_tokens": 3, "output_tokens": 5, "total_tokens": 8},
+              response_metadata={"model": "gemini"}),
+    SystemMessage("be brief"),
+    ChatMessage(content="looks fine", role="critic"),
+    ToolMessage("result", tool_call_id="t1"),
+    FunctionMessage("42", name="calc"),
+    AIMessageChunk("partial"),
+    HumanMessageChunk("typing"),
+    RemoveMessage(id="m1"),
+]
+
+
+def test_state_round_trip():
+    state = StateModel(user_id="u", session_id="s", interests=["music"], retry_count=2, errors=["e"],
+                       time_commitment=TimeCommitment(hours_per_week=6, timezone="Europe/Berlin"))
+    assert codec.decode(codec.encode(state)) == state
+    assert codec.decode(codec.encode(state), validate=True) == state
+
+
+def test_defaults_are_left_out():
+    small = codec.encode(StateModel(user_id="u", session_id="s"))
+    bigger = codec.encode(StateModel(user_id="u", session_id="s", interests=["music"]))
+    assert len(small) < len(bigger)
+
+
+def test_unknown_field_ids_are_skipped():
+    record = [codec.STATE_SCHEMA.tag, codec.STATE_SCHEMA.version, 1, "u", 2, "s", 999, "from a newer writer"]
+    state = codec.decode(ormsgpack.packb(record))
+    assert (state.user_id, state.session_id) == ("u", "s")
+
+
+def test_corrupt_bytes_raise_codec_error():
+    with pytest.raises(codec.CodecError):
+        codec.decode(b"\xc1not msgpack")
+    with pytest.raises(codec.CodecError):
+        codec.decode(ormsgpack.packb([12345, 1]))
+
+
+@pytest.mark.parametrize("message", MESSAGES, ids=lambda m: type(m).__name__)
+def test_message_round_trip(message):
+    restored = codec._messages_from_wire(codec._messages_to_wire([message]))[0]
+    assert type(restored) is type(message)
+    assert restored == message
+
+
+def test_chat_state_round_trip_keeps_request_dicts():
+    chat = {"messages": MESSAGES + [{"role": "user", "content": "raw"}], "rejected_ideas": ["a"],
+            "preferences": [], "accepted_idea": None}
+    restored = codec.decode(codec.encode_chat_state(chat))
+    assert restored["messages"] == chat["messages"]
+    assert restored["rejected_ideas"] == ["a"]
+
+
+def test_legacy_message_wire_form_still_decodes():
+    restored = codec._messages_from_wire([["human", "hi"], ["ai", "yo", {"id": "m2"}], ["user", "tuple-like"]])
+    assert restored[:2] == [HumanMessage("hi"), AIMessage("yo", id="m2")]
+    assert restored[2] == ["user", "tuple-like"]
+
+
+def test_checkpoint_serializer_round_trips_messages_and_models():
+    serde = codec.CodecSerializer()
+    kind, data = serde.dumps_typed(MESSAGES)
+    assert kind == serde.MESSAGES_TYPE
+    assert serde.loads_typed((kind, data)) == MESSAGES
+    state = StateModel(user_id="u", session_id="s")
+    assert serde.loads_typed(serde.dumps_typed(state)) == state
+    assert serde.loads_typed(serde.dumps_typed({"plain": [1, 2]})) == {"plain": [1, 2]}
+
@@ -0,0 +1,40 @@
+from app.tools import IdeaDedup
+from app.tools.IdeaDedup import IdeaDeduplicator
+
+REJECTED = ["A habit tracker app with streaks and reminders", "A recipe recommender using pantry photos"]
+
+
+def count_signatures(monkeypatch):
+    calls = []
+
+    def counted(text):
+        calls.append(text)
+        return signature(text)
+
+    signature = IdeaDedup.signature
+    monkeypatch.setattr(IdeaDedup, "signature", counted)
+    return calls
+
+
+def test_recording_a_growing_list_only_signs_new_ideas(monkeypatch):
+    dedup = IdeaDeduplicator(use_global=True)
+    calls = count_signatures(monkeypatch)
+    dedup.record("t", REJECTED, "rejected")
+    dedup.record("t", REJECTED + ["A chess opening trainer"], "rejected")
+    assert calls == REJECTED + ["A chess opening trainer"]
+    assert len(dedup.index_for("t")) == 3 and len(dedup.global_index) == 3
+
+
+def test_re_recording_upgrades_a_shown_idea_to_rejected():
+    dedup = IdeaDeduplicator()
+    dedup.record("t", REJECTED[:1], "shown")
+    assert dedup.check("t", REJECTED[0], kinds=["rejected"]) is None
+    dedup.record("t", REJECTED[:1], "rejected")
+    assert dedup.check("t", "a habit tracker app with streaks and daily reminders", kinds=["rejected"]).kind == "rejected"
+
+
+def test_rejections_reach_the_global_index_even_when_the_thread_knows_them():
+    dedup = IdeaDeduplicator(use_global=True)
+    dedup.record("t", REJECTED, "shown")
+    dedup.record("t", REJECTED, "rejected")
+    assert dedup.check("other", REJECTED[1], kinds=["rejected"]).kind == "rejected"
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.jobs import JobQueue, QueueFull
+from app.state import StateModel
+
+
+def state(session_id):
+    return StateModel(user_id="u", session_id=session_id)
+
+
+async def wait_until(queue, job_id, *statuses):
+    for _ in range(500):
+        if queue.status(job_id)["status"] in statuses:
+            return queue.status(job_id)
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {queue.status(job_id)['status']}")
+
+
+def test_higher_priority_runs_first_then_fifo(tmp_path):
+    ran = []
+
+    async def record(state, emit):
+        ran.append(state.session_id)
+        return state
+
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=1, runners={"plan": record})
+        jobs = [await queue.submit(state("low-1")), await queue.submit(state("high"), priority=5),
+                await queue.submit(state("low-2"))]
+        assert [queue.status(j["job_id"])["queue_position"] for j in jobs] == [1, 0, 2]
+        await queue.start()
+        for job in jobs:
+            await wait_until(queue, job["job_id"], "succeeded")
+        await queue.stop()
+        assert queue.result(jobs[1]["job_id"]).session_id == "high"
+
+    asyncio.run(scenario())
+    assert ran == ["high", "low-1", "low-2"]
+
+
+def test_queue_rejects_submissions_past_max_depth(tmp_path):
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.sqlite3"), max_depth=1)
+        await queue.submit(state("a"))
+        with pytest.raises(QueueFull):
+            await queue.submit(state("b"))
+
+    asyncio.run(scenario())
+
+
+def test_cancel_queued_and_running_jobs(tmp_path):
+    started = []
+
+    async def block(state, emit):
+        started.append(state.session_id)
+        await asyncio.Event().wait()
+
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=1, runners={"plan": block})
+        running, queued = await queue.submit(state("running")), await queue.submit(state("queued"))
+        assert (await queue.cancel(queued["job_id"]))["status"] == "cancelled"
+        await queue.start()
+        await wait_until(queue, running["job_id"], "running")
+        await queue.cancel(running["job_id"])
+        await wait_until(queue, running["job_id"], "cancelled")
+        await queue.stop()
+        return [e["event"] for e in queue.events(queued["job_id"])], [e["event"] for e in queue.events(running["job_id"])]
+
+    queued_events, running_events = asyncio.run(scenario())
+    assert started == ["running"]
+    assert queued_events == ["queued", "cancelled"]
+    assert running_events == ["queued", "started", "cancelled"]
+
+
+def test_jobs_interrupted_by_a_stop_are_requeued_and_finish_on_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    calls = []
+
+    async def block_once(state, emit):
+        calls.append(state.session_id)
+        if len(calls) == 1:
+            await asyncio.Event().wait()
+        emit("progress", {"step": "done"})
+        return state
+
+    async def scenario():
+        first = JobQueue(path, workers=1, runners={"plan": block_once})
+        job = await first.submit(state("s"))
+        await first.start()
+        await wait_until(first, job["job_id"], "running")
+        await first.stop()
+        assert first.status(job["job_id"])["status"] == "queued"
+
+        second = JobQueue(path, workers=1, runners={"plan": block_once})
+        await second.start()
+        await wait_until(second, job["job_id"], "succeeded")
+        await second.stop()
+        return [e["event"] for e in second.events(job["job_id"])]
+
+    events = asyncio.run(scenario())
+    assert calls == ["s", "s"]
+    assert events == ["queued", "started", "started", "progress", "succeeded"]
+
+
+def test_failed_job_keeps_the_error_and_logs_the_traceback(tmp_path, caplog):
+    async def boom(state, emit):
+        raise RuntimeError("model unavailable")
+
+    async def scenario():
+        queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=1, runners={"plan": boom})
+        job = await queue.submit(state("s"))
+        await queue.start()
+        status = await wait_until(queue, job["job_id"], "failed")
+        await queue.stop()
+        return status
+
+    with caplog.at_level(logging.ERROR, logger="app.jobs"):
+        status = asyncio.run(scenario())
+    assert status["error"] == "model unavailable"
+    assert any(r.exc_info and "model unavailable" in str(r.exc_info[1]) for r in caplog.records)
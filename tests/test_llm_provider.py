@@ -0,0 +1,69 @@
+import asyncio
+import itertools
+import threading
+import time
+
+from tools.llm_provider import LLMProvider
+from tools.resilience import CircuitBreaker
+
+
+def provider(**kwargs):
+    return LLMProvider(hedging=True, min_samples=5, breaker=CircuitBreaker("test"), **kwargs)
+
+
+def warmed(llm, call_type, samples=5):
+    for _ in range(samples):
+        llm.call(call_type, lambda: "fast")
+
+
+def test_slow_call_is_hedged_and_the_hedge_wins():
+    llm = provider(budget=1.0)
+    warmed(llm, "t")
+    release = threading.Event()
+    calls = itertools.count()
+
+    def slow_then_fast():
+        if next(calls) == 0:
+            release.wait(2)
+            return "primary"
+        return "hedge"
+
+    assert llm.call("t", slow_then_fast) == "hedge"
+    release.set()
+    stats = llm.stats()["t"]
+    assert (stats["calls"], stats["hedged"], stats["hedge_wins"]) == (6, 1, 1)
+
+
+def test_hedges_stay_within_the_budget():
+    llm = provider(budget=0.0)
+    warmed(llm, "t")
+    assert llm.call("t", lambda: time.sleep(0.02) or "primary") == "primary"
+    assert llm.stats()["t"]["hedged"] == 0
+
+
+def test_async_hedge_cancels_the_losing_request():
+    llm = provider(budget=1.0)
+    cancelled = []
+    calls = itertools.count()
+
+    async def fast():
+        return "fast"
+
+    async def slow_then_fast():
+        if next(calls) == 0:
+            try:
+                await asyncio.sleep(2)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return "primary"
+        return "hedge"
+
+    async def scenario():
+        for _ in range(5):
+            await llm.acall("t", fast)
+        return await llm.acall("t", slow_then_fast)
+
+    assert asyncio.run(scenario()) == "hedge"
+    assert cancelled == [True]
+    assert llm.stats()["t"]["hedge_wins"] == 1
@@ -0,0 +1,87 @@
+import random
+
+from app.tools.MilestoneGraph import MilestoneGraph, StreamingOrder, parse_weekly_hours
+
+
+def ms(mid, hours=10, deps=(), title=None):
+    return {"id": mid, "title": title or f"Milestone {mid}", "estimated_hours": hours, "depends_on": list(deps)}
+
+
+def streamed_order(milestones):
+    order = StreamingOrder()
+    released = [m for milestone in milestones for m in order.add(milestone)]
+    return released, order.pending
+
+
+def batch_order(milestones):
+    graph = MilestoneGraph(milestones)
+    return [graph.milestones[i] for i in graph.topological_order()]
+
+
+def test_dependency_respecting_list_keeps_its_order():
+    plan = [ms("a"), ms("b", deps=["a"]), ms("c"), ms("d", deps=["b", "c"])]
+    assert [m["id"] for m in batch_order(plan)] == ["a", "b", "c", "d"]
+
+
+def test_forward_links_wait_for_their_dependency():
+    plan = [ms("a", deps=["c"]), ms("b"), ms("c")]
+    assert [m["id"] for m in batch_order(plan)] == ["b", "c", "a"]
+    assert streamed_order(plan) == (batch_order(plan), 0)
+
+
+def test_streaming_matches_batch_on_random_dags():
+    rnd = random.Random(7)
+    for _ in range(300):
+        n = rnd.randint(1, 12)
+        ranks = list(range(n))
+        rnd.shuffle(ranks)   # list order differs from dependency order, so links point forward too
+        plan = []
+        for i in range(n):
+            deps = [str(j) for j in range(n) if ranks[j] < ranks[i] and rnd.random() < 0.3]
+            link = lambda d: f"Milestone {d}".upper() if rnd.random() < 0.2 else d   # some by title
+            plan.append(ms(str(i), deps=[link(d) for d in deps]))
+        released, pending = streamed_order(plan)
+        assert pending == 0
+        assert released == batch_order(plan)
+
+
+def test_cycle_is_reported_and_stays_pending_when_streamed():
+    plan = [ms("a", deps=["b"]), ms("b", deps=["a"]), ms("c")]
+    analysis = MilestoneGraph(plan).analyze(10, 4)
+    assert not analysis.feasible and "cycle" in analysis.issues[-1]
+    assert streamed_order(plan)[1] == 2
+
+
+def test_duplicate_ids_resolve_to_the_first_everywhere():
+    plan = [ms("1", title="Setup"), ms("1", title="Polish", deps=["2"]), ms("2", deps=["1"])]
+    graph = MilestoneGraph(plan)
+    analysis = graph.analyze(10, 10)
+    assert graph.ids == ["1", "1-2", "2"]
+    assert any("Duplicate milestone id '1'" in issue for issue in analysis.issues)
+    assert analysis.order == ["1", "2", "1-2"]
+    released, pending = streamed_order(plan)
+    assert pending == 0 and released == batch_order(plan)
+    ordered = graph.ordered_milestones(analysis)
+    assert [m["id"] for m in ordered] == ["1", "2", "1-2"] and ordered[2]["depends_on"] == ["2"]
+
+
+def test_critical_path_slack_and_capacity():
+    plan = [ms("a", 20), ms("b", 10, ["a"]), ms("c", 5, ["a"]), ms("d", 10, ["b", "c"])]
+    analysis = MilestoneGraph(plan).analyze(hours_per_week=10, timeline_weeks=5)
+    assert analysis.critical_path == ["a", "b", "d"]
+    assert analysis.critical_path_weeks == 4.0
+    assert analysis.slack["c"] == 1.5 and analysis.slack["b"] == 1.0
+    assert analysis.feasible
+    tight = MilestoneGraph(plan).analyze(hours_per_week=10, timeline_weeks=3)
+    assert not tight.feasible and any("Critical path" in issue for issue in tight.issues)
+
+
+def test_unknown_links_are_reported():
+    analysis = MilestoneGraph([ms("a", deps=["zzz"])]).analyze(10, 4)
+    assert analysis.order == ["a"] and "unknown milestone 'zzz'" in analysis.issues[0]
+
+
+def test_parse_weekly_hours():
+    assert parse_weekly_hours("8-10 hours") == 9.0
+    assert parse_weekly_hours(6) == 6.0
+    assert parse_weekly_hours("flexible") is None
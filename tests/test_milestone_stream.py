@@ -0,0 +1,67 @@
+import os
+
+import dspy
+import pytest
+from dspy.utils.exceptions import AdapterParseError
+
+os.environ.setdefault("gemini_api_key", "test")
+
+from app.modules import MilestoneGen
+from app.modules.MilestoneGen import MilestoneGenerator
+
+FINAL = dspy.Prediction(milestone_list=[{"id": "a"}, {"id": "b"}])
+
+
+def response(text):
+    return dspy.streaming.StreamResponse(predict_name="milestone_breakdown", signature_field_name="milestone_list",
+                                         chunk=text, is_last_chunk=False)
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    def stream_then(error):
+        def streamify(program, **kwargs):
+            def stream(**inputs):
+                yield response('[{"id": "a"}, {"id": "b"}')
+                if error:
+                    raise error
+                yield FINAL
+            return stream
+        monkeypatch.setattr(MilestoneGen.dspy, "streamify", streamify)
+
+    gen = MilestoneGenerator()
+    gen.calls = []
+    monkeypatch.setattr(gen, "milestone_breakdown", lambda **inputs: gen.calls.append(inputs) or FINAL)
+    gen.stream_then = stream_then
+    return gen
+
+
+def run_stream(gen):
+    holder, resets = {}, []
+    items = list(gen._stream_breakdown({"goal": "x"}, holder, resets.append))
+    return items, holder, resets
+
+
+def test_completed_stream_keeps_its_prediction(generator):
+    generator.stream_then(None)
+    items, holder, resets = run_stream(generator)
+    assert items == [{"id": "a"}]
+    assert holder["prediction"] is FINAL
+    assert resets == [] and generator.calls == []
+
+
+@pytest.mark.parametrize("error", [AdapterParseError("ChatAdapter", dspy.Signature("a -> b"), "bad", "{"),
+                                   ConnectionError("reset by peer"), ValueError("bad json")])
+def test_upstream_and_parse_failures_reset_before_falling_back(generator, error):
+    generator.stream_then(error)
+    items, holder, resets = run_stream(generator)
+    assert items == [{"id": "a"}]
+    assert len(resets) == 1 and str(error) in resets[0]
+    assert holder["prediction"] is FINAL and generator.calls == [{"goal": "x"}]
+
+
+def test_programming_errors_are_not_swallowed(generator):
+    generator.stream_then(KeyError("milestone_list"))
+    with pytest.raises(KeyError):
+        run_stream(generator)
+    assert generator.calls == []
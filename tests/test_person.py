@@ -0,0 +1,73 @@
+import os
+
+import ormsgpack
+import pytest
+
+from app import codec
+from app.person import Person, migrate_completed_tasks
+from app.tools import TaskLog
+
+TASKS = [{"hours": 2, "milestone": "m1", "completed_at": "2025-01-01T00:00:00"}, {"hours": 1.5}]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = TaskLog.TaskLogStore(str(tmp_path))
+    monkeypatch.setattr(TaskLog, "_default_store", store)
+    return store
+
+
+def test_validation_has_no_task_log_side_effects(store, tmp_path):
+    with pytest.raises(ValueError, match="migrate_completed_tasks"):
+        Person.model_validate({"person_id": "p1", "name": "Ada", "user_type": "student", "completed_tasks": TASKS})
+    assert Person.model_validate({"name": "Ada", "user_type": "student", "completed_tasks": []})
+    assert not os.listdir(tmp_path)
+
+
+def test_migration_is_explicit_and_idempotent(store):
+    legacy = {"person_id": "p1", "name": "Ada", "user_type": "student", "completed_tasks": TASKS}
+    person = Person.model_validate(migrate_completed_tasks(dict(legacy)))
+    assert len(person.task_log) == 2 and person.task_log.total_hours == 3.5
+    Person.model_validate(migrate_completed_tasks(dict(legacy)))
+    assert len(store.get("p1")) == 2
+
+
+def test_migration_needs_an_id(store):
+    with pytest.raises(ValueError, match="person_id"):
+        migrate_completed_tasks({"name": "Ada", "user_type": "student", "completed_tasks": TASKS})
+
+
+def test_codec_v1_record_migrates_once(store):
+    record = ormsgpack.packb([codec.PERSON_SCHEMA.tag, 1, 1, "legacy-1", 2, "Ada", 4, "student", 16, TASKS])
+    person = codec.decode(record)
+    assert person.person_id == "legacy-1" and "completed_tasks" not in person.__dict__
+    codec.decode(record, validate=True)
+    assert len(person.task_log) == 2
+    assert codec.decode(codec.encode(person)).person_id == "legacy-1"
+
+
+@pytest.mark.parametrize("bad", ["../x", "a/b", "a\\b", "..", "."])
+def test_path_like_log_ids_are_rejected(store, bad):
+    with pytest.raises(ValueError):
+        Person(name="Ada", user_type="student", task_log_id=bad)
+    with pytest.raises(ValueError):
+        Person(name="Ada", user_type="student", person_id=bad).task_log
+    with pytest.raises(ValueError):
+        store.get(bad)
+
+
+def test_task_logs_do_not_hold_file_descriptors(store):
+    before = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+    for i in range(50):
+        store.get(f"person-{i}").append(1.0, "m1")
+    if before is not None:
+        assert len(os.listdir("/proc/self/fd")) <= before + 1
+
+
+def test_task_log_reloads_from_disk(tmp_path):
+    log = TaskLog.TaskLog("p1", str(tmp_path))
+    log.append(2.0, "m1", timestamp="2025-01-06T10:00:00")
+    log.append(1.0, "m2", status="blocked", timestamp="2025-01-07T10:00:00")
+    reloaded = TaskLog.TaskLog("p1", str(tmp_path))
+    assert reloaded.summary() == log.summary()
+    assert reloaded.events() == log.events()
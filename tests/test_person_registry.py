@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+from app.person import Person
+from app.tools.PersonRegistry import PersonRegistry, utc_offset_hours
+
+WINTER = datetime(2025, 1, 15, tzinfo=timezone.utc)
+SUMMER = datetime(2025, 7, 15, tzinfo=timezone.utc)
+
+
+def person(person_id, tz, skills=("python",)):
+    return Person(person_id=person_id, name=person_id, user_type="student", technical_skills=list(skills), timezone=tz)
+
+
+def registry():
+    return PersonRegistry([person("ny", "America/New_York"), person("utc", "UTC"), person("mars", "Mars/Base"),
+                           person("none", None), person("tokyo", "Asia/Tokyo", skills=("go",))])
+
+
+def test_offsets_are_resolved_when_the_query_runs():
+    people = registry()
+    assert people.find_ids(utc_offset=(-5, -5), at=WINTER) == {"ny"}
+    assert people.find_ids(utc_offset=(-5, -5), at=SUMMER) == set()
+    assert people.find_ids(utc_offset=(-4, 0), at=SUMMER) == {"ny", "utc"}
+
+
+def test_unknown_zones_are_left_out_of_offset_queries():
+    people = registry()
+    assert utc_offset_hours("Mars/Base") is None
+    assert people.find_ids(utc_offset=(-12, 14), at=WINTER) == {"ny", "utc", "tokyo"}
+    assert "mars" in people.find_ids(skills=["python"])
+
+
+def test_offset_filter_combines_with_other_filters_and_updates():
+    people = registry()
+    assert people.find_ids(skills=["go"], utc_offset=(8, 10), at=WINTER) == {"tokyo"}
+    people.update(person("tokyo", "Europe/Berlin", skills=("go",)))
+    assert people.find_ids(skills=["go"], utc_offset=(8, 10), at=WINTER) == set()
+    assert people.find_ids(utc_offset=(1, 1), at=WINTER) == {"tokyo"}
+    people.remove("ny")
+    assert people.find_ids(utc_offset=(-5, -5), at=WINTER) == set()
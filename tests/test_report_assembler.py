@@ -0,0 +1,27 @@
+from app.modules.ReportAssembler import ReportAssembler
+from app.state import StateModel, TimeCommitment
+from app.tools.TimelineSolver import TimelineSolver, conflict_index, get_zone
+
+CONFLICTS = [
+    {"start": "2025-03-03T02:00", "end": "2025-03-03T03:00", "title": "inside, in New York time"},
+    {"start": "2025-03-10T02:00", "end": "2025-03-10T03:00", "title": "after the first week, in New York time"},
+]
+
+
+def state(**fields):
+    return StateModel(user_id="u", session_id="s", calendar_conflicts=CONFLICTS,
+                      time_commitment=TimeCommitment(timezone="America/New_York"), **fields)
+
+
+def test_conflict_window_reads_naive_times_in_the_users_zone():
+    # Week 1 starts at local midnight, stored in UTC as the solver does
+    report_state = state(timeline={"start_date": "2025-03-03T05:00:00+00:00", "timeline_weeks": 1})
+    conflicts = ReportAssembler()._conflicts_in_window(report_state)
+    assert [c["title"] for c in conflicts] == ["inside, in New York time"]
+
+
+def test_report_and_solver_share_the_conflict_index():
+    solver = TimelineSolver(TimeCommitment(timezone="America/New_York"))
+    packer = solver.packer([], CONFLICTS, 1)
+    assert conflict_index(CONFLICTS, get_zone("America/New_York")) is packer.conflicts
+    assert conflict_index(CONFLICTS, get_zone("UTC")) is not packer.conflicts
@@ -0,0 +1,86 @@
+import itertools
+import time
+
+import pytest
+
+from tools.llm_provider import LLMProvider
+from tools.resilience import CircuitBreaker, CircuitOpen, RetriesExhausted, RetryPolicy, call_ledger, is_retryable
+
+
+def provider(retries=3, failures=5, reset=30.0, **kwargs):
+    return LLMProvider(hedging=kwargs.pop("hedging", False), retry=RetryPolicy(retries=retries, base_delay=0),
+                       breaker=CircuitBreaker("test", failures=failures, reset_timeout=reset), **kwargs)
+
+
+def flaky(failures, error=ConnectionError):
+    calls = itertools.count(1)
+
+    def fn():
+        if next(calls) <= failures:
+            raise error("upstream hiccup")
+        return "ok"
+    return fn
+
+
+def test_retryable_errors():
+    class RateLimitError(Exception):
+        pass
+
+    class BadRequest(Exception):
+        status_code = 400
+
+    assert is_retryable(ConnectionError()) and is_retryable(TimeoutError()) and is_retryable(RateLimitError())
+    assert not is_retryable(BadRequest()) and not is_retryable(ValueError())
+
+
+def test_retries_are_counted_on_the_ledger_and_stats():
+    llm = provider()
+    with call_ledger() as ledger:
+        assert llm.call("t", flaky(2)) == "ok"
+    assert (ledger.retries, ledger.errors) == (2, [])
+    stats = llm.stats()["t"]
+    assert (stats["calls"], stats["errors"], stats["retries"], stats["failures"]) == (3, 2, 2, 0)
+    assert llm.breaker.state == "closed" and llm.breaker.consecutive_failures == 0
+
+
+def test_exhausted_retries_fail_once_with_every_retry_counted():
+    llm = provider(retries=2)
+    with call_ledger() as ledger, pytest.raises(RetriesExhausted):
+        llm.call("t", flaky(10))
+    assert ledger.retries == 2 and len(ledger.errors) == 1 and ledger.errors[0].startswith("t: failed after 3")
+    assert llm.stats()["t"]["failures"] == 1
+
+
+def test_non_retryable_errors_are_not_retried_and_leave_the_breaker_alone():
+    llm = provider()
+    with call_ledger() as ledger, pytest.raises(ValueError):
+        llm.call("t", flaky(1, ValueError))
+    assert ledger.retries == 0 and ledger.errors == ["t: upstream hiccup"]
+    assert llm.breaker.consecutive_failures == 0
+
+
+def test_breaker_opens_fails_fast_and_closes_after_a_good_trial():
+    llm = provider(retries=5, failures=2, reset=0.05)
+    fn = flaky(2)
+    with pytest.raises(CircuitOpen):
+        llm.call("t", fn)
+    assert llm.breaker.state == "open" and llm.breaker.times_opened == 1
+
+    never = lambda: pytest.fail("called upstream while the breaker was open")
+    with pytest.raises(CircuitOpen):
+        llm.call("t", never)
+    assert llm.breaker.rejected == 2
+
+    time.sleep(0.06)
+    assert llm.call("t", fn) == "ok"
+    assert llm.breaker.state == "closed"
+
+
+def test_failed_trial_reopens_the_breaker():
+    llm = provider(retries=0, failures=1, reset=0.01)
+    with pytest.raises(RetriesExhausted):
+        llm.call("t", flaky(10))
+    time.sleep(0.02)
+    with pytest.raises(RetriesExhausted):
+        llm.call("t", flaky(10))
+    assert llm.breaker.state == "open" and llm.breaker.times_opened == 2
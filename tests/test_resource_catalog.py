@@ -0,0 +1,20 @@
+from app.modules.MilestoneGen import LEARNING_PATH_RESOURCES, MilestoneGenerator
+from app.state import StateModel
+from app.tools.ResourceCatalog import ResourceCatalog, load_catalog
+
+
+def test_recommend_matches_project_type_and_skill_gaps():
+    results = load_catalog().recommend("web app", "simple", "javascript", k=3)
+    assert len(results) == 3
+    assert results == sorted(results, key=lambda r: -r["score"])
+    assert any("javascript" in r.get("skills", []) for r in results)
+
+
+def test_learning_path_is_seeded_from_the_catalog():
+    state = StateModel(user_id="u", session_id="s", project_type="web app", complexity_level="simple",
+                       skill_gaps="javascript, html", recommended_resources=["Picked by the classifier"])
+    resources = MilestoneGenerator._learning_resources(state)
+    assert resources[0] == "Picked by the classifier"
+    catalog = {ResourceCatalog.format(r) for r in load_catalog().recommend("web app", "simple", "javascript, html",
+                                                                           k=LEARNING_PATH_RESOURCES)}
+    assert set(resources[1:]) <= catalog and len(resources) == LEARNING_PATH_RESOURCES
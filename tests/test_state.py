@@ -0,0 +1,87 @@
+from langgraph.graph import StateGraph, START, END
+
+from app.state import StateModel, apply_patch, reset_patch
+from app.workflow import tracked
+from tools.resilience import current_ledger
+
+
+def make_state(**fields) -> StateModel:
+    return StateModel(user_id="u", session_id="s", **fields)
+
+
+def test_apply_patch_leaves_original_unchanged():
+    state = make_state(learning_goal="old")
+    patched = apply_patch(state, {"learning_goal": "new"})
+    assert patched.learning_goal == "new" and state.learning_goal == "old"
+
+
+def test_apply_patch_rejects_unknown_fields():
+    try:
+        apply_patch(make_state(), {"not_a_field": 1})
+    except ValueError as e:
+        assert "not_a_field" in str(e)
+    else:
+        raise AssertionError("unknown field accepted")
+
+
+def test_apply_patch_validates_patched_fields():
+    try:
+        apply_patch(make_state(), {"project_completeness": 2.0})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("out-of-range value accepted")
+
+
+def test_reducer_fields_accumulate_and_keep_repeats():
+    state = apply_patch(make_state(), {"retry_count": 2, "errors": ["timeline: 429"]})
+    state = apply_patch(state, {"retry_count": 1, "errors": ["timeline: 429", "milestones: 503"]})
+    assert state.retry_count == 3
+    assert state.errors == ["timeline: 429", "timeline: 429", "milestones: 503"]
+
+
+def test_reset_patch_clears_reducer_fields():
+    state = make_state(retry_count=3, errors=["e1"])
+    cleared = apply_patch(state, reset_patch())
+    assert cleared.retry_count == 0 and cleared.errors == []
+    assert apply_patch(state, reset_patch("errors")).retry_count == 3
+
+
+def _graph(*nodes):
+    builder = StateGraph(StateModel)
+    for name, node in nodes:
+        builder.add_node(name, node)
+        builder.add_edge(START, name)
+        builder.add_edge(name, END)
+    return builder.compile()
+
+
+def test_parallel_branches_sum_retries_and_keep_all_errors():
+    def failing(label, retries):
+        def node(state):
+            return {"retry_count": retries, "errors": [f"{label}: 429"]}
+        return node
+
+    final = _graph(("a", failing("timeline", 2)), ("b", failing("timeline", 3))).invoke(
+        make_state(retry_count=1, errors=["earlier"]))
+    assert final["retry_count"] == 6
+    assert sorted(final["errors"]) == ["earlier", "timeline: 429", "timeline: 429"]
+
+
+def test_reset_through_the_graph():
+    final = _graph(("reset", lambda state: reset_patch())).invoke(make_state(retry_count=4, errors=["e1"]))
+    assert final["retry_count"] == 0 and final["errors"] == []
+
+
+def test_tracked_reports_ledger_deltas():
+    def node(state):
+        ledger = current_ledger()
+        ledger.retries += 2
+        ledger.errors.append("report: 429")
+        return {"learning_goal": "done"}
+
+    state = make_state(retry_count=5, errors=["old"])
+    patch = tracked("report", node)(state)
+    assert patch["retry_count"] == 2 and patch["errors"] == ["report: 429"]
+    patched = apply_patch(state, patch)
+    assert patched.retry_count == 7 and patched.errors == ["old", "report: 429"]
@@ -0,0 +1,64 @@
+import pytest
+
+from app.state import StateModel, apply_patch
+from app.state_store import COLD_SECTIONS, LazyStateModel, StateStore
+
+MILESTONES = [{"id": "m1", "title": "Setup", "estimated_hours": 4}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StateStore(str(tmp_path / "state.sqlite3"))
+
+
+def saved(store, **fields):
+    state = StateModel(user_id="u", session_id="s", project_goal="a todo app", milestones=MILESTONES,
+                       calendar_data={"sources": {}}, **fields)
+    store.save(state)
+    return state
+
+
+def test_load_reads_the_hot_record_only_until_a_section_is_touched(store):
+    original = saved(store)
+    loaded = store.load("s")
+    assert isinstance(loaded, LazyStateModel) and loaded.loaded_sections == []
+    assert loaded.project_goal == "a todo app"
+    assert loaded.milestones == MILESTONES and loaded.loaded_sections == ["milestones"]
+    assert loaded == original and loaded.loaded_sections == list(COLD_SECTIONS)
+
+
+def test_unchanged_sections_are_not_written_back(store):
+    saved(store)
+    loaded = store.load("s")
+    loaded.milestones, loaded.calendar_data
+    assert store.save(loaded)["sections_written"] == []
+
+
+def test_in_place_edits_and_assignments_are_written(store):
+    saved(store)
+    loaded = store.load("s")
+    loaded.milestones.append({"id": "m2", "title": "Ship", "estimated_hours": 2})
+    loaded.report = {"summary": "done"}
+    assert sorted(store.save(loaded)["sections_written"]) == ["milestones", "report"]
+    assert store.save(loaded)["sections_written"] == []   # digests now match what was written
+
+    again = store.load("s")
+    assert [m["id"] for m in again.milestones] == ["m1", "m2"] and again.report == {"summary": "done"}
+    assert again.calendar_data == {"sources": {}}   # never loaded above, so never overwritten
+
+
+def test_patched_copies_track_their_own_changes(store):
+    saved(store)
+    loaded = store.load("s")
+    loaded.milestones
+    patched = apply_patch(loaded, {"milestones": MILESTONES + [{"id": "m2"}]})
+    assert store.save(loaded)["sections_written"] == []
+    assert store.save(patched)["sections_written"] == ["milestones"]
+    assert len(store.load("s").milestones) == 2
+
+
+def test_missing_sections_load_as_defaults(store):
+    saved(store)
+    loaded = store.load("s")
+    assert loaded.team_members == [] and loaded.execution_history == []
+    assert store.load("missing") is None
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+
+from app.modules.TimelineScheduler import Timeline
+from app.state import StateModel, TimeCommitment
+from app.tools.TimelineSolver import TimelineSolver, get_zone
+
+MONDAY = datetime(2025, 3, 3, tzinfo=timezone.utc)
+EVENINGS = [{"days": "weekdays", "start": "18:00", "end": "20:00"}]   # 10 hours a week
+
+
+def ms(title, hours):
+    return {"title": title, "estimated_hours": hours}
+
+
+def hours_by_week(result, title):
+    weeks = {}
+    for session in result.sessions:
+        if session.milestone == title:
+            weeks[session.week] = weeks.get(session.week, 0) + session.hours
+    return weeks
+
+
+def test_week_grid_starts_on_local_monday_midnight_across_dst():
+    zone = get_zone("America/New_York")
+    starts = TimelineSolver(TimeCommitment(timezone="America/New_York")).week_starts(datetime(2025, 3, 5, 10), 2)
+    local = [datetime.fromtimestamp(s, tz=zone) for s in starts]
+    assert [(d.weekday(), d.hour) for d in local] == [(0, 0)] * 3
+    assert [(b - a) / 3600 for a, b in zip(starts, starts[1:])] == [167, 168]   # clocks go forward on Mar 9
+
+
+def test_milestones_are_packed_in_order_under_the_weekly_cap():
+    solver = TimelineSolver(TimeCommitment(hours_per_week=6))
+    result = solver.solve([ms("Setup", 4), ms("Build", 4)], EVENINGS, [], timeline_weeks=2, start=MONDAY)
+    assert hours_by_week(result, "Setup") == {1: 4}
+    assert hours_by_week(result, "Build") == {1: 2, 2: 2}
+    assert result.capacity_by_week == [6, 6] and result.unscheduled_hours == 0
+    assert [m["start_week"] for m in result.milestone_weeks] == [1, 1]
+
+
+def test_calendar_conflicts_are_carved_out_of_work_blocks():
+    conflicts = [{"start": "2025-03-03T18:30:00", "end": "2025-03-03T19:00:00", "title": "Call"}]
+    result = TimelineSolver().solve([ms("Setup", 2)], EVENINGS, conflicts, timeline_weeks=1, start=MONDAY)
+    assert [(s.start.hour, s.start.minute, s.hours) for s in result.sessions] == [(18, 0, 0.5), (19, 0, 1.0),
+                                                                                   (18, 0, 0.5)]
+    assert result.milestone_weeks[0]["calendar_conflicts"] == 1
+
+
+def test_hours_that_do_not_fit_are_reported():
+    result = TimelineSolver().solve([ms("Everything", 25)], EVENINGS, [], timeline_weeks=2, start=MONDAY)
+    assert result.unscheduled_hours == 5
+    assert any("5.0 more hours" in w for w in result.warnings)
+
+
+def test_packer_placing_one_at_a_time_matches_solve():
+    solver = TimelineSolver(TimeCommitment(hours_per_week=8))
+    plan = [ms("Setup", 3), ms("Build", 9), ms("Ship", 2)]
+    packer = solver.packer(EVENINGS, [], timeline_weeks=3, start=MONDAY)
+    entries = [packer.place(m) for m in plan]
+    assert packer.result() == solver.solve(plan, EVENINGS, [], timeline_weeks=3, start=MONDAY)
+    assert entries == packer.result().milestone_weeks
+
+
+def test_bad_busy_dates_are_skipped_with_a_warning():
+    commitment = TimeCommitment(busy_periods=["exams 2024-13-45", "trip 2025-03-03 to 2025-03-07"])
+    result = TimelineSolver(commitment).solve([ms("Setup", 4)], EVENINGS, [], timeline_weeks=2, start=MONDAY)
+    assert any("2024-13-45" in w for w in result.warnings)
+    assert hours_by_week(result, "Setup") == {2: 4}
+
+
+def test_timeline_keeps_the_users_start_date(monkeypatch):
+    monkeypatch.setattr(Timeline, "_pacing_notes", lambda self, state, result, schedule: [])
+    state = StateModel(user_id="u", session_id="s", milestones=[ms("Setup", 4)], optimal_work_blocks=EVENINGS,
+                       timeline={"start_date": "2025-03-05", "timeline_weeks": 2})
+    timeline = Timeline().schedule_timeline(state).timeline
+    assert timeline["start_date"] == "2025-03-05"
+    assert timeline["week1_start"] == "2025-03-03T00:00:00+00:00"
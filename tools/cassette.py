@@ -0,0 +1,165 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from collections import defaultdict
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import ormsgpack
+
+# Record/replay of model calls, for deterministic offline benchmark runs.
+# In record mode every call that goes through LLMProvider (and streamed DSPy
+# calls) runs live, and its response and the latency the caller saw are
+# appended to the cassette under a hash of the call type and request (the
+# prompt itself is not stored). In replay mode no request leaves the
+# process: each call returns the recorded response after the recorded
+# latency times LLM_CASSETTE_LATENCY (0 replays instantly). Identical
+# requests replay their recordings in the order they were made.
+#
+# File layout: b"PFC1", then one frame per call — a little-endian u32
+# length and a msgpack array [key, call_type, latency_ms, response].
+
+T = TypeVar("T")
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")   # off | record | replay
+CASSETTE_PATH = os.getenv("LLM_CASSETTE", os.path.join(os.path.expanduser("~"), ".cache", "projectforge",
+                                                       "cassettes", "llm.cassette"))
+CASSETTE_LATENCY = float(os.getenv("LLM_CASSETTE_LATENCY", "1.0"))
+
+MAGIC = b"PFC1"
+_FRAME = struct.Struct("<I")
+
+
+class CassetteMiss(KeyError):
+    """Replay found no recording for a request."""
+
+
+def _canonical(value: Any) -> Any:
+    """JSON stand-ins that only depend on what is sent: chat messages by type and content (not their ids)."""
+    if hasattr(value, "content") and hasattr(value, "type"):
+        return [value.type, value.content]
+    if isinstance(value, type):
+        return value.__qualname__
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    return type(value).__qualname__
+
+
+def request_key(call_type: str, request: Any) -> bytes:
+    blob = json.dumps([call_type, request], sort_keys=True, default=_canonical, ensure_ascii=False)
+    return hashlib.blake2b(blob.encode(), digest_size=16).digest()
+
+
+def _encode(value: Any) -> Any:
+    try:
+        from langchain_core.messages import BaseMessage, message_to_dict
+    except ImportError:  # langchain is only needed by the chat paths
+        BaseMessage = None
+    if BaseMessage is not None and isinstance(value, BaseMessage):
+        return ["message", message_to_dict(value)]
+    return ["value", value]
+
+
+def _decode(encoded: Any) -> Any:
+    kind, value = encoded
+    if kind == "message":
+        from langchain_core.messages import messages_from_dict
+        return messages_from_dict([value])[0]
+    return value
+
+
+class Cassette:
+    """Recorded model responses at `path`; mode "record" appends, "replay" serves them."""
+
+    def __init__(self, path: str = CASSETTE_PATH, mode: str = "replay", latency_scale: float = CASSETTE_LATENCY):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._tapes: Dict[bytes, List[Tuple[float, Any]]] = defaultdict(list)
+        self._cursor: Dict[bytes, int] = defaultdict(int)
+        self.recorded = 0
+        self.replayed = 0
+        if mode == "replay":
+            self._load()
+        elif not os.path.exists(path) or os.path.getsize(path) == 0:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{self.path} is not a cassette")
+        offset = len(MAGIC)
+        while offset + _FRAME.size <= len(data):
+            (size,) = _FRAME.unpack_from(data, offset)
+            offset += _FRAME.size
+            if offset + size > len(data):
+                logger.warning(f"Ignoring truncated last frame in {self.path}")
+                break
+            key, _, latency_ms, response = ormsgpack.unpackb(data[offset:offset + size])
+            self._tapes[key].append((latency_ms, response))
+            offset += size
+
+    def __len__(self) -> int:
+        return sum(len(tape) for tape in self._tapes.values())
+
+    def rewind(self) -> None:
+        """Start every request's recordings from the first again (for the next replay run)."""
+        with self._lock:
+            self._cursor.clear()
+
+    def _next(self, call_type: str, request: Any) -> Tuple[float, Any]:
+        key = request_key(call_type, request)
+        with self._lock:
+            tape = self._tapes.get(key)
+            if not tape:
+                raise CassetteMiss(f"No {call_type} recording for this request in {self.path}")
+            index = self._cursor[key]
+            self._cursor[key] = index + 1
+            self.replayed += 1
+        return tape[min(index, len(tape) - 1)]   # more calls than recordings: repeat the last
+
+    def _record(self, call_type: str, request: Any, latency_ms: float, value: Any) -> None:
+        frame = ormsgpack.packb([request_key(call_type, request), call_type, round(latency_ms, 3), _encode(value)],
+                                default=str, option=ormsgpack.OPT_SERIALIZE_PYDANTIC)
+        with self._lock, open(self.path, "ab") as f:
+            f.write(_FRAME.pack(len(frame)) + frame)
+            self.recorded += 1
+
+    def call(self, call_type: str, request: Any, live: Callable[[], T]) -> T:
+        if self.mode == "replay":
+            latency_ms, response = self._next(call_type, request)
+            if self.latency_scale > 0:
+                time.sleep(latency_ms / 1000 * self.latency_scale)
+            return _decode(response)
+        start = time.perf_counter()
+        value = live()
+        self._record(call_type, request, (time.perf_counter() - start) * 1000, value)
+        return value
+
+    async def acall(self, call_type: str, request: Any, live: Callable[[], Awaitable[T]]) -> T:
+        if self.mode == "replay":
+            latency_ms, response = self._next(call_type, request)
+            if self.latency_scale > 0:
+                await asyncio.sleep(latency_ms / 1000 * self.latency_scale)
+            return _decode(response)
+        start = time.perf_counter()
+        value = await live()
+        self._record(call_type, request, (time.perf_counter() - start) * 1000, value)
+        return value
+
+
+def cassette_from_env() -> Optional[Cassette]:
+    """The cassette selected by LLM_CASSETTE_MODE / LLM_CASSETTE, or None when recording is off."""
+    if CASSETTE_MODE == "off":
+        return None
+    return Cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY)
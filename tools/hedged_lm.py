@@ -0,0 +1,147 @@
+from typing import Any, Dict, Optional
+import time
+import weakref
+import dspy
+from dspy.utils.callback import BaseCallback
+from tools.llm_provider import get_llm_provider
+from tools.metrics import PREDICTOR_ERRORS, PREDICTOR_IN_FLIGHT, PREDICTOR_LATENCY, cache_result, record_tokens
+from tools.tracing import OpenSpan, close_span, open_span
+
+# dspy.LM whose calls go through the shared LLMProvider, so the DSPy modules
+# in app/modules get the same hedging as the chat paths. The provider is
+# looked up per call rather than stored, because DSPy copies LMs freely.
+# Streamed calls (dspy.streamify) are not hedged: two streams would both
+# write to the same listener. With a cassette they are recorded like any
+# other call and replayed as one whole response.
+# PredictorMetrics is the DSPy callback that times each Predict call by its
+# signature name (TimeEstimator, MilestoneBreakdown, ...); PredictorSpans
+# traces modules, LM calls and adapter formatting/parsing (tools/tracing.py).
+
+
+class HedgedLM(dspy.LM):
+    call_type = "dspy"
+
+    def _request(self, prompt: Any, messages: Any, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """What identifies this call on a cassette (credentials left out, so replay needs none)."""
+        settings = {k: v for k, v in {**self.kwargs, **kwargs}.items() if k not in ("api_key", "api_base")}
+        return {"model": self.model, "prompt": prompt, "messages": messages, "kwargs": settings}
+
+    def __call__(self, prompt: Any = None, messages: Any = None, **kwargs: Any) -> Any:
+        call = super().__call__
+        provider, request = get_llm_provider(), self._request(prompt, messages, kwargs)
+        if dspy.settings.send_stream is not None:
+            if provider.cassette is not None:   # replayed streams arrive whole; listeners see no chunks
+                return provider.cassette.call(self.call_type, request, lambda: call(prompt, messages=messages, **kwargs))
+            return call(prompt, messages=messages, **kwargs)
+        return provider.call(self.call_type, lambda: call(prompt, messages=messages, **kwargs), request=request)
+
+    async def acall(self, prompt: Any = None, messages: Any = None, **kwargs: Any) -> Any:
+        call = super().acall
+        provider, request = get_llm_provider(), self._request(prompt, messages, kwargs)
+        if dspy.settings.send_stream is not None:
+            if provider.cassette is not None:
+                return await provider.cassette.acall(self.call_type, request,
+                                                     lambda: call(prompt, messages=messages, **kwargs))
+            return await call(prompt, messages=messages, **kwargs)
+        return await provider.acall(self.call_type, lambda: call(prompt, messages=messages, **kwargs), request=request)
+
+    def update_history(self, entry: Dict[str, Any]) -> None:
+        # Every completed call lands here with its usage, cached or not
+        cached = bool(getattr(entry.get("response"), "cache_hit", False))
+        cache_result("dspy_lm", cached)
+        if not cached:
+            usage = entry.get("usage") or {}
+            record_tokens(self.call_type, usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        super().update_history(entry)
+
+
+def _declared_signatures() -> Dict[str, str]:
+    """Instructions -> class name for every dspy.Signature subclass defined so far."""
+    names, stack = {}, [dspy.Signature]
+    while stack:
+        cls = stack.pop()
+        for sub in cls.__subclasses__():
+            if sub.__name__ != "StringSignature":
+                names.setdefault(sub.instructions, sub.__name__)
+            stack.append(sub)
+    return names
+
+
+_signature_names: "weakref.WeakKeyDictionary[type, str]" = weakref.WeakKeyDictionary()
+
+
+def signature_name(signature: Any) -> str:
+    # ChainOfThought extends the declared signature into an anonymous StringSignature;
+    # its instructions still identify the class it came from
+    name = _signature_names.get(signature)
+    if name is None:
+        name = signature.__name__
+        if name == "StringSignature":
+            name = _declared_signatures().get(signature.instructions, name)
+        _signature_names[signature] = name
+    return name
+
+
+class PredictorMetrics(BaseCallback):
+    """Latency, in-flight and error metrics per DSPy predictor."""
+
+    def __init__(self):
+        self._started: Dict[str, tuple] = {}
+
+    def on_module_start(self, call_id: str, instance: Any, inputs: Dict[str, Any]) -> None:
+        if not isinstance(instance, dspy.Predict):
+            return   # ChainOfThought and friends are timed through their inner Predict
+        name = signature_name(instance.signature)
+        PREDICTOR_IN_FLIGHT.labels(name).inc()
+        self._started[call_id] = (name, time.perf_counter())
+
+    def on_module_end(self, call_id: str, outputs: Optional[Any], exception: Optional[BaseException] = None) -> None:
+        started = self._started.pop(call_id, None)
+        if started is None:
+            return
+        name, start = started
+        PREDICTOR_IN_FLIGHT.labels(name).dec()
+        PREDICTOR_LATENCY.labels(name).observe(time.perf_counter() - start)
+        if exception is not None:
+            PREDICTOR_ERRORS.labels(name).inc()
+
+
+class PredictorSpans(BaseCallback):
+    """Tracing spans for DSPy modules (ChainOfThought(TimeEstimator), Predict(...)), LM calls and adapter steps."""
+
+    def __init__(self):
+        self._open: Dict[str, OpenSpan] = {}
+
+    def _start(self, call_id: str, name: str, kind: str, **attrs: Any) -> None:
+        opened = open_span(name, kind, **attrs)
+        if opened is not None:
+            self._open[call_id] = opened
+
+    def _end(self, call_id: str, exception: Optional[BaseException]) -> None:
+        close_span(self._open.pop(call_id, None), exception)
+
+    def on_module_start(self, call_id: str, instance: Any, inputs: Dict[str, Any]) -> None:
+        signature = getattr(instance, "signature", None) or getattr(getattr(instance, "predict", None), "signature", None)
+        name = type(instance).__name__
+        self._start(call_id, f"{name}({signature_name(signature)})" if signature is not None else name, "dspy")
+
+    def on_module_end(self, call_id: str, outputs: Optional[Any], exception: Optional[BaseException] = None) -> None:
+        self._end(call_id, exception)
+
+    def on_lm_start(self, call_id: str, instance: Any, inputs: Dict[str, Any]) -> None:
+        self._start(call_id, "dspy.lm", "llm", model=getattr(instance, "model", None))
+
+    def on_lm_end(self, call_id: str, outputs: Optional[Any], exception: Optional[BaseException] = None) -> None:
+        self._end(call_id, exception)
+
+    def on_adapter_format_start(self, call_id: str, instance: Any, inputs: Dict[str, Any]) -> None:
+        self._start(call_id, f"{type(instance).__name__}.format", "dspy")
+
+    def on_adapter_format_end(self, call_id: str, outputs: Optional[Any], exception: Optional[BaseException] = None) -> None:
+        self._end(call_id, exception)
+
+    def on_adapter_parse_start(self, call_id: str, instance: Any, inputs: Dict[str, Any]) -> None:
+        self._start(call_id, f"{type(instance).__name__}.parse", "dspy")   # output JSON / field validation
+
+    def on_adapter_parse_end(self, call_id: str, outputs: Optional[Any], exception: Optional[BaseException] = None) -> None:
+        self._end(call_id, exception)
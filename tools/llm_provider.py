@@ -0,0 +1,464 @@
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from tools.metrics import (LLM_BREAKER, LLM_HEDGES, LLM_IN_FLIGHT, LLM_LATENCY, LLM_REQUESTS, LLM_RETRIES,
+                           record_tokens)
+from tools.cassette import Cassette, cassette_from_env
+from tools.tracing import annotate, span
+from tools.resilience import (CircuitBreaker, CircuitOpen, RetriesExhausted, RetryPolicy, UpstreamUnavailable,
+                              current_ledger, is_retryable)
+
+# Shared path for every model call (Gemini in main.py, the LangChain chat
+# model in chatbot_backend.py, the DSPy LM behind app/modules).
+# Clients are created on first use, so importing this module is cheap and
+# needs no API key. Each call is tagged with a call type ("generate",
+# "chatbot", "classify_intent", "dspy", ...). Per call type the provider
+# tracks the latency distribution online with P² estimators, and when a call
+# has not returned by the configured percentile it sends one duplicate
+# request and returns whichever answer arrives first. Hedges are capped at a
+# fraction of all calls, so the extra load stays bounded. Around the hedged
+# attempt sit retries with jittered backoff and a circuit breaker for the
+# upstream (tools/resilience.py). Latency, outcomes, tokens, hedges, retries
+# and breaker state are exported through tools/metrics.py, and each call is
+# an "llm.<call_type>" span in the request trace (tools/tracing.py). Calls
+# made with a `request` description can be recorded to, or replayed from, a
+# cassette (tools/cassette.py) for offline benchmark runs.
+
+T = TypeVar("T")
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+HEDGING = os.getenv("LLM_HEDGING", "1") != "0"
+HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))   # hedge once a call is slower than this
+HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))       # at most this fraction of extra calls
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))  # no hedging until the percentile is known
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+# ───── Streaming quantiles ──────────────────────────────────────────────
+
+class P2Quantile:
+    """P² estimate of one quantile (Jain & Chlamtac): five markers, O(1) memory and time per sample."""
+
+    def __init__(self, q: float):
+        self.q = q
+        self.count = 0
+        self._heights: list = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * q, 4 * q, 2 + 2 * q, 4]
+        self._increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        h, n = self._heights, self._positions
+        if self.count <= 5:
+            h.append(x)
+            h.sort()
+            return
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= h[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not h[i - 1] < height < h[i + 1]:
+                    height = h[i] + step * (h[i + step] - h[i]) / (n[i + step] - n[i])
+                h[i] = height
+                n[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        h, n = self._heights, self._positions
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def value(self) -> Optional[float]:
+        if not self.count:
+            return None
+        if self.count <= 5:
+            return self._heights[min(int(round(self.q * (self.count - 1))), self.count - 1)]
+        return self._heights[2]
+
+
+class CallStats:
+    """Latency and hedging counters for one call type."""
+
+    def __init__(self, call_type: str, hedge_quantile: float):
+        self.call_type = call_type
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.errors = 0
+        self.retries = 0
+        self.failures = 0   # calls that failed after retries, or were rejected by the breaker
+        self.hedge_point = P2Quantile(hedge_quantile)   # unhedged latency at the hedging percentile
+        self.primary_p99 = P2Quantile(0.99)             # what callers would see without hedging
+        self.served_p50 = P2Quantile(0.5)               # what callers actually saw
+        self.served_p99 = P2Quantile(0.99)
+
+    def summary(self) -> Dict[str, Any]:
+        def ms(estimator: P2Quantile) -> Optional[float]:
+            return None if estimator.value is None else round(estimator.value * 1000, 1)
+        primary, served = ms(self.primary_p99), ms(self.served_p99)
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "errors": self.errors,
+            "retries": self.retries,
+            "failures": self.failures,
+            "extra_call_ratio": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+            "hedge_after_ms": ms(self.hedge_point),
+            "p50_ms": ms(self.served_p50),
+            "p99_ms": served,
+            "p99_unhedged_ms": primary,
+            "p99_saved_ms": round(primary - served, 1) if primary is not None and served is not None else None,
+        }
+
+
+# ───── Provider ─────────────────────────────────────────────────────────
+
+class LLMProvider:
+    """Lazily built model clients behind one hedged call path."""
+
+    def __init__(self, hedging: bool = HEDGING, hedge_quantile: float = HEDGE_QUANTILE,
+                 budget: float = HEDGE_BUDGET, min_samples: int = HEDGE_MIN_SAMPLES,
+                 quantiles: Optional[Dict[str, float]] = None, max_workers: int = 32,
+                 retry: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None,
+                 cassette: Optional[Cassette] = None):
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.quantiles = dict(quantiles or {})   # per call type overrides of hedge_quantile
+        self.max_workers = max_workers
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker("gemini")
+        self.cassette = cassette
+        LLM_BREAKER.labels(self.breaker.name).set_function(lambda: BREAKER_STATES[self.breaker.state])
+        self._lock = threading.Lock()
+        self._stats: Dict[str, CallStats] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._gemini = None
+        self._chat_model = None
+        self._dspy_lm = None
+
+    # -- clients ---------------------------------------------------------
+
+    def gemini(self):
+        if self._gemini is None:
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv("gemini_api_key"))
+            self._gemini = genai.GenerativeModel(GEMINI_MODEL)
+        return self._gemini
+
+    def chat_model(self):
+        if self._chat_model is None:
+            from langchain.chat_models import init_chat_model
+            self._chat_model = init_chat_model(f"google_genai:{GEMINI_MODEL}")
+        return self._chat_model
+
+    def dspy_lm(self):
+        """DSPy LM whose requests go through this provider (pass to dspy.configure)."""
+        if self._dspy_lm is None:
+            from tools.hedged_lm import HedgedLM
+            # Retries happen here, not inside DSPy, so the breaker sees every failure.
+            # While recording, DSPy's cache is off so the cassette gets real upstream latencies.
+            recording = self.cassette is not None and self.cassette.mode == "record"
+            self._dspy_lm = HedgedLM(f"gemini/{GEMINI_MODEL}", api_key=os.getenv("gemini_api_key"), num_retries=0,
+                                     cache=not recording)
+        return self._dspy_lm
+
+    def generate(self, prompt: str, call_type: str = "generate") -> str:
+        """Gemini text completion."""
+        def request() -> str:
+            response = self.gemini().generate_content(prompt)
+            usage = getattr(response, "usage_metadata", None)
+            record_tokens(call_type, getattr(usage, "prompt_token_count", None),
+                          getattr(usage, "candidates_token_count", None))
+            return response.text
+        return self.call(call_type, request, request={"prompt": prompt})
+
+    def invoke(self, prompt: Any, call_type: str = "chat") -> Any:
+        """LangChain chat model invoke (returns the AIMessage)."""
+        def request() -> Any:
+            message = self.chat_model().invoke(prompt)
+            usage = getattr(message, "usage_metadata", None) or {}
+            record_tokens(call_type, usage.get("input_tokens"), usage.get("output_tokens"))
+            return message
+        return self.call(call_type, request, request={"prompt": prompt})
+
+    # -- hedging ---------------------------------------------------------
+
+    def _stats_for(self, call_type: str) -> CallStats:
+        stats = self._stats.get(call_type)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(call_type, CallStats(call_type, self.quantiles.get(call_type, self.hedge_quantile)))
+        return stats
+
+    def _hedge_after(self, stats: CallStats) -> Optional[float]:
+        """Seconds to wait before hedging, or None when this call should not be hedged."""
+        if not self.hedging or stats.hedge_point.count < self.min_samples:
+            return None
+        if stats.hedged + 1 > self.budget * (stats.calls + 1):
+            return None
+        return stats.hedge_point.value
+
+    def _take_hedge(self, stats: CallStats) -> bool:
+        with self._lock:
+            if stats.hedged + 1 > self.budget * stats.calls:
+                return False
+            stats.hedged += 1
+        LLM_HEDGES.labels(stats.call_type).inc()
+        annotate(hedged=True)
+        return True
+
+    def _record_primary(self, stats: CallStats, seconds: float) -> None:
+        with self._lock:
+            stats.hedge_point.add(seconds)
+            stats.primary_p99.add(seconds)
+
+    def _primary_done(self, stats: CallStats, attempt: Any, start: float) -> None:
+        if not attempt.cancelled() and attempt.exception() is None:
+            self._record_primary(stats, time.perf_counter() - start)
+
+    def _record_served(self, stats: CallStats, seconds: float, hedge_won: bool = False) -> None:
+        with self._lock:
+            stats.served_p50.add(seconds)
+            stats.served_p99.add(seconds)
+            stats.hedge_wins += hedge_won
+
+    def _record_error(self, stats: CallStats) -> None:
+        with self._lock:
+            stats.errors += 1
+
+    # -- retries and breaker ---------------------------------------------
+
+    def _admit(self, call_type: str) -> None:
+        try:
+            self.breaker.before_call()
+        except CircuitOpen as e:
+            self._failed(call_type, e)
+            raise
+
+    def _failed(self, call_type: str, exc: BaseException) -> None:
+        stats = self._stats_for(call_type)
+        with self._lock:
+            stats.failures += 1
+        ledger = current_ledger()
+        if ledger is not None:
+            ledger.errors.append(f"{call_type}: {str(exc)[:200]}")
+
+    def _retrying(self, call_type: str, attempt: int, exc: BaseException) -> Optional[float]:
+        """Record a retryable failure; seconds to back off, or None when out of retries."""
+        self.breaker.record_failure()
+        if attempt >= self.retry.retries:
+            return None
+        stats = self._stats_for(call_type)
+        with self._lock:
+            stats.retries += 1
+        LLM_RETRIES.labels(call_type).inc()
+        annotate(retries=attempt + 1)
+        ledger = current_ledger()
+        if ledger is not None:
+            ledger.retries += 1
+        return self.retry.delay(attempt, exc)
+
+    def _exhausted(self, call_type: str, exc: BaseException) -> RetriesExhausted:
+        error = RetriesExhausted(f"failed after {self.retry.retries + 1} attempts: {exc}",
+                                 retry_after=self.breaker.retry_after())
+        self._failed(call_type, error)
+        return error
+
+    @contextmanager
+    def _measured(self, call_type: str) -> Iterator[None]:
+        """Export latency, in-flight count and outcome of one call (retries included)."""
+        in_flight = LLM_IN_FLIGHT.labels(call_type)
+        in_flight.inc()
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        except CircuitOpen:
+            outcome = "circuit_open"
+            raise
+        except UpstreamUnavailable:
+            outcome = "retries_exhausted"
+            raise
+        finally:
+            in_flight.dec()
+            LLM_LATENCY.labels(call_type).observe(time.perf_counter() - start)
+            LLM_REQUESTS.labels(call_type, outcome).inc()
+
+    def call(self, call_type: str, fn: Callable[[], T], request: Any = None) -> T:
+        """Run a blocking model call with retries, failing fast while the breaker is open.
+
+        `request` (JSON-like: prompt, messages, settings) identifies the call on a cassette;
+        calls made without one always run live.
+        """
+        with span(f"llm.{call_type}", "llm"), self._measured(call_type):
+            if self.cassette is not None and request is not None:
+                return self.cassette.call(call_type, request, lambda: self._call(call_type, fn))
+            return self._call(call_type, fn)
+
+    async def acall(self, call_type: str, fn: Callable[[], Awaitable[T]], request: Any = None) -> T:
+        """Async variant of call()."""
+        with span(f"llm.{call_type}", "llm"), self._measured(call_type):
+            if self.cassette is not None and request is not None:
+                return await self.cassette.acall(call_type, request, lambda: self._acall(call_type, fn))
+            return await self._acall(call_type, fn)
+
+    def _call(self, call_type: str, fn: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            self._admit(call_type)
+            try:
+                result = self._hedged(call_type, fn)
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.release()
+                    self._failed(call_type, e)
+                    raise
+                delay = self._retrying(call_type, attempt, e)
+                if delay is None:
+                    raise self._exhausted(call_type, e) from e
+                attempt += 1
+                if self.breaker.state != "open":   # otherwise the next _admit fails fast
+                    time.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def _acall(self, call_type: str, fn: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            self._admit(call_type)
+            try:
+                result = await self._ahedged(call_type, fn)
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.release()
+                    self._failed(call_type, e)
+                    raise
+                delay = self._retrying(call_type, attempt, e)
+                if delay is None:
+                    raise self._exhausted(call_type, e) from e
+                attempt += 1
+                if self.breaker.state != "open":
+                    await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    # -- one hedged attempt ----------------------------------------------
+
+    def _hedged(self, call_type: str, fn: Callable[[], T]) -> T:
+        """Run a blocking model call, hedging it once if it runs past the percentile.
+
+        A losing request cannot be interrupted in its thread; its result is dropped.
+        """
+        stats = self._stats_for(call_type)
+        with self._lock:
+            stats.calls += 1
+        delay = self._hedge_after(stats)
+        start = time.perf_counter()
+        if delay is None:
+            try:
+                result = fn()
+            except Exception:
+                self._record_error(stats)
+                raise
+            elapsed = time.perf_counter() - start
+            self._record_primary(stats, elapsed)
+            self._record_served(stats, elapsed)
+            return result
+
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="llm")
+        primary = self._pool.submit(contextvars.copy_context().run, fn)
+        primary.add_done_callback(lambda f: self._primary_done(stats, f, start))
+        pending = {primary}
+        done, _ = wait(pending, timeout=delay)
+        if not done and self._take_hedge(stats):
+            pending.add(self._pool.submit(contextvars.copy_context().run, fn))
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    self._record_served(stats, time.perf_counter() - start, hedge_won=future is not primary)
+                    return future.result()
+                error = future.exception()
+        self._record_error(stats)
+        raise error
+
+    async def _ahedged(self, call_type: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Async variant of _hedged(); the losing request is cancelled."""
+        stats = self._stats_for(call_type)
+        with self._lock:
+            stats.calls += 1
+        delay = self._hedge_after(stats)
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(fn())
+        primary.add_done_callback(lambda task: self._primary_done(stats, task, start))
+        pending = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self._take_hedge(stats):
+                    pending.add(asyncio.ensure_future(fn()))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._record_served(stats, time.perf_counter() - start, hedge_won=task is not primary)
+                        return task.result()
+                    error = task.exception()
+            self._record_error(stats)
+            raise error
+        finally:
+            if primary in pending:
+                # The primary took at least this long; record that rather than nothing
+                self._record_primary(stats, time.perf_counter() - start)
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {call_type: stats.summary() for call_type, stats in sorted(self._stats.items())}
+
+
+_default_provider: Optional[LLMProvider] = None
+
+
+def get_llm_provider() -> LLMProvider:
+    """Process-wide provider configured from the LLM_* environment variables."""
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = LLMProvider(cassette=cassette_from_env())
+    return _default_provider
@@ -0,0 +1,306 @@
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+import math
+import threading
+import time
+
+# In-process metrics rendered in the Prometheus text format (version 0.0.4).
+# Counters, gauges and fixed-bucket histograms, each keyed by label values.
+# A labelled child is created once and cached, so recording an event is a
+# dict lookup, a lock and an add (about a microsecond; see
+# benchmarks/metrics_bench.py). Nothing is exported until /metrics is
+# scraped, and rendering reads a consistent copy of each child.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: Tuple[str, ...], child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_number(child.get())}"]
+
+
+class _Value:
+    __slots__ = ("value", "lock", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+        self.function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from `function` at scrape time."""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+    @contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def _render_child(self, values: Tuple[str, ...], child: _Buckets) -> List[str]:
+        with child.lock:
+            counts, total = list(child.counts), child.sum
+        lines, running = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            running += count
+            labels = _format_labels(self.labelnames, values, f'le="{_number(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {running}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_number(total)}")
+        lines.append(f"{self.name}_count{labels} {running}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ───── Shared metrics ───────────────────────────────────────────────────
+
+HTTP_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency until the response is sent",
+                                  ("app", "method", "route", "status"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests being handled", ("app",))
+HTTP_ERRORS = REGISTRY.counter("http_request_errors_total", "HTTP requests answered 5xx or raising",
+                               ("app", "route"))
+
+NODE_LATENCY = REGISTRY.histogram("graph_node_duration_seconds", "LangGraph node execution time", ("graph", "node"))
+NODE_IN_FLIGHT = REGISTRY.gauge("graph_nodes_in_flight", "LangGraph nodes executing", ("graph", "node"))
+NODE_ERRORS = REGISTRY.counter("graph_node_errors_total", "LangGraph node executions that raised", ("graph", "node"))
+
+PREDICTOR_LATENCY = REGISTRY.histogram("dspy_predictor_duration_seconds", "DSPy predictor call time", ("predictor",))
+PREDICTOR_IN_FLIGHT = REGISTRY.gauge("dspy_predictors_in_flight", "DSPy predictor calls running", ("predictor",))
+PREDICTOR_ERRORS = REGISTRY.counter("dspy_predictor_errors_total", "DSPy predictor calls that raised", ("predictor",))
+
+LLM_LATENCY = REGISTRY.histogram("llm_request_duration_seconds", "Model call latency as seen by the caller",
+                                 ("call_type",))
+LLM_IN_FLIGHT = REGISTRY.gauge("llm_requests_in_flight", "Model calls in progress", ("call_type",))
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "Model calls by outcome", ("call_type", "outcome"))
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Model tokens by direction", ("call_type", "direction"))
+LLM_HEDGES = REGISTRY.counter("llm_hedged_requests_total", "Duplicate requests sent for slow calls", ("call_type",))
+LLM_RETRIES = REGISTRY.counter("llm_retries_total", "Model call retries after retryable errors", ("call_type",))
+LLM_BREAKER = REGISTRY.gauge("llm_circuit_breaker_state", "Upstream breaker: 0 closed, 1 half-open, 2 open",
+                             ("upstream",))
+
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "Cache lookups by result", ("cache", "result"))
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_tokens(call_type: str, tokens_in: Optional[int], tokens_out: Optional[int]) -> None:
+    if tokens_in:
+        LLM_TOKENS.labels(call_type, "in").inc(tokens_in)
+    if tokens_out:
+        LLM_TOKENS.labels(call_type, "out").inc(tokens_out)
+
+
+def instrument_node(graph: str, name: Optional[str] = None):
+    """Decorator timing a LangGraph node (keeps its signature, so `config` is still passed)."""
+    def decorate(node):
+        label = name or node.__name__
+        latency, in_flight, errors = NODE_LATENCY.labels(graph, label), NODE_IN_FLIGHT.labels(graph, label), \
+            NODE_ERRORS.labels(graph, label)
+
+        @wraps(node)
+        def run(*args, **kwargs):
+            in_flight.inc()
+            start = time.perf_counter()
+            try:
+                return node(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - start)
+                in_flight.dec()
+        return run
+    return decorate
+
+
+# ───── FastAPI ──────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+    """ASGI middleware: latency (to the end of the response body), in-flight and 5xx counts per route."""
+
+    def __init__(self, app, app_name: str):
+        self.app = app
+        self.app_name = app_name
+        self.in_flight = HTTP_IN_FLIGHT.labels(app_name)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"   # template, not the raw path
+            HTTP_LATENCY.labels(self.app_name, scope["method"], route, str(status["code"])).observe(
+                time.perf_counter() - start)
+            if status["code"] >= 500:
+                HTTP_ERRORS.labels(self.app_name, route).inc()
+
+
+def instrument_app(app, app_name: str) -> None:
+    """Add request metrics and a GET /metrics route to a FastAPI app."""
+    from fastapi.responses import Response
+
+    app.add_middleware(MetricsMiddleware, app_name=app_name)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,181 @@
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import contextvars
+import os
+import random
+import threading
+import time
+
+# Retry and circuit-breaker policy for upstream model calls.
+# Retryable failures (rate limits, 5xx, timeouts, dropped connections) are
+# retried with full-jitter exponential backoff, so clients that failed
+# together do not retry together. Consecutive retryable failures open the
+# breaker; while it is open, calls fail at once with CircuitOpen instead of
+# queueing more load on a struggling upstream. After reset_timeout one trial
+# call is let through, and its outcome closes or reopens the breaker.
+# Retries and final failures are also written to the CallLedger active in the
+# current context, which is how planning nodes report them in StateModel.
+
+RETRIES = int(os.getenv("LLM_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+_RETRYABLE_NAMES = ("ratelimit", "resourceexhausted", "serviceunavailable", "timeout", "deadlineexceeded",
+                    "internalservererror", "apiconnectionerror", "connectionerror", "toomanyrequests",
+                    "unavailable", "badgateway")
+
+
+class UpstreamUnavailable(Exception):
+    """The model call did not succeed and callers should back off (see retry_after)."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """Failing fast: the upstream breaker is open."""
+
+
+class RetriesExhausted(UpstreamUnavailable):
+    """Every attempt failed with a retryable error."""
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    for attr in ("status_code", "http_status", "code", "status"):
+        value = getattr(exc, attr, None)
+        value = getattr(value, "value", value)   # grpc / enum style codes
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections; not bad requests or auth errors."""
+    if isinstance(exc, UpstreamUnavailable):
+        return False
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    code = status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    names = [cls.__name__.lower() for cls in type(exc).__mro__]
+    return any(marker in name for name in names for marker in _RETRYABLE_NAMES)
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Server-suggested wait in seconds, when the error carries one."""
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Full-jitter exponential backoff: attempt n sleeps uniform(0, min(max_delay, base * 2**n))."""
+
+    def __init__(self, retries: int = RETRIES, base_delay: float = BACKOFF_BASE, max_delay: float = BACKOFF_MAX):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        suggested = retry_after(exc) if exc is not None else None
+        return min(max(backoff, suggested or 0.0), self.max_delay)
+
+
+class CircuitBreaker:
+    """closed → open after `failures` consecutive failures → half_open after `reset_timeout` s → closed/open."""
+
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET):
+        self.name = name
+        self.failure_threshold = failures
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_running = False
+
+    def retry_after(self) -> float:
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def before_call(self) -> None:
+        """Raise CircuitOpen unless a call may go upstream now."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "closed":
+                return
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return
+            self.rejected += 1
+            wait = self.retry_after()
+        raise CircuitOpen(f"{self.name} is unavailable; retry in {wait:.0f}s", retry_after=wait)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release(self) -> None:
+        """The call failed for a reason unrelated to upstream health (e.g. a bad request)."""
+        with self._lock:
+            self._trial_running = False
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.consecutive_failures,
+                    "times_opened": self.times_opened, "rejected": self.rejected,
+                    "retry_after_s": round(self.retry_after(), 1) if self.state == "open" else 0.0}
+
+
+# ───── Per-request ledger ───────────────────────────────────────────────
+
+@dataclass
+class CallLedger:
+    """Retries and failed calls seen while the ledger is active."""
+    retries: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+_ledger: contextvars.ContextVar[Optional[CallLedger]] = contextvars.ContextVar("llm_call_ledger", default=None)
+
+
+@contextmanager
+def call_ledger() -> Iterator[CallLedger]:
+    ledger = CallLedger()
+    token = _ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _ledger.reset(token)
+
+
+def current_ledger() -> Optional[CallLedger]:
+    return _ledger.get()
@@ -0,0 +1,367 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+import argparse
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+# Request tracing: spans with a trace (request) id, a parent and a duration,
+# written as one JSON line each to a rotating local file.
+# TracingMiddleware opens the root span of every HTTP request (the id comes
+# from X-Request-ID or is generated, and is echoed back); graph nodes, DSPy
+# modules / LM calls / adapter parsing, provider calls and checkpointer
+# reads and writes open child spans through the current-span contextvar.
+# LangGraph and Starlette copy the context into their worker threads, so
+# spans nest correctly across them. Outside a trace, span() does nothing.
+# Render a request or chat thread with:
+#     $ python -m tools.tracing show <request_id | thread_id> [--summary]
+
+TRACING = os.getenv("TRACING", "1") != "0"
+TRACE_PATH = os.getenv("TRACE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "projectforge", "traces",
+                                                  "spans.jsonl"))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(20 * 1024 * 1024)))
+TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", "5"))
+REQUEST_ID_HEADER = "x-request-id"
+
+
+class Trace:
+    __slots__ = ("request_id", "thread_id")
+
+    def __init__(self, request_id: str, thread_id: Optional[str] = None):
+        self.request_id = request_id
+        self.thread_id = thread_id
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attrs", "started_at", "start", "error")
+
+    def __init__(self, trace: Trace, parent_id: Optional[str], name: str, kind: str, attrs: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.error: Optional[str] = None
+
+    def record(self) -> Dict[str, Any]:
+        return {"trace": self.trace.request_id, "thread": self.trace.thread_id, "span": self.span_id,
+                "parent": self.parent_id, "name": self.name, "kind": self.kind, "start": round(self.started_at, 6),
+                "ms": round((time.perf_counter() - self.start) * 1000, 3), "attrs": self.attrs, "error": self.error}
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trace_span", default=None)
+
+
+# ───── Export ───────────────────────────────────────────────────────────
+
+class SpanExporter:
+    """Appends finished spans to `path`, rotating at max_bytes and keeping `backups` old files."""
+
+    def __init__(self, path: str = TRACE_PATH, max_bytes: int = TRACE_MAX_BYTES, backups: int = TRACE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handler: Optional[RotatingFileHandler] = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> RotatingFileHandler:
+        with self._lock:
+            if self._handler is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backups,
+                                                    encoding="utf-8")
+            return self._handler
+
+    def export(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str, separators=(",", ":"))
+        handler = self._handler or self._open()
+        try:
+            handler.handle(logging.makeLogRecord({"msg": line}))   # handle() takes the handler lock
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Could not write span to {self.path}: {e}")
+
+    def files(self) -> List[str]:
+        """Oldest first."""
+        rotated = [f"{self.path}.{i}" for i in range(self.backups, 0, -1)]
+        return [p for p in rotated + [self.path] if os.path.exists(p)]
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for path in self.files():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue   # a line cut short by a crash
+
+
+_exporter = SpanExporter()
+
+
+def set_exporter(exporter: SpanExporter) -> None:
+    global _exporter
+    _exporter = exporter
+
+
+# ───── Spans ────────────────────────────────────────────────────────────
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {str(e)[:200]}"
+        raise
+    finally:
+        _current.reset(token)
+        _exporter.export(span.record())
+
+
+@contextmanager
+def start_trace(name: str, request_id: Optional[str] = None, thread_id: Optional[str] = None,
+                kind: str = "request", **attrs: Any) -> Iterator[Optional[Span]]:
+    """Root span of a new trace; nested under the current span instead if one is active."""
+    parent = _current.get()
+    if not TRACING:
+        yield None
+    elif parent is not None:
+        with span(name, kind, **attrs) as child:
+            yield child
+    else:
+        trace = Trace(request_id or uuid.uuid4().hex, thread_id)
+        with _activate(Span(trace, None, name, kind, attrs)) as root:
+            yield root
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attrs: Any) -> Iterator[Optional[Span]]:
+    """Child of the current span; a no-op outside a trace."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    with _activate(Span(parent.trace, parent.span_id, name, kind, attrs)) as child:
+        yield child
+
+
+OpenSpan = Tuple[contextvars.Token, Span]
+
+
+def open_span(name: str, kind: str = "internal", **attrs: Any) -> Optional[OpenSpan]:
+    """span() for callback APIs that report start and end separately; pass the result to close_span()."""
+    parent = _current.get()
+    if parent is None:
+        return None
+    opened = Span(parent.trace, parent.span_id, name, kind, attrs)
+    return _current.set(opened), opened
+
+
+def close_span(opened: Optional[OpenSpan], error: Optional[BaseException] = None, **attrs: Any) -> None:
+    if opened is None:
+        return
+    token, finished = opened
+    _current.reset(token)
+    finished.attrs.update(attrs)
+    if error is not None:
+        finished.error = f"{type(error).__name__}: {str(error)[:200]}"
+    _exporter.export(finished.record())
+
+
+def annotate(**attrs: Any) -> None:
+    """Add attributes to the current span, if any."""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def set_thread_id(thread_id: str) -> None:
+    """Tag the current trace with a chat thread / session id, so it can be looked up by it."""
+    current = _current.get()
+    if current is not None:
+        current.trace.thread_id = thread_id
+
+
+def current_request_id() -> Optional[str]:
+    current = _current.get()
+    return current.trace.request_id if current is not None else None
+
+
+def trace_node(graph: str, name: Optional[str] = None):
+    """Decorator running a LangGraph node inside a span (keeps its signature, so `config` is still passed)."""
+    def decorate(node):
+        span_name = f"{graph}.{name or node.__name__}"
+
+        @wraps(node)
+        def run(*args, **kwargs):
+            with span(span_name, "node"):
+                return node(*args, **kwargs)
+        return run
+    return decorate
+
+
+def traced_checkpointer(saver):
+    """Wrap a LangGraph checkpointer's reads and writes in spans (patches the instance)."""
+    def thread_of(config) -> Optional[str]:
+        return (config or {}).get("configurable", {}).get("thread_id")
+
+    def wrap(method: str):
+        original = getattr(saver, method)
+
+        @wraps(original)
+        def sync(config, *args, **kwargs):
+            with span(f"checkpoint.{method}", "checkpoint", thread_id=thread_of(config)):
+                return original(config, *args, **kwargs)
+
+        @wraps(original)
+        async def async_(config, *args, **kwargs):
+            with span(f"checkpoint.{method}", "checkpoint", thread_id=thread_of(config)):
+                return await original(config, *args, **kwargs)
+
+        setattr(saver, method, async_ if method.startswith("a") else sync)
+
+    for method in ("get_tuple", "put", "put_writes", "aget_tuple", "aput", "aput_writes"):
+        wrap(method)
+    return saver
+
+
+# ───── FastAPI ──────────────────────────────────────────────────────────
+
+class TracingMiddleware:
+    """ASGI middleware: one root span per HTTP request, request id echoed in X-Request-ID."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING:
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1")[:64] or uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.attrs["status"] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (REQUEST_ID_HEADER.encode(), request_id.encode())]}
+            await send(message)
+
+        with start_trace(f"{scope['method']} {scope['path']}", request_id=request_id) as root:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    root.name = f"{scope['method']} {route}"
+
+
+def trace_app(app) -> None:
+    """Trace every request to a FastAPI app."""
+    app.add_middleware(TracingMiddleware)
+
+
+# ───── CLI: waterfall / flame summary ──────────────────────────────────
+
+def load_spans(key: str, exporter: Optional[SpanExporter] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Spans grouped by trace, for traces whose request id starts with `key` or whose thread id is `key`."""
+    traces: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    matched = set()
+    for record in (exporter or _exporter).records():
+        traces[record["trace"]].append(record)
+        if record["trace"].startswith(key) or record.get("thread") == key:
+            matched.add(record["trace"])
+    return {trace: traces[trace] for trace in matched}
+
+
+def _root(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ids = {s["span"] for s in spans}
+    roots = [s for s in spans if s["parent"] not in ids]
+    return max(roots, key=lambda s: s["ms"])
+
+
+def waterfall(spans: List[Dict[str, Any]], width: int = 40) -> List[str]:
+    root = _root(spans)
+    children = defaultdict(list)
+    for s in spans:
+        children[s["parent"]].append(s)
+    origin, total = root["start"], max(root["ms"], 1e-6)
+    thread = next((s["thread"] for s in spans if s.get("thread")), None)
+    lines = [f"trace {root['trace']}" + (f"  thread {thread}" if thread else "") + f"  {root['ms']:.1f} ms",
+             f"{'offset':>9} {'ms':>9}  span"]
+
+    def walk(s: Dict[str, Any], depth: int) -> None:
+        offset = (s["start"] - origin) * 1000
+        begin = min(int(offset / total * width), width - 1)
+        length = max(1, min(round(s["ms"] / total * width), width - begin))
+        bar = " " * begin + "█" * length + " " * (width - begin - length)
+        label = ("  " * depth + s["name"])[:44]
+        error = "  ✗ " + s["error"] if s.get("error") else ""
+        lines.append(f"{offset:>9.1f} {s['ms']:>9.1f}  {label:<44} |{bar}|{error}")
+        for child in sorted(children[s["span"]], key=lambda c: c["start"]):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return lines
+
+
+def flame_summary(traces: Dict[str, List[Dict[str, Any]]]) -> List[str]:
+    """Total and self time per span name across the given traces (self = minus time spent in child spans)."""
+    count, total, self_ms = defaultdict(int), defaultdict(float), defaultdict(float)
+    wall = 0.0
+    for spans in traces.values():
+        child_ms = defaultdict(float)
+        for s in spans:
+            child_ms[s["parent"]] += s["ms"]
+        wall += _root(spans)["ms"]
+        for s in spans:
+            count[s["name"]] += 1
+            total[s["name"]] += s["ms"]
+            self_ms[s["name"]] += max(s["ms"] - child_ms[s["span"]], 0.0)
+    lines = [f"{'span':<44} {'calls':>6} {'total ms':>10} {'self ms':>10} {'self %':>7}"]
+    for name in sorted(self_ms, key=self_ms.get, reverse=True):
+        share = self_ms[name] / wall * 100 if wall else 0.0
+        lines.append(f"{name[:44]:<44} {count[name]:>6} {total[name]:>10.1f} {self_ms[name]:>10.1f} {share:>6.1f}%")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Render traced requests from the local span files")
+    parser.add_argument("--path", default=TRACE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("show", help="waterfall of one request, or of every request in a thread")
+    show.add_argument("key", help="request id (or a prefix of it) or thread id")
+    show.add_argument("--summary", action="store_true", help="flame-style self-time summary instead")
+    recent = commands.add_parser("list", help="most recent traced requests")
+    recent.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+    exporter = SpanExporter(args.path)
+
+    if args.command == "list":
+        roots = [r for r in exporter.records() if r["parent"] is None]
+        for r in roots[-args.limit:]:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["start"]))
+            print(f"{stamp}  {r['trace']}  {r['ms']:>9.1f} ms  {r['name']}" + (f"  thread {r['thread']}" if r["thread"] else ""))
+        return
+
+    traces = load_spans(args.key, exporter)
+    if not traces:
+        raise SystemExit(f"No spans for {args.key!r} in {args.path}")
+    if args.summary:
+        print("\n".join(flame_summary(traces)))
+        return
+    for spans in sorted(traces.values(), key=lambda spans: _root(spans)["start"]):
+        print("\n".join(waterfall(spans)) + "\n")
+
+
+if __name__ == "__main__":
+    main()